@@ -0,0 +1,157 @@
+import time
+from collections import deque
+from typing import Optional, Deque
+
+import my_logging.get_loggers
+from data_managers import DataUtils
+from .DeadlineRateLimiter import DeadlineRateLimiter
+from .ObservedOssapiAsync import ApiResponseInfo
+
+logger = my_logging.get_loggers.osu_api_logger()
+
+
+class AdaptiveRateController:
+    """
+    Class to tune 'DeadlineRateLimiter' rate using AIMD (additive increase, multiplicative decrease).
+
+    The rate grows by 'additive_increase' every 'increase_interval_sec' without congestion signals
+    and is multiplied by 'backoff_factor' on HTTP 429 / 5xx, low 'X-RateLimit-Remaining' header
+    and latency spikes (at most once per 'backoff_cooldown_sec', one burst of 429s is one signal).
+    The rate never exceeds 'max_rate' (1 request/s by default, the fixed rate the bot uses without the controller)
+    and 'X-RateLimit-Limit' header (requests per minute).
+    The learned rate is persisted and used as the starting rate after restart.
+    """
+
+    def __init__(self, rate_limiter: DeadlineRateLimiter, *, min_rate: float = 0.5, max_rate: float = 1.0,
+                 additive_increase: float = 0.1, increase_interval_sec: float = 5.0,
+                 backoff_factor: float = 0.5, latency_backoff_factor: float = 0.8,
+                 backoff_cooldown_sec: float = 2.0, latency_spike_ratio: float = 3.0,
+                 remaining_threshold: float = 0.1, persist_interval_sec: float = 30.0):
+        self.rate_limiter = rate_limiter
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.increase_interval_sec = increase_interval_sec
+        self.backoff_factor = backoff_factor
+        self.latency_backoff_factor = latency_backoff_factor
+        self.backoff_cooldown_sec = backoff_cooldown_sec
+        self.latency_spike_ratio = latency_spike_ratio
+        self.remaining_threshold = remaining_threshold
+        self.persist_interval_sec = persist_interval_sec
+
+        self.header_rate_cap: Optional[float] = None
+        self.backoffs: int = 0
+        self.rate_limited_responses: int = 0
+        self._last_change_time: float = time.monotonic()
+        self._last_backoff_time: float = float('-inf')
+        self._last_persist_time: float = time.monotonic()
+        self._persisted_rate: Optional[float] = None
+        self._latency_fast: Optional[float] = None
+        self._latency_baseline: Optional[float] = None
+        self._response_times: Deque[float] = deque(maxlen=2000)
+
+    @property
+    def rate(self) -> float:
+        return self.rate_limiter.tokens_per_second
+
+    @property
+    def rate_cap(self) -> float:
+        if self.header_rate_cap is None:
+            return self.max_rate
+        return max(self.min_rate, min(self.max_rate, self.header_rate_cap))
+
+    async def load_state(self):
+        """
+        Restores the learned rate from the previous run.
+        """
+        state = await DataUtils.load_api_rate_state()
+        if state and (rate := state.get('tokens_per_second')):
+            self._persisted_rate = rate
+            self._set_rate(rate, reason='restored')
+
+    async def on_response(self, info: ApiResponseInfo):
+        """
+        Adjusts the rate according to the osu! api response.
+        """
+        current_time = time.monotonic()
+        self._response_times.append(current_time)
+
+        if info.rate_limit_limit:
+            self.header_rate_cap = info.rate_limit_limit / 60
+
+        if info.status == 429:
+            self.rate_limited_responses += 1
+            self._backoff(self.backoff_factor, reason='429')
+        elif info.status >= 500:
+            self._backoff(self.backoff_factor, reason=f'HTTP {info.status}')
+        elif (info.rate_limit_limit and info.rate_limit_remaining is not None
+              and info.rate_limit_remaining < info.rate_limit_limit * self.remaining_threshold):
+            self._backoff(self.backoff_factor, reason='rate limit remaining is low')
+        elif self._is_latency_spike(info.wire_time_sec):
+            self._backoff(self.latency_backoff_factor, reason='latency spike')
+        elif current_time - self._last_change_time >= self.increase_interval_sec:
+            self._set_rate(self.rate + self.additive_increase, reason='increase')
+
+        if self.rate > self.rate_cap:
+            self._set_rate(self.rate_cap, reason='rate limit header cap')
+
+        if current_time - self._last_persist_time >= self.persist_interval_sec:
+            await self.persist_state()
+
+    async def persist_state(self):
+        self._last_persist_time = time.monotonic()
+        if self._persisted_rate is not None and abs(self._persisted_rate - self.rate) < 1e-6:
+            return
+        self._persisted_rate = self.rate
+        await DataUtils.save_api_rate_state({'tokens_per_second': self.rate})
+
+    def _is_latency_spike(self, wire_time_sec: float) -> bool:
+        """
+        Compares fast moving average of the latency with the slow moving (baseline) one.
+        """
+        if self._latency_baseline is None:
+            self._latency_fast = self._latency_baseline = wire_time_sec
+            return False
+        self._latency_fast += 0.3 * (wire_time_sec - self._latency_fast)
+        is_spike = self._latency_fast > self._latency_baseline * self.latency_spike_ratio
+        if not is_spike:
+            # Spikes should not drag the baseline up
+            self._latency_baseline += 0.02 * (wire_time_sec - self._latency_baseline)
+        return is_spike
+
+    def _backoff(self, factor: float, *, reason: str):
+        current_time = time.monotonic()
+        if current_time - self._last_backoff_time < self.backoff_cooldown_sec:
+            return
+        self._last_backoff_time = current_time
+        self.backoffs += 1
+        self._set_rate(self.rate * factor, reason=reason)
+
+    def _set_rate(self, rate: float, *, reason: str):
+        rate = max(self.min_rate, min(self.rate_cap, rate))
+        self._last_change_time = time.monotonic()
+        if abs(rate - self.rate) < 1e-9:
+            return
+        logger.info(f"{self.__class__.__name__}: rate {self.rate:.3f} -> {rate:.3f} requests/s ({reason})",
+                    extra={'tokens_spent': 0})
+        self.rate_limiter.set_tokens_per_second(rate)
+
+    def effective_rate(self, window_sec: float = 60.0) -> float:
+        """
+        Responses per second actually received over the last 'window_sec' seconds.
+        """
+        current_time = time.monotonic()
+        recent = [t for t in self._response_times if t >= current_time - window_sec]
+        if len(recent) < 2:
+            return 0.0
+        return len(recent) / max(current_time - recent[0], 1.0)
+
+    def get_stats(self) -> dict:
+        return {
+            'target_rate': round(self.rate, 3),
+            'effective_rate': round(self.effective_rate(), 3),
+            'rate_cap': round(self.rate_cap, 3),
+            'backoffs': self.backoffs,
+            'rate_limited_responses': self.rate_limited_responses,
+            'latency_baseline_ms': round(self._latency_baseline * 1000) if self._latency_baseline else None,
+        }
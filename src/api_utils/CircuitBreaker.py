@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Optional
+
+from .RequestPriority import RequestPriority
+
+
+class CircuitBreaker:
+    """
+    Class to pause non-interactive osu! api requests while osu! is unhealthy.
+
+    After 'failure_threshold' consecutive server / network failures the circuit opens:
+    background and bulk requests wait (jobs pause instead of burning retries) for 'open_sec',
+    then one of them goes through as a probe ('half_open' state).
+    Its success closes the circuit and releases everyone, its failure opens the circuit again
+    for twice as long (up to 'max_open_sec').
+    Interactive requests are never held, their results count as probes too.
+    """
+
+    def __init__(self, *, failure_threshold: int = 5, open_sec: float = 30.0, max_open_sec: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.base_open_sec = open_sec
+        self.max_open_sec = max_open_sec
+
+        self.state: str = 'closed'  # 'closed', 'open' or 'half_open'
+        self.consecutive_failures: int = 0
+        self.open_sec: float = open_sec
+        self.open_until: float = 0.0
+        self.opened_count: int = 0
+        self.total_open_sec: float = 0.0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight: bool = False
+        self._state_changed = asyncio.Event()
+
+    async def wait_until_allowed(self, priority: RequestPriority) -> bool:
+        """
+        Waits till the request of the priority is allowed to be made.
+        Returns True If the request is the half open circuit probe
+        (its caller must report the result with 'record_success' / 'record_failure' or call 'abort_probe').
+        """
+        if priority == RequestPriority.INTERACTIVE:
+            return False
+        while self.state != 'closed':
+            current_time = time.monotonic()
+            if self.state == 'open' and current_time >= self.open_until:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._state_changed.clear()
+            timeout = self.open_until - current_time if self.state == 'open' else None
+            try:
+                await asyncio.wait_for(self._state_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != 'closed':
+            self.state = 'closed'
+            self.open_sec = self.base_open_sec
+            self.total_open_sec += time.monotonic() - self._opened_at
+            self._opened_at = None
+            self._state_changed.set()
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == 'half_open':
+            self.open_sec = min(self.open_sec * 2, self.max_open_sec)
+            self._open()
+        elif self.state == 'closed' and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def abort_probe(self):
+        """
+        The probe request was cancelled, lets another waiter probe.
+        """
+        self._probe_in_flight = False
+        self._state_changed.set()
+
+    def _open(self):
+        if self._opened_at is None:
+            self._opened_at = time.monotonic()
+            self.opened_count += 1
+        self.state = 'open'
+        self.open_until = time.monotonic() + self.open_sec
+        self._state_changed.set()
+
+    def get_stats(self) -> dict:
+        total_open_sec = self.total_open_sec
+        if self._opened_at is not None:
+            total_open_sec += time.monotonic() - self._opened_at
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'opened_count': self.opened_count,
+            'total_open_sec': round(total_open_sec, 3),
+        }
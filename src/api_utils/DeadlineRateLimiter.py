@@ -0,0 +1,151 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict
+
+from .FairShareScheduler import FairShareScheduler, ApiJob, current_api_job
+from .RequestPriority import RequestPriority, current_request_priority
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: RequestPriority
+    start_tag: float
+    seq: int
+    tokens_required: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    api_job: Optional[ApiJob] = field(compare=False)
+
+
+class DeadlineRateLimiter:
+    """
+    Class to rate limit the 'OsuApiUtils' class using token bucket approach.
+
+    Waiters are kept in a heap ordered by (priority, fair share start tag, arrival) and the head
+    is woken up exactly at the moment enough tokens are refilled (no polling).
+    Non-interactive requests leave 'interactive_reserve' tokens in the bucket, so an interactive
+    request waits at most '(tokens_required - interactive_reserve + queued interactive tokens) / tokens_per_second'
+    seconds no matter how many bulk requests are queued.
+    """
+
+    def __init__(self, tokens_per_second: float, max_tokens: float, *, interactive_reserve: float = 1.0,
+                 fair_share: Optional[FairShareScheduler] = None):
+        self.tokens_per_second: float = tokens_per_second
+        self.max_tokens: float = max_tokens
+        self.interactive_reserve: float = interactive_reserve
+        self.tokens: float = max_tokens
+        self.last_refresh_time: float = time.monotonic()
+        self.fair_share: FairShareScheduler = fair_share or FairShareScheduler()
+
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup_handle: Optional[asyncio.TimerHandle] = None
+
+    def _refresh_tokens(self):
+        """
+        Refreshes the amount of tokens available at the moment.
+        """
+        current_time = time.monotonic()
+        time_elapsed = current_time - self.last_refresh_time
+        self.tokens = min(self.tokens + time_elapsed * self.tokens_per_second, self.max_tokens)
+        self.last_refresh_time = current_time
+
+    def _tokens_to_keep(self, waiter: _Waiter) -> float:
+        if waiter.priority == RequestPriority.INTERACTIVE:
+            return 0.0
+        return max(0.0, min(self.interactive_reserve, self.max_tokens - waiter.tokens_required))
+
+    def _schedule(self):
+        """
+        Grants tokens to the waiters at the head of the heap
+        and arms the wakeup at the moment the next one becomes eligible.
+        """
+        if self._wakeup_handle is not None:
+            self._wakeup_handle.cancel()
+            self._wakeup_handle = None
+
+        self._refresh_tokens()
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.future.done():  # Cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+
+            tokens_needed = waiter.tokens_required + self._tokens_to_keep(waiter)
+            if self.tokens + 1e-9 >= tokens_needed:
+                heapq.heappop(self._waiters)
+                self.tokens -= waiter.tokens_required
+                self.fair_share.on_granted(waiter.priority, waiter.start_tag, waiter.api_job)
+                waiter.future.set_result(None)
+                continue
+
+            delay = (tokens_needed - self.tokens) / self.tokens_per_second
+            self._wakeup_handle = asyncio.get_running_loop().call_later(delay, self._schedule)
+            return
+
+    async def process_request(self, tokens_required: float, priority: Optional[RequestPriority] = None) -> float:
+        """
+        Waits till the request is allowed to be made.
+        Priority is taken from 'current_request_priority' If not specified.
+        Returns time (in seconds) spent waiting.
+        """
+        if tokens_required > self.max_tokens:
+            raise RuntimeError("The amount of tokens required cannot be greater than the 'max_tokens'")
+        if priority is None:
+            priority = current_request_priority.get()
+
+        start_time = time.monotonic()
+        waiter = _Waiter(priority=priority,
+                         start_tag=self.fair_share.start_tag(priority, tokens_required),
+                         seq=next(self._seq),
+                         tokens_required=tokens_required,
+                         future=asyncio.get_running_loop().create_future(),
+                         api_job=current_api_job.get())
+        heapq.heappush(self._waiters, waiter)
+        self._schedule()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Let the next waiter take the place
+            self._schedule()
+            raise
+        return time.monotonic() - start_time
+
+    def set_tokens_per_second(self, tokens_per_second: float):
+        """
+        Changes the refill rate, tokens refilled so far are counted with the old one.
+        """
+        self._refresh_tokens()
+        self.tokens_per_second = tokens_per_second
+        if self._waiters:
+            self._schedule()
+
+    def pause(self, seconds: float):
+        """
+        Makes the bucket empty for the next 'seconds' (e.g. 'Retry-After' of the rate limited response).
+        """
+        self._refresh_tokens()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.tokens_per_second
+        if self._waiters:
+            self._schedule()
+
+    def refund(self, tokens: float):
+        """
+        Gives back tokens of the request which never reached the server (e.g. connection error).
+        """
+        self._refresh_tokens()
+        self.tokens = min(self.tokens + tokens, self.max_tokens)
+        if self._waiters:
+            self._schedule()
+
+    def get_queue_stats(self) -> Dict[str, int]:
+        """
+        Returns the amount of waiting requests per priority class.
+        """
+        stats = {priority.name.lower(): 0 for priority in RequestPriority}
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                stats[waiter.priority.name.lower()] += 1
+        return stats
@@ -0,0 +1,116 @@
+import itertools
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Deque, List
+
+from .RequestPriority import RequestPriority, request_priority
+
+
+class ApiJob:
+    """
+    Long running job (bunch of osu! api requests) that shares the rate limiter budget with other jobs.
+    """
+
+    def __init__(self, job_id: int, name: str, owner_id: int, *, weight: float, total_requests: Optional[int]):
+        self.job_id = job_id
+        self.name = name
+        self.owner_id = owner_id
+        self.weight = weight
+        self.total_requests = total_requests
+
+        self.requests_done: int = 0
+        self.started_at: float = time.monotonic()
+        self.last_finish_tag: float = 0.0
+        self._recent_grant_times: Deque[float] = deque(maxlen=100)
+
+    def record_request(self):
+        self.requests_done += 1
+        self._recent_grant_times.append(time.monotonic())
+
+    def throughput(self) -> float:
+        """
+        Requests per second over the last (up to 100) requests.
+        """
+        if len(self._recent_grant_times) < 2:
+            elapsed = time.monotonic() - self.started_at
+            return self.requests_done / elapsed if elapsed > 0 else 0.0
+        elapsed = self._recent_grant_times[-1] - self._recent_grant_times[0]
+        return (len(self._recent_grant_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def eta_sec(self) -> Optional[float]:
+        """
+        Estimated time (in seconds) till the job is done, None If unknown.
+        """
+        throughput = self.throughput()
+        if self.total_requests is None or throughput == 0:
+            return None
+        return max(self.total_requests - self.requests_done, 0) / throughput
+
+    def get_stats(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'name': self.name,
+            'owner_id': self.owner_id,
+            'weight': self.weight,
+            'requests_done': self.requests_done,
+            'total_requests': self.total_requests,
+            'throughput': round(self.throughput(), 3),
+            'eta_sec': round(eta) if (eta := self.eta_sec()) is not None else None,
+        }
+
+
+current_api_job: ContextVar[Optional[ApiJob]] = ContextVar('current_api_job', default=None)
+
+
+class FairShareScheduler:
+    """
+    Class to split the rate limiter tokens between active jobs (start-time fair queuing).
+
+    Every request gets a start tag 'max(virtual_time, job.last_finish_tag)' and advances the job's
+    finish tag by 'tokens_required / job.weight'. Waiters of the same priority are served in
+    the start tag order, so jobs progress in weighted round-robin and a new job starts at the
+    current virtual time instead of waiting for the backlog of the older ones.
+    """
+
+    def __init__(self):
+        self.active_jobs: Dict[int, ApiJob] = {}
+        self._virtual_time: Dict[RequestPriority, float] = defaultdict(float)
+        self._job_ids = itertools.count(1)
+
+    @contextmanager
+    def job(self, name: str, owner_id: int, *, weight: float = 1.0, total_requests: Optional[int] = None,
+            priority: RequestPriority = RequestPriority.BULK):
+        """
+        Registers the job for all 'OsuApiUtils' requests made inside the block.
+        """
+        api_job = ApiJob(next(self._job_ids), name, owner_id, weight=weight, total_requests=total_requests)
+        self.active_jobs[api_job.job_id] = api_job
+        token = current_api_job.set(api_job)
+        try:
+            with request_priority(priority):
+                yield api_job
+        finally:
+            current_api_job.reset(token)
+            del self.active_jobs[api_job.job_id]
+
+    def start_tag(self, priority: RequestPriority, tokens_required: float) -> float:
+        """
+        Returns start tag of the new request of the current job.
+        """
+        virtual_time = self._virtual_time[priority]
+        api_job = current_api_job.get()
+        if api_job is None:
+            return virtual_time
+        start_tag = max(virtual_time, api_job.last_finish_tag)
+        api_job.last_finish_tag = start_tag + tokens_required / api_job.weight
+        return start_tag
+
+    def on_granted(self, priority: RequestPriority, start_tag: float, api_job: Optional[ApiJob]):
+        self._virtual_time[priority] = max(self._virtual_time[priority], start_tag)
+        if api_job is not None:
+            api_job.record_request()
+
+    def get_jobs_stats(self) -> List[dict]:
+        return [api_job.get_stats() for api_job in self.active_jobs.values()]
@@ -0,0 +1,118 @@
+import time
+from dataclasses import dataclass
+from typing import Optional, Callable, Awaitable, Mapping
+
+from ossapi import OssapiAsync
+
+
+class OsuApiRateLimitedError(Exception):
+    """
+    Raised when osu! api responds with HTTP 429 (Too Many Requests).
+    """
+
+    def __init__(self, url: str, retry_after: Optional[float]):
+        super().__init__(f"osu! api rate limited the request to {url} (retry after: {retry_after})")
+        self.url = url
+        self.retry_after = retry_after
+
+
+class OsuApiServerError(Exception):
+    """
+    Raised when osu! api responds with HTTP 5xx.
+    """
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"osu! api returned HTTP {status} for the request to {url}")
+        self.url = url
+        self.status = status
+
+
+@dataclass
+class ApiResponseInfo:
+    """
+    Dataclass to wrap up the HTTP level info of the osu! api response.
+    """
+
+    method: str
+    url: str
+    status: int
+    wire_time_sec: float
+    content_length: Optional[int]
+    rate_limit_limit: Optional[int]
+    rate_limit_remaining: Optional[int]
+    retry_after: Optional[float]
+
+    @classmethod
+    def from_response(cls, method: str, url: str, status: int, headers: Mapping[str, str],
+                      wire_time_sec: float, content_length: Optional[int]) -> 'ApiResponseInfo':
+        return cls(method=method,
+                   url=url,
+                   status=status,
+                   wire_time_sec=wire_time_sec,
+                   content_length=content_length,
+                   rate_limit_limit=_parse_number(headers.get('X-RateLimit-Limit'), int),
+                   rate_limit_remaining=_parse_number(headers.get('X-RateLimit-Remaining'), int),
+                   retry_after=_parse_number(headers.get('Retry-After'), float))
+
+
+def _parse_number(value: Optional[str], type_):
+    if value is None:
+        return None
+    try:
+        return type_(value)
+    except ValueError:
+        return None
+
+
+ResponseObserver = Callable[[ApiResponseInfo], Awaitable[None]]
+
+
+class ObservedOssapiAsync(OssapiAsync):
+    """
+    'OssapiAsync' that reports status, rate limit headers and wire time of every response
+    to the 'response_observer' and raises on HTTP 429 / 5xx
+    (plain 'ossapi' tries to parse the error page as json instead).
+
+    'ossapi' replaces the OAuth session on (re)authentication,
+    so the session's 'request_async' is wrapped every time the session is set.
+    """
+
+    def __init__(self, *args, response_observer: Optional[ResponseObserver] = None, **kwargs):
+        self.response_observer = response_observer
+        super().__init__(*args, **kwargs)
+
+    @property
+    def session(self):
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+        if session is not None and hasattr(session, 'request_async'):
+            session.request_async = self._wrap_request_async(session.request_async)
+
+    def _wrap_request_async(self, request_async):
+        async def observed_request_async(method, url, *, session, **kwargs):
+            start_time = time.monotonic()
+            try:
+                r = await request_async(method, url, session=session, **kwargs)
+            except Exception:
+                # Connection errors are retried by 'OsuApiUtils' with a new session
+                await session.close()
+                raise
+            info = ApiResponseInfo.from_response(method, url, r.status, r.headers,
+                                                 wire_time_sec=time.monotonic() - start_time,
+                                                 content_length=r.content_length)
+            if self.response_observer is not None:
+                await self.response_observer(info)
+
+            if r.status == 429 or r.status >= 500:
+                # 'ossapi' closes the aiohttp session only after a successful response
+                r.release()
+                await session.close()
+                if r.status == 429:
+                    raise OsuApiRateLimitedError(url, info.retry_after)
+                raise OsuApiServerError(url, r.status)
+            return r
+
+        return observed_request_async
@@ -0,0 +1,172 @@
+import bisect
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from .ObservedOssapiAsync import ApiResponseInfo
+
+# 'ossapi' endpoint called by the current task, responses are reported without it
+current_endpoint: ContextVar[Optional[str]] = ContextVar('current_endpoint', default=None)
+
+
+class LatencyHistogram:
+    """
+    Fixed buckets latency histogram (1 ms to ~2 hours, every bucket is 25% wider than the previous one).
+    Percentiles are upper bounds of the buckets, so they are accurate to 25%.
+    """
+
+    BUCKET_BOUNDS_SEC: List[float] = [0.001 * 1.25 ** i for i in range(71)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKET_BOUNDS_SEC) + 1)
+        self.count = 0
+        self.total_sec = 0.0
+        self.max_sec = 0.0
+
+    def record(self, value_sec: float):
+        self.counts[bisect.bisect_left(self.BUCKET_BOUNDS_SEC, value_sec)] += 1
+        self.count += 1
+        self.total_sec += value_sec
+        self.max_sec = max(self.max_sec, value_sec)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for ind, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(self.BUCKET_BOUNDS_SEC[ind], self.max_sec) \
+                    if ind < len(self.BUCKET_BOUNDS_SEC) else self.max_sec
+        return self.max_sec
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'total_sec': round(self.total_sec, 6),
+            'mean_sec': round(self.total_sec / self.count, 6) if self.count else None,
+            'p50_sec': _round(self.percentile(0.50)),
+            'p95_sec': _round(self.percentile(0.95)),
+            'p99_sec': _round(self.percentile(0.99)),
+            'max_sec': round(self.max_sec, 6),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 6) if value is not None else None
+
+
+class CallMetrics:
+    """
+    Metrics of one 'OsuApiUtils' method or 'ossapi' endpoint.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors: Counter[str] = Counter()
+        self.latency = LatencyHistogram()
+        self.retries: Counter[str] = Counter()
+        self.backoff_sec = 0.0
+        # Only for 'ossapi' endpoints
+        self.queue = LatencyHistogram()
+        self.wire = LatencyHistogram()
+        self.statuses: Counter[int] = Counter()
+        self.bytes_received = 0
+
+    def snapshot(self) -> dict:
+        res = {
+            'calls': self.calls,
+            'errors': dict(self.errors),
+            'latency': self.latency.snapshot(),
+        }
+        if self.retries:
+            res |= {'retries': dict(self.retries), 'backoff_sec': round(self.backoff_sec, 6)}
+        if self.wire.count or self.queue.count:
+            res |= {
+                'queue': self.queue.snapshot(),
+                'wire': self.wire.snapshot(),
+                'statuses': {str(status): count for status, count in self.statuses.items()},
+                'bytes_received': self.bytes_received,
+            }
+        return res
+
+
+class OsuApiMetrics:
+    """
+    Class to collect in-process metrics of the osu! api layer:
+    'OsuApiUtils' methods (including cache hits) and 'ossapi' endpoints (actual requests).
+
+    Latency of the endpoint call is split into the time spent queued in the rate limiter
+    and the time spent on the wire (the rest is 'ossapi' parsing the response).
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.methods: Dict[str, CallMetrics] = {}
+        self.endpoints: Dict[str, CallMetrics] = {}
+
+    def reset(self):
+        self.__init__()
+
+    def record_method(self, name: str, elapsed_sec: float, error: Optional[BaseException] = None):
+        metrics = self.methods.setdefault(name, CallMetrics())
+        metrics.calls += 1
+        metrics.latency.record(elapsed_sec)
+        if error is not None:
+            metrics.errors[type(error).__name__] += 1
+
+    def record_endpoint_call(self, endpoint: str, elapsed_sec: float, queue_sec: float,
+                             error: Optional[BaseException] = None):
+        metrics = self.endpoints.setdefault(endpoint, CallMetrics())
+        metrics.calls += 1
+        metrics.latency.record(elapsed_sec)
+        metrics.queue.record(queue_sec)
+        if error is not None:
+            metrics.errors[type(error).__name__] += 1
+
+    def record_retry(self, endpoint: str, error_class: str, backoff_sec: float):
+        metrics = self.endpoints.setdefault(endpoint, CallMetrics())
+        metrics.retries[error_class] += 1
+        metrics.backoff_sec += backoff_sec
+
+    def record_response(self, info: ApiResponseInfo):
+        endpoint = current_endpoint.get() or 'unknown'
+        metrics = self.endpoints.setdefault(endpoint, CallMetrics())
+        metrics.wire.record(info.wire_time_sec)
+        metrics.statuses[info.status] += 1
+        metrics.bytes_received += info.content_length or 0
+
+    def snapshot(self) -> dict:
+        """
+        Machine-readable (json serializable) snapshot of all metrics.
+        """
+        return {
+            'started_at': self.started_at,
+            'snapshot_at': time.time(),
+            'methods': {name: metrics.snapshot() for name, metrics in sorted(self.methods.items())},
+            'endpoints': {name: metrics.snapshot() for name, metrics in sorted(self.endpoints.items())},
+        }
+
+    def format_summary(self) -> str:
+        """
+        Short human-readable summary of the endpoints, sorted by the total time spent.
+        """
+        lines = [f"{'endpoint':<22}{'calls':>7}{'err':>5}{'retry':>6}{'p50':>8}{'p95':>8}{'p99':>8}"
+                 f"{'queue':>9}{'wire':>9}{'MB':>8}"]
+        for name, metrics in sorted(self.endpoints.items(), key=lambda item: -item[1].latency.total_sec):
+            lines.append(f"{name:<22}{metrics.calls:>7}{sum(metrics.errors.values()):>5}"
+                         f"{sum(metrics.retries.values()):>6}"
+                         f"{_format_sec(metrics.latency.percentile(0.50)):>8}"
+                         f"{_format_sec(metrics.latency.percentile(0.95)):>8}"
+                         f"{_format_sec(metrics.latency.percentile(0.99)):>8}"
+                         f"{metrics.queue.total_sec:>8.0f}s{metrics.wire.total_sec:>8.0f}s"
+                         f"{metrics.bytes_received / 1024 ** 2:>8.2f}")
+        return '\n'.join(lines)
+
+
+def _format_sec(value: Optional[float]) -> str:
+    if value is None:
+        return '-'
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s"
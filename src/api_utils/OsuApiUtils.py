@@ -1,16 +1,32 @@
-from typing import List, Optional
+import asyncio
+import time
+from typing import List, Optional, Any, AsyncIterator, Callable, Awaitable, Iterable, Dict
 
-from ossapi import BeatmapPlaycount, OssapiAsync, Score, BeatmapUserScore, User, BeatmapCompact, Beatmap
+from ossapi import BeatmapPlaycount, Score, BeatmapUserScore, User, Beatmap, \
+    BeatmapsetSearchResult
 from ossapi.enums import Grade, UserBeatmapType, ScoreType, BeatmapsetSearchMode, GameMode, \
     BeatmapsetSearchExplicitContent, BeatmapsetSearchCategory
 
 import my_logging.get_loggers
 from db_managers.data_classes import DbUserInfo
-from .LeakyBucketRateLimiter import LeakyBucketRateLimiter
+from .AdaptiveRateController import AdaptiveRateController
+from .CircuitBreaker import CircuitBreaker
+from .DeadlineRateLimiter import DeadlineRateLimiter
+from .FairShareScheduler import FairShareScheduler
+from .ObservedOssapiAsync import ObservedOssapiAsync, ApiResponseInfo
+from .OsuApiMetrics import OsuApiMetrics, current_endpoint
+from .RequestPriority import current_request_priority
+from .RetryPolicy import RetryPolicy, ApiErrorClass, classify_api_error
+from .SingleFlight import SingleFlight
+from .cache import ApiResponseCache, CacheTtl
+from .decorators import api_method_metrics
 from .models import CombinedBeatmapsetSearchResult
+from .serialization import serialize_api_model, deserialize_api_model, make_request_key
 
 logger = my_logging.get_loggers.osu_api_logger()
 
+ResponseListener = Callable[[str, Any], Awaitable[None]]
+
 
 class OsuApiUtils:
     """
@@ -18,176 +34,368 @@ class OsuApiUtils:
     Extension of 'ossapi' for the needs.
     """
 
-    def __init__(self, client_id, client_secret):
-        self.ossapi = OssapiAsync(client_id, client_secret)
-        self.rate_limiter = LeakyBucketRateLimiter(tokens_per_second=0.99, max_tokens=3.0)
+    DEFAULT_RETRY_POLICY = RetryPolicy()
+
+    def __init__(self, client_id, client_secret, *, adaptive_rate: bool = False, max_rate: float = 1.0,
+                 access_token: Optional[str] = None, base_url: Optional[str] = None):
+        """
+        If 'adaptive_rate' is True, 'AdaptiveRateController' tunes the rate (never above 'max_rate' requests/s),
+        otherwise the rate stays at 0.99 requests/s.
+        'access_token' and 'base_url' are meant for the local mock server ('mock_osu_api').
+        """
+        self.ossapi = ObservedOssapiAsync(client_id, client_secret, access_token=access_token,
+                                          response_observer=self._on_api_response)
+        if base_url is not None:
+            self.ossapi.base_url = base_url
+        self.fair_share = FairShareScheduler()
+        self.rate_limiter = DeadlineRateLimiter(tokens_per_second=0.99, max_tokens=3.0, fair_share=self.fair_share)
+        self.rate_controller = (AdaptiveRateController(self.rate_limiter, max_rate=max_rate)
+                                if adaptive_rate else None)
+        self.single_flight = SingleFlight()
+        self.cache = ApiResponseCache({
+            'user': CacheTtl(ttl_sec=60 * 60 * 6, negative_ttl_sec=60 * 60),
+            'beatmap_user_score': CacheTtl(ttl_sec=60 * 60, negative_ttl_sec=60 * 30),
+            'beatmap_user_scores': CacheTtl(ttl_sec=60 * 60, negative_ttl_sec=60 * 30),
+            'user_beatmaps': CacheTtl(ttl_sec=60 * 30, negative_ttl_sec=60 * 30),
+            'search_beatmapsets': CacheTtl(ttl_sec=60 * 60 * 6, negative_ttl_sec=60 * 60),
+        })
+        self.retry_policies: Dict[str, RetryPolicy] = {
+            # Polled again soon anyway
+            'user_scores': RetryPolicy(max_attempts=2),
+            # Search pages are big, a user waits for them
+            'search_beatmapsets': RetryPolicy(max_attempts=3, max_delay_sec=10.0),
+        }
+        self.circuit_breaker = CircuitBreaker()
+        self._response_listeners: List[ResponseListener] = []
+        self.metrics = OsuApiMetrics()
         self.DEFAULT_SEARCH_QUERY_DICT = {
             'explicit_content': BeatmapsetSearchExplicitContent.SHOW,
             'category': BeatmapsetSearchCategory.HAS_LEADERBOARD,
         }
         self._last_search_query_dict = self.DEFAULT_SEARCH_QUERY_DICT
 
+    async def initialize(self):
+        await self.cache.initialize_tables()
+        if self.rate_controller is not None:
+            await self.rate_controller.load_state()
+
+    async def _on_api_response(self, info: ApiResponseInfo):
+        self.metrics.record_response(info)
+        if self.rate_controller is not None:
+            await self.rate_controller.on_response(info)
+        if info.status == 429 and info.retry_after:
+            # After the controller's backoff, so the pause is measured with the lowered rate
+            self.rate_limiter.pause(info.retry_after)
+
+    def add_response_listener(self, listener: ResponseListener):
+        """
+        Registers 'listener(endpoint, response)' called with every response fetched from osu! api
+        (cache hits are not fetched, so they are not passed).
+        """
+        self._response_listeners.append(listener)
+
+    async def _notify_response_listeners(self, endpoint: str, response: Any):
+        for listener in self._response_listeners:
+            try:
+                await listener(endpoint, response)
+            except Exception as e:
+                logger.exception(f"{self.__class__.__name__}: response listener failed: {e}",
+                                 extra={'tokens_spent': 0})
+
+    def get_metrics_snapshot(self) -> dict:
+        """
+        'OsuApiMetrics' snapshot with the circuit breaker state.
+        """
+        return self.metrics.snapshot() | {'circuit_breaker': self.circuit_breaker.get_stats()}
+
+    def get_rate_stats(self) -> dict:
+        """
+        Returns the current (target and effective) rate of the osu! api requests.
+        """
+        if self.rate_controller is not None:
+            return self.rate_controller.get_stats()
+        return {'target_rate': self.rate_limiter.tokens_per_second}
+
     def get_last_search_query_dict(self):
         return self._last_search_query_dict
 
-    async def _log_and_process_request(self, *, tokens_required: float):
-        await self.rate_limiter.process_request(tokens_required=tokens_required)
+    def make_search_query_dict(self, query: Optional[str], mode: GameMode | BeatmapsetSearchMode) -> dict:
+        """
+        Makes keyword arguments for the 'search_beatmapsets' endpoint (without cursor).
+        """
+        match mode:
+            case GameMode.OSU:
+                mode = BeatmapsetSearchMode.OSU
+            case GameMode.CATCH:
+                mode = BeatmapsetSearchMode.CATCH
+            case GameMode.MANIA:
+                mode = BeatmapsetSearchMode.MANIA
+            case GameMode.TAIKO:
+                mode = BeatmapsetSearchMode.TAIKO
+        query_dict = dict(self.DEFAULT_SEARCH_QUERY_DICT)
+        query_dict['mode'] = mode
+        query_dict['query'] = query
+        query_dict['cursor'] = None
+        return query_dict
+
+    async def _log_and_process_request(self, *, tokens_required: float) -> float:
+        """
+        Returns time (in seconds) spent waiting for the rate limiter.
+        """
+        waited_sec = await self.rate_limiter.process_request(tokens_required=tokens_required)
         logger.info(f'{self.__class__.__name__}:',
                     extra={'tokens_spent': tokens_required})
+        return waited_sec
 
-    async def search_all_beatmapsets(self, *args, **kwargs) -> CombinedBeatmapsetSearchResult:
+    async def _request(self, endpoint: str, type_: Any, *args, refresh: bool = False, **kwargs) -> Any:
         """
-        Searches for beatmapsets using various criteria.
+        Makes the request to the 'ossapi' endpoint through the response cache.
+        Identical requests in flight are coalesced into one.
+        If 'refresh' is True, the cached response is ignored (and replaced with the new one).
+        """
+        key = make_request_key(*args, **kwargs)
+        return await self.single_flight.do(endpoint if not refresh else f'{endpoint}:refresh', key,
+                                           lambda: self._cached_request(endpoint, key, type_, *args,
+                                                                        refresh=refresh, **kwargs))
+
+    async def _cached_request(self, endpoint: str, key: str, type_: Any, *args, refresh: bool = False,
+                              **kwargs) -> Any:
+        """
+        'ValueError' ("no user", "no score") responses are cached too and re-raised on the cache hit.
+        Spends rate limiter token only on the cache miss.
+        """
+        if not self.cache.is_cached_endpoint(endpoint):
+            return await self._call_endpoint(endpoint, *args, **kwargs)
+
+        cached = await self.cache.get(endpoint, key) if not refresh else None
+        if cached is not None:
+            if cached.error is not None:
+                raise ValueError(cached.error)
+            return deserialize_api_model(self.ossapi, type_, cached.payload)
+
+        try:
+            res = await self._call_endpoint(endpoint, *args, **kwargs)
+        except ValueError as e:
+            await self.cache.put_error(endpoint, key, str(e))
+            raise
+        await self.cache.put(endpoint, key, serialize_api_model(res))
+        return res
+
+    async def _call_endpoint(self, endpoint: str, *args, **kwargs) -> Any:
+        """
+        Calls the 'ossapi' endpoint spending rate limiter token.
+        Failed requests are retried according to the endpoint's 'RetryPolicy':
+        rate limited ones right after the limiter has backed off (it waits 'Retry-After' itself),
+        server and network ones after the jittered backoff, which is spent outside the limiter.
+        Token of the request that never reached the server is given back.
+        Non-interactive requests wait while the 'circuit_breaker' is open.
+        """
+        retry_policy = self.retry_policies.get(endpoint, self.DEFAULT_RETRY_POLICY)
+        token = current_endpoint.set(endpoint)
+        try:
+            attempt = 1
+            while True:
+                is_probe = await self.circuit_breaker.wait_until_allowed(current_request_priority.get())
+                start_time = time.perf_counter()
+                queue_sec = 0.0
+                try:
+                    queue_sec = await self._log_and_process_request(tokens_required=1.0)
+                    res = await getattr(self.ossapi, endpoint)(*args, **kwargs)
+                except asyncio.CancelledError:
+                    if is_probe:
+                        self.circuit_breaker.abort_probe()
+                    raise
+                except Exception as e:
+                    self.metrics.record_endpoint_call(endpoint, time.perf_counter() - start_time, queue_sec, e)
+                    error_class = classify_api_error(e)
+                    if error_class in (ApiErrorClass.SERVER, ApiErrorClass.CONNECT, ApiErrorClass.NETWORK):
+                        self.circuit_breaker.record_failure()
+                    else:  # osu! has responded properly
+                        self.circuit_breaker.record_success()
+                    if error_class == ApiErrorClass.CONNECT:
+                        self.rate_limiter.refund(1.0)
+                    if not retry_policy.should_retry(error_class, attempt):
+                        raise
+
+                    backoff_sec = retry_policy.backoff_sec(error_class, attempt)
+                    self.metrics.record_retry(endpoint, error_class.value, backoff_sec)
+                    logger.warning(f"{self.__class__.__name__}: '{endpoint}' attempt {attempt} failed "
+                                   f"({error_class.value}: {e}), retrying in {backoff_sec:.2f}s",
+                                   extra={'tokens_spent': 0})
+                    await asyncio.sleep(backoff_sec)
+                    attempt += 1
+                    continue
+                self.metrics.record_endpoint_call(endpoint, time.perf_counter() - start_time, queue_sec)
+                self.circuit_breaker.record_success()
+                break
+        finally:
+            current_endpoint.reset(token)
+        await self._notify_response_listeners(endpoint, res)
+        return res
+
+    @api_method_metrics
+    async def iter_search_beatmapsets(self, *args, **kwargs) -> AsyncIterator[BeatmapsetSearchResult]:
+        """
+        Searches for beatmapsets using various criteria, yielding results page by page.
         Utilizes 'ossapi' 'search_beatmapsets' endpoint.
 
         Parameters:
             *args: Positional arguments for forwarding to 'search_beatmapsets' endpoint.
             **kwargs: Keyword arguments for forwarding to 'search_beatmapsets' endpoint.
 
-        Returns:
-            'CombinedBeatmapsetSearchResult' class instance.
-
-        Forwards search parameters to the 'search_beatmapsets' function
-        and collects cumulative results into 'CombinedBeatmapsetSearchResult' class.
+        Yields:
+            'BeatmapsetSearchResult' of every page as soon as it is fetched.
         """
-        match kwargs['mode']:
-            case GameMode.OSU:
-                kwargs['mode'] = BeatmapsetSearchMode.OSU
-            case GameMode.CATCH:
-                kwargs['mode'] = BeatmapsetSearchMode.CATCH
-            case GameMode.MANIA:
-                kwargs['mode'] = BeatmapsetSearchMode.MANIA
-            case GameMode.TAIKO:
-                kwargs['mode'] = BeatmapsetSearchMode.TAIKO
-        self._last_search_query_dict['mode'] = kwargs['mode']
-        self._last_search_query_dict['query'] = args[0] if args else None
-        self._last_search_query_dict['cursor'] = None
+        query_dict = self.make_search_query_dict(args[0] if args else None, kwargs['mode'])
+        self._last_search_query_dict = query_dict
 
-        total_results = []
         while True:
-            await self._log_and_process_request(tokens_required=1.0)
-            cur_res = await self.ossapi.search_beatmapsets(**self._last_search_query_dict)
-            total_results.append(cur_res)
+            cur_res = await self._request('search_beatmapsets', BeatmapsetSearchResult, **query_dict)
+            yield cur_res
             if cur_res.cursor is None or len(cur_res.beatmapsets) == 0 or cur_res.error is not None:
-                self._last_search_query_dict['cursor'] = None
-                return CombinedBeatmapsetSearchResult.from_beatmapset_search_results(total_results)
+                query_dict['cursor'] = None
+                return
+
+            query_dict['cursor'] = cur_res.cursor
+
+    @api_method_metrics
+    async def search_all_beatmapsets(self, *args, **kwargs) -> CombinedBeatmapsetSearchResult:
+        """
+        Searches for beatmapsets using various criteria.
+        Materialized version of 'iter_search_beatmapsets'.
 
-            self._last_search_query_dict['cursor'] = cur_res.cursor
+        Returns:
+            'CombinedBeatmapsetSearchResult' class instance.
+        """
+        total_results = [cur_res async for cur_res in self.iter_search_beatmapsets(*args, **kwargs)]
+        return CombinedBeatmapsetSearchResult.from_beatmapset_search_results(total_results)
 
+    @api_method_metrics
     async def check_if_user_exists(self, user_id: int) -> bool:
         """
         Checks If user with specified 'user_id' exists.
         Utilizes 'ossapi' 'user' endpoint.
         """
-        await self._log_and_process_request(tokens_required=1.0)
         try:
-            user_res = await self.ossapi.user(user_id)
+            user_res = await self._request('user', User, user_id)
         except ValueError:  # User does not exist
             return False
         if user_res.id == user_id:
             return True
         return False
 
-    async def get_user(self, user_id: int) -> Optional[User]:
+    @api_method_metrics
+    async def get_user(self, user_id: int, *, refresh: bool = False) -> Optional[User]:
         """
         Returns 'ossapi' User instance for specified 'user_id'.
         Utilizes 'ossapi' 'user' endpoint.
         """
-        await self._log_and_process_request(tokens_required=1.0)
         try:
-            user = await self.ossapi.user(user_id)
+            user = await self._request('user', User, user_id, refresh=refresh)
             return user
         except ValueError:  # User does not exist
             return None
 
+    @api_method_metrics
     async def get_user_beatmap_score_grade(self, beatmap_id: int, user_info: DbUserInfo) -> Optional[Grade]:
         """
         Gets grade of the user's top score on the given beatmap.
         Utilizes 'ossapi' 'beatmap_user_score' endpoint.
         """
-        await self._log_and_process_request(tokens_required=1.0)
         try:
-            beatmap_user_score: BeatmapUserScore = await self.ossapi.beatmap_user_score(beatmap_id,
-                                                                                        user_info.osu_user_id,
-                                                                                        mode=user_info.osu_game_mode)
+            beatmap_user_score: BeatmapUserScore = await self._request('beatmap_user_score', BeatmapUserScore,
+                                                                       beatmap_id, user_info.osu_user_id,
+                                                                       mode=user_info.osu_game_mode)
         except ValueError:  # Score does not exist
             return None
         score_grade = beatmap_user_score.score.rank
         return score_grade
 
-    async def get_user_beatmap_playcount(self, beatmap_id: int, user_info: DbUserInfo) -> Optional[BeatmapPlaycount]:
+    @api_method_metrics
+    async def iter_user_beatmap_playcounts(self, osu_user_id: int, *, refresh: bool = False) \
+            -> AsyncIterator[List[BeatmapPlaycount]]:
         """
-        Gets user's playcount on the given beatmap by iterating over ALL most played beatmaps.
+        Iterates over the user's MOST_PLAYED section of the profile, yielding it page by page
+        (ordered by playcount, descending).
         Utilizes 'ossapi' 'user_beatmaps' endpoint.
         """
         offset = 0
         limit = 100  # 100 is the max possible limit
         while True:
-            await self._log_and_process_request(tokens_required=1.0)
             beatmap_playcount_list: List[BeatmapPlaycount] = (
-                await self.ossapi.user_beatmaps(
-                    user_info.osu_user_id, type=UserBeatmapType.MOST_PLAYED, limit=limit, offset=offset))
+                await self._request('user_beatmaps', List[BeatmapPlaycount],
+                                    osu_user_id, type=UserBeatmapType.MOST_PLAYED, limit=limit,
+                                    offset=offset, refresh=refresh))
             if len(beatmap_playcount_list) == 0:
-                return None
-            for beatmap_playcount in beatmap_playcount_list:
-                if beatmap_playcount.beatmap_id == beatmap_id:
-                    return beatmap_playcount
-
+                return
+            yield beatmap_playcount_list
             offset += limit
 
+    @api_method_metrics
     async def get_user_most_recent_score(self, user_info: DbUserInfo) -> Optional[Score]:
         """
         Gets user's most recent score.
         Utilizes 'ossapi' 'user_scores' endpoint.
         """
-        await self._log_and_process_request(tokens_required=1.0)
-        scores: List[Score] = await self.ossapi.user_scores(user_info.osu_user_id,
-                                                            type=ScoreType.RECENT,
-                                                            include_fails=True,
-                                                            mode=user_info.osu_game_mode,
-                                                            limit=1)
+        scores: List[Score] = await self._request('user_scores', List[Score],
+                                                  user_info.osu_user_id,
+                                                  type=ScoreType.RECENT,
+                                                  include_fails=True,
+                                                  mode=user_info.osu_game_mode,
+                                                  limit=1)
         return scores[0] if scores else None
 
-    async def get_all_user_beatmaps(self, user_info: DbUserInfo) -> List[Beatmap | BeatmapCompact]:
+    @api_method_metrics
+    async def get_user_recent_scores(self, user_info: DbUserInfo, *, limit: int = 50, offset: int = 0) \
+            -> List[Score]:
         """
-        Gets ALL beatmaps from the user's MOST_PLAYED section of the profile.
-        Returns a list of 'Type[BeatmapCompact]' objects.
-        Utilizes 'ossapi' 'user_beatmaps' endpoint.
+        Gets user's recent passed scores (last 24 hours, newest first).
+        Responses are never cached.
+        Utilizes 'ossapi' 'user_scores' endpoint.
         """
-        offset = 0
-        limit = 100  # 100 is the max possible limit
-        beatmap_list = []
-        while True:
-            await self._log_and_process_request(tokens_required=1.0)
-            beatmap_playcount_list: List[BeatmapPlaycount] = (
-                await self.ossapi.user_beatmaps(
-                    user_info.osu_user_id, type=UserBeatmapType.MOST_PLAYED, limit=limit, offset=offset))
-            if len(beatmap_playcount_list) == 0:
-                break
-            for beatmap_playcount in beatmap_playcount_list:
-                beatmap = beatmap_playcount.beatmap()
-                beatmap_list.append(beatmap)
-            offset += limit
-        return beatmap_list
+        return await self._request('user_scores', List[Score],
+                                   user_info.osu_user_id,
+                                   type=ScoreType.RECENT,
+                                   include_fails=False,
+                                   mode=user_info.osu_game_mode,
+                                   limit=limit,
+                                   offset=offset)
 
-    async def get_all_user_beatmap_ids(self, user_info: DbUserInfo) -> List[int]:
+    @api_method_metrics
+    async def get_beatmap_user_scores(self, beatmap_id: int, user_info: DbUserInfo) -> List[Score]:
         """
-        Gets ALL beatmaps from the user's MOST_PLAYED section of the profile.
-        Returns a list of beatmap_ids.
-        Utilizes 'ossapi' 'user_beatmaps' endpoint.
+        Gets ALL user's scores on a given beatmap (every mods combination, one request).
+        Utilizes 'ossapi' 'beatmap_user_scores' endpoint.
+        """
+        try:
+            return await self._request('beatmap_user_scores', List[Score],
+                                       beatmap_id, user_info.osu_user_id, mode=user_info.osu_game_mode)
+        except ValueError:  # Beatmap does not exist
+            return []
+
+    @api_method_metrics
+    async def get_beatmaps(self, beatmap_ids: Iterable[int]) -> List[Beatmap]:
+        """
+        Gets beatmaps by ids, 50 ids per request (max possible amount).
+        Beatmaps that do not exist are skipped.
+        Utilizes 'ossapi' 'beatmaps' endpoint.
         """
-        return [beatmap.id for beatmap in await self.get_all_user_beatmaps(user_info)]
+        beatmap_ids = list(beatmap_ids)
+        beatmaps = []
+        for i in range(0, len(beatmap_ids), 50):
+            beatmaps += await self._request('beatmaps', List[Beatmap], beatmap_ids[i:i + 50])
+        return beatmaps
 
+    @api_method_metrics
     async def get_beatmap_user_best_score(self, beatmap_id: int, user_info: DbUserInfo) -> Optional[Score]:
         """
         Gets the best user's score on a given beatmap.
         Utilizes 'ossapi' 'beatmap_user_score' endpoint.
         """
-        await self._log_and_process_request(tokens_required=1.0)
         try:
-            beatmap_user_score: BeatmapUserScore = await self.ossapi.beatmap_user_score(beatmap_id,
-                                                                                        user_info.osu_user_id,
-                                                                                        mode=user_info.osu_game_mode)
+            beatmap_user_score: BeatmapUserScore = await self._request('beatmap_user_score', BeatmapUserScore,
+                                                                       beatmap_id, user_info.osu_user_id,
+                                                                       mode=user_info.osu_game_mode)
             return beatmap_user_score.score
         except ValueError:  # Score does not exist
             return None
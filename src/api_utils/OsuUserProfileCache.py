@@ -0,0 +1,105 @@
+import asyncio
+from typing import Dict, Optional, Any, TYPE_CHECKING
+
+from ossapi import UserCompact
+
+import my_logging.get_loggers
+from db_managers.data_classes import DbOsuUserProfileInfo
+from .RequestPriority import RequestPriority, request_priority
+
+if TYPE_CHECKING:
+    from api_utils.OsuApiUtils import OsuApiUtils
+    from db_managers.table_managers import OsuUserProfilesTableManager
+
+logger = my_logging.get_loggers.osu_api_logger()
+
+
+class OsuUserProfileCache:
+    """
+    Class to cache osu! user profiles (username, existence) for the whole process,
+    backed by the 'osu_user_profiles' database table.
+
+    Profiles older than 'REFRESH_AFTER_SEC' are still served, but refreshed in the background;
+    only the expired ones ('TTL_SEC', 'MISSING_TTL_SEC' for users that do not exist) are waited for.
+    Every 'user' response of 'OsuApiUtils' updates the cache too (see 'on_api_response').
+    """
+
+    TTL_SEC = 60 * 60 * 24 * 7
+    REFRESH_AFTER_SEC = 60 * 60 * 24
+    MISSING_TTL_SEC = 60 * 60
+
+    def __init__(self, osu_api_utils: 'OsuApiUtils', profiles_table: 'OsuUserProfilesTableManager'):
+        self.osu_api_utils = osu_api_utils
+        self.profiles_table = profiles_table
+        self._profiles: Dict[int, DbOsuUserProfileInfo] = {}
+        self._refresh_tasks: Dict[int, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {'memory_hits': 0, 'db_hits': 0, 'background_refreshes': 0, 'fetches': 0}
+
+    async def get_profile(self, osu_user_id: int) -> DbOsuUserProfileInfo:
+        profile = self._profiles.get(osu_user_id)
+        if profile is not None:
+            self.stats['memory_hits'] += 1
+        else:
+            profile = await self.profiles_table.get_profile(osu_user_id)
+            if profile is not None:
+                self.stats['db_hits'] += 1
+                self._profiles[osu_user_id] = profile
+
+        if profile is not None:
+            if not profile.exists:
+                if profile.age_sec < self.MISSING_TTL_SEC:
+                    return profile
+            elif profile.age_sec < self.REFRESH_AFTER_SEC:
+                return profile
+            elif profile.age_sec < self.TTL_SEC:
+                self._refresh_in_background(osu_user_id)
+                return profile
+        return await self._fetch_profile(osu_user_id)
+
+    async def get_username(self, osu_user_id: int) -> Optional[str]:
+        return (await self.get_profile(osu_user_id)).username
+
+    async def user_exists(self, osu_user_id: int) -> bool:
+        return (await self.get_profile(osu_user_id)).exists
+
+    async def on_api_response(self, endpoint: str, response: Any):
+        """
+        'OsuApiUtils' response listener, stores every fetched user profile.
+        """
+        if endpoint == 'user' and isinstance(response, UserCompact):
+            await self._store(DbOsuUserProfileInfo.from_user(response))
+
+    def get_stats(self) -> dict:
+        return self.stats | {'profiles_in_memory': len(self._profiles)}
+
+    async def _fetch_profile(self, osu_user_id: int) -> DbOsuUserProfileInfo:
+        self.stats['fetches'] += 1
+        # Cache of 'OsuApiUtils' is bypassed, expiration is decided here
+        user = await self.osu_api_utils.get_user(osu_user_id, refresh=True)
+        if user is None or user.id != osu_user_id:
+            profile = DbOsuUserProfileInfo.missing(osu_user_id)
+            await self._store(profile)
+            return profile
+        # Stored by 'on_api_response' already
+        return self._profiles.get(osu_user_id) or DbOsuUserProfileInfo.from_user(user)
+
+    def _refresh_in_background(self, osu_user_id: int):
+        if osu_user_id in self._refresh_tasks:
+            return
+        self.stats['background_refreshes'] += 1
+
+        async def refresh():
+            try:
+                with request_priority(RequestPriority.BACKGROUND):
+                    await self._fetch_profile(osu_user_id)
+            except Exception as e:
+                logger.warning(f"{self.__class__.__name__}: refresh of the user {osu_user_id} failed: {e}",
+                               extra={'tokens_spent': 0})
+            finally:
+                self._refresh_tasks.pop(osu_user_id, None)
+
+        self._refresh_tasks[osu_user_id] = asyncio.create_task(refresh())
+
+    async def _store(self, profile: DbOsuUserProfileInfo):
+        self._profiles[profile.osu_user_id] = profile
+        await self.profiles_table.merge_profile(profile)
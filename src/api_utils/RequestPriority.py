@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+
+class RequestPriority(IntEnum):
+    """
+    Priority classes of the osu! api requests. Lower value is served first.
+    """
+
+    INTERACTIVE = 0  # Single quick commands (^most_recent, ^config_change, ...)
+    BACKGROUND = 1  # Longer commands made of a bunch of requests (^load_all_user_played_beatmaps, ...)
+    BULK = 2  # Long running jobs (^load_all_user_scores, ^beatmapsets_stats, ...)
+
+
+current_request_priority: ContextVar[RequestPriority] = ContextVar('current_request_priority',
+                                                                   default=RequestPriority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    """
+    Sets priority of all 'OsuApiUtils' requests made inside the block
+    (and inside the tasks created in the block).
+    """
+    token = current_request_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_request_priority.reset(token)
@@ -0,0 +1,63 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from enum import Enum
+
+import aiohttp
+
+from .ObservedOssapiAsync import OsuApiRateLimitedError, OsuApiServerError
+
+
+class ApiErrorClass(Enum):
+    """
+    Classes of the osu! api request failures.
+    """
+
+    RATE_LIMITED = 'rate_limited'  # HTTP 429, the limiter backs off (and waits 'Retry-After') itself
+    SERVER = 'server'  # HTTP 5xx
+    CONNECT = 'connect'  # The request never reached the server
+    NETWORK = 'network'  # Connection dropped or timed out in the middle of the request
+    CLIENT = 'client'  # Anything else ('ValueError' "no user", "no score", ...), never retried
+
+
+def classify_api_error(error: BaseException) -> ApiErrorClass:
+    if isinstance(error, OsuApiRateLimitedError):
+        return ApiErrorClass.RATE_LIMITED
+    if isinstance(error, OsuApiServerError):
+        return ApiErrorClass.SERVER
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return ApiErrorClass.CONNECT
+    if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)):
+        return ApiErrorClass.NETWORK
+    return ApiErrorClass.CLIENT
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Dataclass to describe how failed requests of the endpoint are retried.
+    Backoff is exponential with full jitter: 'uniform(0, min(max_delay_sec, base_delay_sec * 2 ** (attempt - 1)))'.
+    """
+
+    max_attempts: int = 4
+    base_delay_sec: float = 1.0
+    max_delay_sec: float = 30.0
+    retry_server_errors: bool = True
+    retry_network_errors: bool = True
+
+    def should_retry(self, error_class: ApiErrorClass, attempt: int) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+        if error_class == ApiErrorClass.RATE_LIMITED:
+            return True
+        if error_class == ApiErrorClass.SERVER:
+            return self.retry_server_errors
+        if error_class in (ApiErrorClass.CONNECT, ApiErrorClass.NETWORK):
+            return self.retry_network_errors
+        return False
+
+    def backoff_sec(self, error_class: ApiErrorClass, attempt: int) -> float:
+        if error_class == ApiErrorClass.RATE_LIMITED:
+            # The rate limiter is already paused for 'Retry-After', waiting here would double it
+            return 0.0
+        return random.uniform(0, min(self.max_delay_sec, self.base_delay_sec * 2 ** (attempt - 1)))
@@ -0,0 +1,46 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Hashable, Callable, Awaitable, Any, Tuple
+
+from .RequestPriority import RequestPriority, current_request_priority
+
+
+class SingleFlight:
+    """
+    Class to coalesce identical in-flight calls.
+    The first caller makes the call, the rest await the same task and share its result or exception.
+    The call runs with the first caller's context (request priority and 'ApiJob'),
+    so only the calls of the same 'RequestPriority' are coalesced
+    (an interactive request must not wait in the queue of a bulk one).
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Tuple[str, RequestPriority, Hashable], asyncio.Task] = {}
+        self.deduplicated: Dict[str, int] = defaultdict(int)
+
+    async def do(self, endpoint: str, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits 'call()' or the identical call that is already in flight.
+        """
+        full_key = (endpoint, current_request_priority.get(), key)
+        task = self._in_flight.get(full_key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[full_key] = task
+            task.add_done_callback(lambda done_task: self._on_done(full_key, done_task))
+        else:
+            self.deduplicated[endpoint] += 1
+        # Cancellation of one caller must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _on_done(self, full_key: Tuple[str, RequestPriority, Hashable], task: asyncio.Task):
+        if self._in_flight.get(full_key) is task:
+            del self._in_flight[full_key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved in case every caller was cancelled
+
+    def get_stats(self) -> dict:
+        return {
+            'in_flight': len(self._in_flight),
+            'deduplicated': dict(self.deduplicated),
+        }
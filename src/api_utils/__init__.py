@@ -0,0 +1 @@
+from .RequestPriority import RequestPriority, request_priority
@@ -0,0 +1,170 @@
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import select, delete, func, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import my_logging.get_loggers
+from core import PathManager
+from .models import ApiCacheBase, ApiCacheEntryTable
+
+logger = my_logging.get_loggers.osu_api_logger()
+
+
+@dataclass
+class CacheTtl:
+    """
+    Time to live (in seconds) of the endpoint responses.
+    'negative_ttl_sec' is used for "no user" / "no score" ('ValueError') responses.
+    """
+
+    ttl_sec: float
+    negative_ttl_sec: float
+
+
+@dataclass
+class CachedResponse:
+    """
+    Dataclass to wrap up the cache entry.
+    Exactly one of 'payload' and 'error' is set.
+    """
+
+    payload: Optional[str]
+    error: Optional[str]
+
+
+@dataclass
+class EndpointCacheStats:
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+
+
+class ApiResponseCache:
+    """
+    Class to cache 'OsuApiUtils' responses in SQLite with TTL per endpoint (async SQLAlchemy).
+    Every cache hit saves one rate limiter token.
+    """
+
+    def __init__(self, endpoint_ttls: Dict[str, CacheTtl], *, db_name=PathManager.API_CACHE_DB,
+                 max_entries: int = 200_000):
+        self.endpoint_ttls = endpoint_ttls
+        self.max_entries = max_entries
+        self.db_name = db_name
+        self.async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_name}', echo=False)
+        self.async_session = async_sessionmaker(self.async_engine, expire_on_commit=False)
+
+        self.stats: Dict[str, EndpointCacheStats] = defaultdict(EndpointCacheStats)
+        self.evictions: int = 0
+        self._entries_count: int = 0
+
+    async def initialize_tables(self):
+        """
+        Initializes cache table and drops expired entries.
+        """
+        async with self.async_engine.begin() as conn:
+            await conn.run_sync(ApiCacheBase.metadata.create_all)
+        async with self.async_session() as session:
+            await session.execute(delete(ApiCacheEntryTable).where(ApiCacheEntryTable.expires_at <= time.time()))
+            await session.commit()
+            count = await session.execute(select(func.count()).select_from(ApiCacheEntryTable))
+        self._entries_count = count.scalar() or 0
+
+    def is_cached_endpoint(self, endpoint: str) -> bool:
+        return endpoint in self.endpoint_ttls
+
+    async def get(self, endpoint: str, key: str) -> Optional[CachedResponse]:
+        """
+        Returns cached response If it is present and not expired, None otherwise.
+        """
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(ApiCacheEntryTable).where(ApiCacheEntryTable.key == self._full_key(endpoint, key),
+                                                 ApiCacheEntryTable.expires_at > time.time())
+            )
+            entry = result.scalar()
+
+        stats = self.stats[endpoint]
+        if entry is None:
+            stats.misses += 1
+            return None
+        if entry.error is not None:
+            stats.negative_hits += 1
+        else:
+            stats.hits += 1
+        return CachedResponse(payload=entry.payload, error=entry.error)
+
+    async def put(self, endpoint: str, key: str, payload: str):
+        await self._put(endpoint, key, payload=payload, error=None,
+                        ttl_sec=self.endpoint_ttls[endpoint].ttl_sec)
+
+    async def put_error(self, endpoint: str, key: str, error: str):
+        await self._put(endpoint, key, payload=None, error=error,
+                        ttl_sec=self.endpoint_ttls[endpoint].negative_ttl_sec)
+
+    async def _put(self, endpoint: str, key: str, *, payload: Optional[str], error: Optional[str], ttl_sec: float):
+        if ttl_sec <= 0:
+            return
+        current_time = time.time()
+        values = {
+            'endpoint': endpoint,
+            'payload': payload,
+            'error': error,
+            'created_at': current_time,
+            'expires_at': current_time + ttl_sec,
+        }
+        full_key = self._full_key(endpoint, key)
+        async with self.async_session() as session:
+            result = await session.execute(
+                insert(ApiCacheEntryTable).values(key=full_key, **values).on_conflict_do_nothing())
+            # Only new keys are counted, the existing entry (e.g. refreshed one) is overwritten
+            is_inserted = result.rowcount == 1
+            if not is_inserted:
+                await session.execute(update(ApiCacheEntryTable).where(ApiCacheEntryTable.key == full_key)
+                                      .values(**values))
+            await session.commit()
+        if not is_inserted:
+            return
+        self._entries_count += 1
+        if self._entries_count > self.max_entries:
+            await self._evict()
+
+    async def _evict(self):
+        """
+        Drops expired entries and, If still over the 'max_entries',
+        the entries closest to their expiration (10% of the 'max_entries' extra to not evict on every put).
+        """
+        async with self.async_session() as session:
+            result = await session.execute(
+                delete(ApiCacheEntryTable).where(ApiCacheEntryTable.expires_at <= time.time()))
+            evicted = result.rowcount
+            count = (await session.execute(select(func.count()).select_from(ApiCacheEntryTable))).scalar() or 0
+            overflow = count - self.max_entries
+            if overflow > 0:
+                overflow += self.max_entries // 10
+                oldest_keys = select(ApiCacheEntryTable.key).order_by(ApiCacheEntryTable.expires_at).limit(overflow)
+                result = await session.execute(
+                    delete(ApiCacheEntryTable).where(ApiCacheEntryTable.key.in_(oldest_keys)))
+                evicted += result.rowcount
+                count -= result.rowcount
+            await session.commit()
+        self.evictions += evicted
+        self._entries_count = count
+        logger.info(f"{self.__class__.__name__}: evicted entries, {count} left", extra={'tokens_spent': 0})
+
+    def get_stats(self) -> dict:
+        """
+        Returns hit/miss counters per endpoint.
+        """
+        return {
+            'entries': self._entries_count,
+            'evictions': self.evictions,
+            'endpoints': {endpoint: vars(stats) for endpoint, stats in self.stats.items()},
+        }
+
+    @staticmethod
+    def _full_key(endpoint: str, key: str) -> str:
+        return f'{endpoint}:{key}'
@@ -0,0 +1 @@
+from .ApiResponseCache import ApiResponseCache, CacheTtl, CachedResponse
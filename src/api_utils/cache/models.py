@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Float, Index
+from sqlalchemy.ext.asyncio import AsyncAttrs
+from sqlalchemy.orm import DeclarativeBase
+
+
+class ApiCacheBase(AsyncAttrs, DeclarativeBase):
+    pass
+
+
+class ApiCacheEntryTable(ApiCacheBase):
+    __tablename__ = 'api_response_cache'
+
+    key = Column(String, primary_key=True)
+    endpoint = Column(String)
+    payload = Column(String, nullable=True)  # json of the response, NULL for the negative entries
+    error = Column(String, nullable=True)  # 'ValueError' message for the negative entries
+    created_at = Column(Float)
+    expires_at = Column(Float)
+
+    __table_args__ = (
+        Index('ix_api_response_cache_expires_at', 'expires_at'),
+    )
@@ -0,0 +1,39 @@
+import inspect
+import time
+from functools import wraps
+
+
+def api_method_metrics(func):
+    """
+    Records latency and errors of the 'OsuApiUtils' method into its 'metrics'.
+    Async generators are measured from the first to the last page.
+    """
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def gen_wrapper(self, *args, **kwargs):
+            start_time = time.perf_counter()
+            error = None
+            try:
+                async for item in func(self, *args, **kwargs):
+                    yield item
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self.metrics.record_method(func.__name__, time.perf_counter() - start_time,
+                                           error if isinstance(error, Exception) else None)
+
+        return gen_wrapper
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            res = await func(self, *args, **kwargs)
+        except Exception as e:
+            self.metrics.record_method(func.__name__, time.perf_counter() - start_time, e)
+            raise
+        self.metrics.record_method(func.__name__, time.perf_counter() - start_time)
+        return res
+
+    return wrapper
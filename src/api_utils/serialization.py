@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+from enum import Enum
+from json import JSONEncoder
+from typing import Any
+
+from ossapi import Mod, OssapiAsync, Cursor
+from ossapi.models import Model
+from ossapi.utils import Field
+
+
+class ApiModelEncoder(JSONEncoder):
+    """
+    'ossapi' 'ModelEncoder' that keeps the attributes declared with 'Field(name=...)'.
+
+    'ossapi' 'serialize_model' skips private attributes, so things like 'BeatmapPlaycount._beatmap'
+    are lost. Here such attributes are written under their api name, so the json can be
+    instantiated back by 'ossapi' without losing any data.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            # One of the formats 'ossapi' 'Datetime' parses back
+            if o.tzinfo is None:
+                return o.strftime("%Y-%m-%d %H:%M:%S")
+            return o.strftime("%Y-%m-%dT%H:%M:%S%z")
+        if isinstance(o, Enum):
+            return o.value
+        if isinstance(o, Mod):
+            return o.value
+        if isinstance(o, Cursor):
+            return o.__dict__
+
+        if isinstance(o, Model):
+            to_serialize = {}
+            for name, value in o.__dict__.items():
+                if name.startswith("_"):
+                    field = getattr(type(o), name, None)
+                    if not isinstance(field, Field) or not field.name:
+                        continue
+                    name = field.name
+                to_serialize[name] = value
+            return to_serialize
+
+        return super().default(o)
+
+
+def serialize_api_model(model: Any) -> str:
+    """
+    Serializes 'ossapi' model (or list of models) into the json string.
+    """
+    return json.dumps(model, cls=ApiModelEncoder, ensure_ascii=False)
+
+
+def deserialize_api_model(ossapi: OssapiAsync, type_: Any, data: str) -> Any:
+    """
+    Instantiates 'ossapi' model of 'type_' from the json string made by 'serialize_api_model'.
+    """
+    return ossapi._instantiate_type(type_, json.loads(data))
+
+
+def make_request_key(*args, **kwargs) -> str:
+    """
+    Makes a stable string key out of the request arguments.
+    """
+    return json.dumps([args, kwargs], cls=ApiModelEncoder, ensure_ascii=False, sort_keys=True)
@@ -22,6 +22,9 @@ class PathManager:
     COMMAND_USAGE: pathlib.Path
     ANIME_GIRLS_DIR: pathlib.Path
     BOT_DATA_DB: pathlib.Path
+    API_CACHE_DB: pathlib.Path
+    API_RATE_STATE: pathlib.Path
+    API_METRICS_SNAPSHOT: pathlib.Path
     DOT_ENV: pathlib.Path
 
     LOGS_DIR: pathlib.Path
@@ -46,6 +49,9 @@ class PathManager:
         cls.COMMAND_USAGE = cls.DATA_DIR / "command_usage.json"
         cls.ANIME_GIRLS_DIR = cls.DATA_DIR / "anime_girls"
         cls.BOT_DATA_DB = cls.DATA_DIR / "bot_data.db"
+        cls.API_CACHE_DB = cls.DATA_DIR / "api_cache.db"
+        cls.API_RATE_STATE = cls.DATA_DIR / "api_rate_state.json"  # Created on the first rate change
+        cls.API_METRICS_SNAPSHOT = cls.DATA_DIR / "api_metrics.json"  # Created by '^api_metrics_export'
         cls.DOT_ENV = cls.PROJECT_ROOT / ".env"
 
         cls.LOGS_DIR = cls.PROJECT_ROOT / "logs"
@@ -72,6 +78,7 @@ class PathManager:
             cls.COMMAND_USAGE,
             cls.ANIME_GIRLS_DIR,
             cls.BOT_DATA_DB,
+            cls.API_CACHE_DB,
             cls.DOT_ENV,
             cls.LOGS_DIR,
             cls.OSU_API_LOGS_DIR,
@@ -93,6 +93,15 @@ class DataUtils:
     def load_osu_api_credentials() -> Tuple[str | None, str | None]:
         return os.getenv("OSU_APIV2_CLIENT_ID"), os.getenv("OSU_APIV2_CLIENT_SECRET")
 
+    @staticmethod
+    def load_osu_api_rate_settings() -> dict:
+        """
+        Returns 'OsuApiUtils' rate keyword arguments.
+        Adaptive rate control is off unless 'OSU_API_ADAPTIVE_RATE' is set.
+        """
+        return {'adaptive_rate': os.getenv("OSU_API_ADAPTIVE_RATE", '').lower() in ('1', 'true', 'yes'),
+                'max_rate': float(os.getenv("OSU_API_MAX_RATE") or 1.0)}
+
     @staticmethod
     async def load_command_usage() -> Dict[str, int]:
         return await DataUtils._file_operation(PathManager.COMMAND_USAGE, 'r')
@@ -100,3 +109,17 @@ class DataUtils:
     @staticmethod
     async def update_command_usage(data: Dict[str, int]):
         return await DataUtils._file_operation(PathManager.COMMAND_USAGE, 'w', data)
+
+    @staticmethod
+    async def load_api_rate_state() -> Optional[dict]:
+        if not os.path.exists(PathManager.API_RATE_STATE):
+            return None
+        return await DataUtils._file_operation(PathManager.API_RATE_STATE, 'r')
+
+    @staticmethod
+    async def save_api_rate_state(data: dict):
+        return await DataUtils._file_operation(PathManager.API_RATE_STATE, 'w', data)
+
+    @staticmethod
+    async def save_api_metrics_snapshot(data: dict):
+        return await DataUtils._file_operation(PathManager.API_METRICS_SNAPSHOT, 'w', data)
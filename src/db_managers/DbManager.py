@@ -1,9 +1,14 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import text, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 import my_logging.get_loggers
 from core import PathManager
+from .migrations import MigrationRunner, MIGRATIONS
 from .models.base import Base
-from .table_managers import UsersTableManager, ScoresTableManager, UserPlayedBeatmapsTableManager
+from .table_managers import UsersTableManager, ScoresTableManager, UserPlayedBeatmapsTableManager, \
+    UserMostPlayedTableManager, BeatmapCatalogTableManager, ScoreImportJobsTableManager, OsuUserProfilesTableManager, \
+    UserAggregatesTableManager
 
 logger = my_logging.get_loggers.database_utilities_logger()
 
@@ -13,19 +18,73 @@ class DbManager:
     Class for managing database operations (async SQLAlchemy).
     """
 
+    # Applied to every new connection of both engines
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # Readers are not blocked by the writer
+        'synchronous': 'NORMAL',  # fsync on checkpoints only (still durable against application crashes)
+        'busy_timeout': 5000,
+        'cache_size': -64000,  # 64 MB
+        'mmap_size': 256 * 1024 ** 2,
+        'temp_store': 'MEMORY',
+    }
+    READ_POOL_SIZE = 4
+
     def __init__(self, db_name=PathManager.BOT_DATA_DB):
         self.db_name = db_name
-        self.async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_name}', echo=False)
+        # 'aiosqlite' defaults to a new connection (and pragmas) per session
+        self.async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_name}', echo=False,
+                                                poolclass=AsyncAdaptedQueuePool)
         self.async_session = async_sessionmaker(self.async_engine, expire_on_commit=False)
+        # Pooled connections with 'query_only' for the read only queries (commands, predicates)
+        self.read_async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_name}', echo=False,
+                                                     poolclass=AsyncAdaptedQueuePool,
+                                                     pool_size=self.READ_POOL_SIZE, max_overflow=0)
+        self.read_async_session = async_sessionmaker(self.read_async_engine, expire_on_commit=False)
+        self._set_pragmas_on_connect(self.async_engine, self.SQLITE_PRAGMAS)
+        self._set_pragmas_on_connect(self.read_async_engine, self.SQLITE_PRAGMAS | {'query_only': 'ON'})
+
+        engine_args = (self.async_engine, self.async_session, self.read_async_session)
+        self.users: UsersTableManager = UsersTableManager(*engine_args)
+        self.scores: ScoresTableManager = ScoresTableManager(*engine_args)
+        self.user_played_beatmaps: UserPlayedBeatmapsTableManager = UserPlayedBeatmapsTableManager(*engine_args)
+        self.user_most_played: UserMostPlayedTableManager = UserMostPlayedTableManager(*engine_args)
+        self.beatmap_catalog: BeatmapCatalogTableManager = BeatmapCatalogTableManager(*engine_args)
+        self.score_import_jobs: ScoreImportJobsTableManager = ScoreImportJobsTableManager(*engine_args)
+        self.osu_user_profiles: OsuUserProfilesTableManager = OsuUserProfilesTableManager(*engine_args)
+        self.user_aggregates: UserAggregatesTableManager = UserAggregatesTableManager(*engine_args)
+
+    @staticmethod
+    def _set_pragmas_on_connect(async_engine: AsyncEngine, pragmas: dict):
+        @event.listens_for(async_engine.sync_engine, 'connect')
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.close()
+
+    async def get_pragmas(self, *, read_engine: bool = False) -> dict:
+        """
+        Returns current values of 'SQLITE_PRAGMAS' (and 'query_only') of the engine connection.
+        """
+        engine = self.read_async_engine if read_engine else self.async_engine
+        res = {}
+        async with engine.connect() as conn:
+            for name in list(self.SQLITE_PRAGMAS) + ['query_only']:
+                res[name] = (await conn.execute(text(f'PRAGMA {name}'))).scalar()
+        return res
 
-        self.users: UsersTableManager = UsersTableManager(self.async_engine, self.async_session)
-        self.scores: ScoresTableManager = ScoresTableManager(self.async_engine, self.async_session)
-        self.user_played_beatmaps: UserPlayedBeatmapsTableManager = UserPlayedBeatmapsTableManager(self.async_engine,
-                                                                                                   self.async_session)
+    async def dispose(self):
+        """
+        Closes all pooled connections of both engines.
+        """
+        await self.read_async_engine.dispose()
+        await self.async_engine.dispose()
 
     async def initialize_tables(self):
         """
-        Initializes all tables.
+        Creates missing tables and applies pending migrations to the existing ones.
         """
-        async with self.async_engine.begin() as conn:
+        async with self.async_engine.connect() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.commit()
+            await conn.run_sync(MigrationRunner(MIGRATIONS).run)
@@ -0,0 +1,82 @@
+import json
+import zlib
+
+# Shape of 'serialize_model(score)' (keys in the serialization order) with the typical values.
+# Preset dictionary of the deflate stream: every stored score repeats most of it.
+# Never change it, add a new format instead (stored scores are decoded with the dictionary they were encoded with).
+_SCORE_SKELETON_V1 = {
+    'id': 0, 'best_id': 0, 'user_id': 0, 'accuracy': 0.9, 'mods': 0, 'score': 0, 'max_combo': 0, 'perfect': False,
+    'statistics': {'count_50': 0, 'count_100': 0, 'count_300': 0, 'count_geki': 0, 'count_katu': 0,
+                   'count_miss': 0},
+    'pp': None, 'rank': 'A', 'created_at': 0, 'mode': 'osu', 'mode_int': 0, 'replay': False, 'passed': True,
+    'current_user_attributes': {'pin': None},
+    'beatmap': {
+        'difficulty_rating': 0.0, 'id': 0, 'mode': 'osu', 'status': 1, 'total_length': 0, 'version': '',
+        'user_id': 0, 'beatmapset_id': 0, 'checksum': None, 'failtimes': None, 'max_combo': None,
+        'accuracy': 0.0, 'ar': 0.0, 'bpm': 0.0, 'convert': False, 'count_circles': 0, 'count_sliders': 0,
+        'count_spinners': 0, 'cs': 0.0, 'deleted_at': None, 'drain': 0.0, 'hit_length': 0, 'is_scoreable': True,
+        'last_updated': 0, 'mode_int': 0, 'passcount': 0, 'playcount': 0, 'ranked': 1,
+        'url': 'https://osu.ppy.sh/beatmaps/', 'owner': None,
+    },
+    'beatmapset': {
+        'artist': '', 'artist_unicode': '',
+        'covers': {'cover': 'https://assets.ppy.sh/beatmaps/0/covers/cover.jpg?0',
+                   'cover_2x': 'https://assets.ppy.sh/beatmaps/0/covers/cover@2x.jpg?0',
+                   'card': 'https://assets.ppy.sh/beatmaps/0/covers/card.jpg?0',
+                   'card_2x': 'https://assets.ppy.sh/beatmaps/0/covers/card@2x.jpg?0',
+                   'list': 'https://assets.ppy.sh/beatmaps/0/covers/list.jpg?0',
+                   'list_2x': 'https://assets.ppy.sh/beatmaps/0/covers/list@2x.jpg?0',
+                   'slimcover': 'https://assets.ppy.sh/beatmaps/0/covers/slimcover.jpg?0',
+                   'slimcover_2x': 'https://assets.ppy.sh/beatmaps/0/covers/slimcover@2x.jpg?0'},
+        'creator': '', 'favourite_count': 0, 'id': 0, 'nsfw': False, 'offset': 0, 'play_count': 0,
+        'preview_url': '//b.ppy.sh/preview/0.mp3', 'source': '', 'status': 1, 'spotlight': False, 'title': '',
+        'title_unicode': '', 'user_id': 0, 'video': False, 'hype': None, 'beatmaps': None, 'converts': None,
+        'current_nominations': None, 'current_user_attributes': None, 'description': None, 'discussions': None,
+        'events': None, 'genre': None, 'has_favourited': None, 'language': None, 'nominations': None,
+        'pack_tags': None, 'ratings': None, 'recent_favourites': None, 'related_users': None, 'track_id': None,
+    },
+    'user': {
+        'avatar_url': 'https://a.ppy.sh/0?0.jpeg', 'country_code': '', 'id': 0, 'is_active': True,
+        'is_bot': False, 'is_deleted': False, 'is_online': False, 'is_supporter': False, 'last_visit': None,
+        'pm_friends_only': False, 'profile_colour': None, 'username': '', 'account_history': None,
+        'active_tournament_banner': None, 'badges': None, 'beatmap_playcounts_count': None, 'blocks': None,
+        'country': None, 'cover': None, 'default_group': None, 'favourite_beatmapset_count': None,
+        'follow_user_mapping': None, 'follower_count': None, 'friends': None, 'graveyard_beatmapset_count': None,
+        'groups': None, 'guest_beatmapset_count': None, 'is_restricted': None, 'is_silenced': None,
+        'loved_beatmapset_count': None, 'mapping_follower_count': None, 'monthly_playcounts': None, 'page': None,
+        'pending_beatmapset_count': None, 'previous_usernames': None, 'rankHistory': None, 'rank_history': None,
+        'ranked_and_approved_beatmapset_count': None, 'ranked_beatmapset_count': None,
+        'replays_watched_counts': None, 'scores_best_count': None, 'scores_first_count': None,
+        'scores_recent_count': None, 'statistics': None, 'statistics_rulesets': None, 'support_level': None,
+        'unranked_beatmapset_count': None, 'unread_pm_count': None, 'user_achievements': None,
+        'user_preferences': None,
+    },
+    'rank_country': None, 'rank_global': None, 'weight': None, 'match': None, 'type': 'score_best_osu',
+}
+
+
+class ScoreDataCodec:
+    """
+    Class to compress 'score_json_data' for the 'scores.score_data' column.
+    Encoded data starts with the format byte, the rest depends on the format.
+    """
+
+    FORMAT_ZLIB_DICT_V1 = 1  # Raw deflate with '_SCORE_SKELETON_V1' as the preset dictionary
+    DICTIONARIES = {
+        FORMAT_ZLIB_DICT_V1: json.dumps(_SCORE_SKELETON_V1).encode(),
+    }
+    FORMAT = FORMAT_ZLIB_DICT_V1
+    LEVEL = 9
+
+    @classmethod
+    def encode(cls, score_json_data: str) -> bytes:
+        compressor = zlib.compressobj(cls.LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=cls.DICTIONARIES[cls.FORMAT])
+        return bytes([cls.FORMAT]) + compressor.compress(score_json_data.encode()) + compressor.flush()
+
+    @classmethod
+    def decode(cls, score_data: bytes) -> str:
+        data_format = score_data[0]
+        if data_format not in cls.DICTIONARIES:
+            raise ValueError(f"Unknown score data format: {data_format}")
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=cls.DICTIONARIES[data_format])
+        return (decompressor.decompress(score_data[1:]) + decompressor.flush()).decode()
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from ossapi import GameMode, BeatmapCompact, Beatmap
+
+if TYPE_CHECKING:
+    from db_managers.models.models import BeatmapTable
+
+
+@dataclass
+class DbBeatmapInfo:
+    """
+    Dataclass to wrap up and store the row entry of the 'beatmaps' (catalog) database table.
+    """
+
+    id: int
+    beatmapset_id: int
+    version: str
+    difficulty_rating: float
+    mode: GameMode
+    _mode: str
+    status: int
+    total_length: int
+    max_combo: Optional[int]
+
+    @classmethod
+    def from_row(cls, row: 'BeatmapTable'):
+        return cls(id=row.id,
+                   beatmapset_id=row.beatmapset_id,
+                   version=row.version,
+                   difficulty_rating=row.difficulty_rating,
+                   mode=row.mode,
+                   _mode=str(row.mode.value),
+                   status=row.status,
+                   total_length=row.total_length,
+                   max_combo=row.max_combo)
+
+    @classmethod
+    def from_beatmap(cls, beatmap: Beatmap | BeatmapCompact):
+        return cls(id=beatmap.id,
+                   beatmapset_id=beatmap.beatmapset_id,
+                   version=beatmap.version,
+                   difficulty_rating=beatmap.difficulty_rating,
+                   mode=beatmap.mode,
+                   _mode=str(beatmap.mode.value),
+                   status=int(beatmap.status.value),
+                   total_length=beatmap.total_length,
+                   max_combo=beatmap.max_combo)
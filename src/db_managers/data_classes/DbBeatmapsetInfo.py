@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ossapi import BeatmapsetCompact, Beatmapset
+
+if TYPE_CHECKING:
+    from db_managers.models.models import BeatmapsetTable
+
+
+@dataclass
+class DbBeatmapsetInfo:
+    """
+    Dataclass to wrap up and store the row entry of the 'beatmapsets' (catalog) database table.
+    """
+
+    id: int
+    title: str
+    title_unicode: str
+    artist: str
+    artist_unicode: str
+    creator: str
+    status: int
+
+    @classmethod
+    def from_row(cls, row: 'BeatmapsetTable'):
+        return cls(id=row.id,
+                   title=row.title,
+                   title_unicode=row.title_unicode,
+                   artist=row.artist,
+                   artist_unicode=row.artist_unicode,
+                   creator=row.creator,
+                   status=row.status)
+
+    @classmethod
+    def from_beatmapset(cls, beatmapset: Beatmapset | BeatmapsetCompact):
+        return cls(id=beatmapset.id,
+                   title=beatmapset.title,
+                   title_unicode=beatmapset.title_unicode,
+                   artist=beatmapset.artist,
+                   artist_unicode=beatmapset.artist_unicode,
+                   creator=beatmapset.creator,
+                   status=int(beatmapset.status.value))
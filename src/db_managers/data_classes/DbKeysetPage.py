@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass
+class DbKeysetPage(Generic[T]):
+    """
+    Dataclass to wrap up one page of the keyset (seek) paginated query.
+    'next_cursor' is the '(stored sort value, id)' of the last item to pass for the next page,
+    None If it is the last page.
+    """
+
+    items: List[T]
+    next_cursor: Optional[Tuple]
+
+    @property
+    def is_last(self) -> bool:
+        return self.next_cursor is None
@@ -0,0 +1,49 @@
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from ossapi import UserCompact
+
+if TYPE_CHECKING:
+    from db_managers.models.models import OsuUserProfileTable
+
+
+@dataclass
+class DbOsuUserProfileInfo:
+    """
+    Dataclass to wrap up and store the row entry of the 'osu_user_profiles' database table.
+    """
+
+    osu_user_id: int
+    username: Optional[str]
+    country_code: Optional[str]
+    exists: bool
+    fetched_at: float
+
+    @classmethod
+    def from_row(cls, row: 'OsuUserProfileTable'):
+        return cls(osu_user_id=row.osu_user_id,
+                   username=row.username,
+                   country_code=row.country_code,
+                   exists=bool(row.exists),
+                   fetched_at=row.fetched_at)
+
+    @classmethod
+    def from_user(cls, user: UserCompact):
+        return cls(osu_user_id=user.id,
+                   username=user.username,
+                   country_code=user.country_code,
+                   exists=True,
+                   fetched_at=time.time())
+
+    @classmethod
+    def missing(cls, osu_user_id: int):
+        return cls(osu_user_id=osu_user_id,
+                   username=None,
+                   country_code=None,
+                   exists=False,
+                   fetched_at=time.time())
+
+    @property
+    def age_sec(self) -> float:
+        return time.time() - self.fetched_at
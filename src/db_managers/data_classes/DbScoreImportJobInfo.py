@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from ossapi import GameMode
+
+from db_managers.data_classes import DbUserInfo
+
+if TYPE_CHECKING:
+    from db_managers.models.models import ScoreImportJobTable
+
+
+@dataclass
+class DbScoreImportJobInfo:
+    """
+    Dataclass to wrap up and store the row entry of the 'score_import_jobs' database table.
+    """
+
+    id: Optional[int]
+    user_info_id: int
+    osu_user_id: int
+    mode: GameMode
+    _mode: str
+    all_scores: bool
+    status: str
+    cursor: int
+    total_beatmaps: int
+    inserted_scores: int
+    channel_id: Optional[int]
+
+    @classmethod
+    def from_row(cls, row: 'ScoreImportJobTable'):
+        return cls(id=row.id,
+                   user_info_id=row.user_info_id,
+                   osu_user_id=row.osu_user_id,
+                   mode=row.mode,
+                   _mode=str(row.mode.value),
+                   all_scores=bool(row.all_scores),
+                   status=row.status,
+                   cursor=row.cursor,
+                   total_beatmaps=row.total_beatmaps,
+                   inserted_scores=row.inserted_scores,
+                   channel_id=row.channel_id)
+
+    @classmethod
+    def new_job(cls, user_info: DbUserInfo, total_beatmaps: int, *, all_scores: bool, channel_id: Optional[int]):
+        return cls(id=None,
+                   user_info_id=user_info.discord_user_id,
+                   osu_user_id=user_info.osu_user_id,
+                   mode=user_info.osu_game_mode,
+                   _mode=str(user_info.osu_game_mode.value),
+                   all_scores=all_scores,
+                   status='running',
+                   cursor=0,
+                   total_beatmaps=total_beatmaps,
+                   inserted_scores=0,
+                   channel_id=channel_id)
+
+    def user_info(self) -> DbUserInfo:
+        """
+        Config of the user at the moment the job was created.
+        """
+        return DbUserInfo.from_args(self.user_info_id, self.osu_user_id, self.mode)
+
+    @property
+    def remaining_beatmaps(self) -> int:
+        return self.total_beatmaps - self.cursor
@@ -1,10 +1,12 @@
 import json
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from typing import Optional, TYPE_CHECKING
 
 from ossapi import serialize_model, Mod, Score, GameMode
+from sqlalchemy import inspect
 
+from db_managers.ScoreDataCodec import ScoreDataCodec
 from db_managers.data_classes import DbUserInfo
 
 if TYPE_CHECKING:
@@ -19,38 +21,81 @@ class DbScoreInfo:
 
     id: Optional[int]
     user_info_id: int
-    score_json_data: str
     mods: Mod
     _mods: int
     mode: GameMode
     _mode: str
     beatmap_id: int
     timestamp: Optional[datetime]
+    osu_score_id: Optional[int]
+    is_best: bool
+    # Typed copies of the score data fields (None for the rows stored before they were added)
+    accuracy: Optional[float] = None
+    total_score: Optional[int] = None
+    rank: Optional[str] = None
+    pp: Optional[float] = None
+    max_combo: Optional[int] = None
+    beatmap_version: Optional[str] = None
+    ended_at: Optional[datetime] = None  # UTC
+    # 'ScoreDataCodec' encoded 'serialize_model(score)', None If the query did not load it
+    score_data: Optional[bytes] = field(default=None, repr=False)
 
     @classmethod
     def from_row(cls, row: 'ScoreTable'):
+        # Score data is not loaded If the query deferred it
+        score_data = None if 'score_data' in inspect(row).unloaded else row.score_data
         return cls(id=row.id,
                    user_info_id=row.user_info_id,
-                   score_json_data=row.score_json_data,
                    mods=row.mods,
                    _mods=int(row.mods.value),
                    mode=row.mode,
                    _mode=str(row.mode.value),
                    beatmap_id=row.beatmap_id,
-                   timestamp=row.timestamp)
+                   timestamp=row.timestamp,
+                   osu_score_id=row.osu_score_id,
+                   is_best=bool(row.is_best) if row.is_best is not None else True,
+                   accuracy=row.accuracy,
+                   total_score=row.total_score,
+                   rank=row.rank,
+                   pp=row.pp,
+                   max_combo=row.max_combo,
+                   beatmap_version=row.beatmap_version,
+                   ended_at=row.ended_at,
+                   score_data=score_data)
 
     @classmethod
-    def from_score_and_user_info(cls, score_instance: Score, user_info: DbUserInfo):
+    def from_score_and_user_info(cls, score_instance: Score, user_info: DbUserInfo, *, is_best: bool = True,
+                                 beatmap_id: Optional[int] = None):
         # Creates a new DbScoreInfo instance using data from the Score and DbUserInfo instances.
+        # 'beatmap_id' is needed for scores without 'beatmap' ('beatmap_user_scores' endpoint).
         return cls(id=None,
                    user_info_id=user_info.discord_user_id,
-                   score_json_data=serialize_model(score_instance),
                    mods=score_instance.mods,
                    _mods=int(score_instance.mods.value),
                    mode=score_instance.mode,
                    _mode=str(score_instance.mode.value),
-                   beatmap_id=score_instance.beatmap.id,
-                   timestamp=None)
+                   beatmap_id=beatmap_id if beatmap_id is not None else score_instance.beatmap.id,
+                   timestamp=None,
+                   osu_score_id=score_instance.id,
+                   is_best=is_best,
+                   accuracy=score_instance.accuracy,
+                   total_score=score_instance.score,
+                   rank=score_instance.rank.value if score_instance.rank else None,
+                   pp=score_instance.pp,
+                   max_combo=score_instance.max_combo,
+                   beatmap_version=score_instance.beatmap.version if score_instance.beatmap else None,
+                   ended_at=(score_instance.created_at.astimezone(timezone.utc).replace(tzinfo=None)
+                             if score_instance.created_at else None),
+                   score_data=ScoreDataCodec.encode(serialize_model(score_instance)))
 
-    def deserialize_score_json(self) -> dict:
-        return json.loads(self.score_json_data)
+    def get_score_json_data(self) -> Optional[str]:
+        """
+        Returns the score JSON, None If the score data was not loaded.
+        """
+        if self.score_data is None:
+            return None
+        return ScoreDataCodec.decode(self.score_data)
+
+    def deserialize_score_json(self) -> Optional[dict]:
+        score_json_data = self.get_score_json_data()
+        return json.loads(score_json_data) if score_json_data is not None else None
@@ -0,0 +1,62 @@
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional, Dict
+
+from ossapi import GameMode
+
+if TYPE_CHECKING:
+    from db_managers.models.models import UserAggregatesTable
+
+
+@dataclass
+class DbUserAggregatesInfo:
+    """
+    Dataclass to wrap up and store the row entry of the 'user_aggregates' database table.
+    """
+
+    user_info_id: int
+    _mode: str
+    scores_count: int = 0
+    beatmaps_count: int = 0
+    grade_counts: Dict[str, int] = field(default_factory=dict)  # Rank -> scores count
+    mods_counts: Dict[int, int] = field(default_factory=dict)  # Mods combination value -> scores count
+    updated_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: 'UserAggregatesTable'):
+        return cls(user_info_id=row.user_info_id,
+                   _mode=row._mode,
+                   scores_count=row.scores_count or 0,
+                   beatmaps_count=row.beatmaps_count or 0,
+                   grade_counts=json.loads(row.grade_counts or '{}'),
+                   mods_counts={int(mods): count for mods, count in json.loads(row.mods_counts or '{}').items()},
+                   updated_at=row.updated_at)
+
+    @property
+    def mode(self) -> GameMode:
+        return GameMode(self._mode)
+
+    def add_scores(self, rank: Optional[str], mods: Optional[int], count: int = 1):
+        """
+        Counts 'count' scores with the 'rank' and 'mods' (negative 'count' to uncount them).
+        """
+        self.scores_count += count
+        if rank is not None:
+            self.grade_counts[rank] = self.grade_counts.get(rank, 0) + count
+            if self.grade_counts[rank] <= 0:
+                del self.grade_counts[rank]
+        if mods is not None:
+            self.mods_counts[mods] = self.mods_counts.get(mods, 0) + count
+            if self.mods_counts[mods] <= 0:
+                del self.mods_counts[mods]
+
+    def to_values(self) -> dict:
+        return {
+            'user_info_id': self.user_info_id,
+            '_mode': self._mode,
+            'scores_count': self.scores_count,
+            'beatmaps_count': self.beatmaps_count,
+            'grade_counts': json.dumps(self.grade_counts),
+            'mods_counts': json.dumps(self.mods_counts),
+            'updated_at': self.updated_at,
+        }
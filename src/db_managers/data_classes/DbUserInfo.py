@@ -44,9 +44,5 @@ class DbUserInfo:
         if self._osu_user_name:
             return self._osu_user_name
 
-        osu_api_utils = UtilsFactory.get_osu_api_utils()
-        user = await osu_api_utils.get_user(self.osu_user_id)
-        if user:
-            self._osu_user_name = user.username
-            return self._osu_user_name
-        return None
+        self._osu_user_name = await UtilsFactory.get_osu_user_profile_cache().get_username(self.osu_user_id)
+        return self._osu_user_name
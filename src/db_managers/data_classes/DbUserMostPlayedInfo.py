@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from ossapi import BeatmapPlaycount
+
+if TYPE_CHECKING:
+    from db_managers.models.models import UserMostPlayedTable
+
+
+@dataclass
+class DbUserMostPlayedInfo:
+    """
+    Dataclass to wrap up and store the row entry of the 'user_most_played' database table.
+    """
+
+    osu_user_id: int
+    beatmap_id: int
+    beatmapset_id: Optional[int]
+    count: int
+    title: Optional[str]
+    artist: Optional[str]
+
+    @classmethod
+    def from_row(cls, row: 'UserMostPlayedTable'):
+        return cls(osu_user_id=row.osu_user_id,
+                   beatmap_id=row.beatmap_id,
+                   beatmapset_id=row.beatmapset_id,
+                   count=row.count,
+                   title=row.title,
+                   artist=row.artist)
+
+    @classmethod
+    def from_beatmap_playcount(cls, beatmap_playcount: BeatmapPlaycount, osu_user_id: int):
+        beatmapset = beatmap_playcount.beatmapset
+        return cls(osu_user_id=osu_user_id,
+                   beatmap_id=beatmap_playcount.beatmap_id,
+                   beatmapset_id=beatmapset.id if beatmapset else None,
+                   count=beatmap_playcount.count,
+                   title=beatmapset.title if beatmapset else None,
+                   artist=beatmapset.artist if beatmapset else None)
@@ -1,3 +1,10 @@
 from .DbScoreInfo import DbScoreInfo
 from .DbUserInfo import DbUserInfo
 from .DbUserPlayedBeatmapInfo import DbUserPlayedBeatmapInfo
+from .DbUserMostPlayedInfo import DbUserMostPlayedInfo
+from .DbBeatmapInfo import DbBeatmapInfo
+from .DbBeatmapsetInfo import DbBeatmapsetInfo
+from .DbScoreImportJobInfo import DbScoreImportJobInfo
+from .DbOsuUserProfileInfo import DbOsuUserProfileInfo
+from .DbKeysetPage import DbKeysetPage
+from .DbUserAggregatesInfo import DbUserAggregatesInfo
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import Connection
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    Dataclass to describe one schema migration.
+    'upgrade' must be safe to run again (on the tables already created by 'create_all' too).
+    """
+
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
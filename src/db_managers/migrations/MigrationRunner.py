@@ -0,0 +1,47 @@
+import time
+from typing import Iterable, List, Set
+
+from sqlalchemy import Connection, select, insert
+
+import my_logging.get_loggers
+from db_managers.models.models import SchemaMigrationTable
+from .Migration import Migration
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+
+class MigrationRunner:
+    """
+    Class to apply not yet applied migrations (in the order of versions) to the existing database.
+    Every applied migration is committed and recorded in the 'schema_migrations' table.
+    """
+
+    def __init__(self, migrations: Iterable[Migration]):
+        self.migrations: List[Migration] = sorted(migrations, key=lambda migration: migration.version)
+        versions = [migration.version for migration in self.migrations]
+        if len(versions) != len(set(versions)):
+            raise ValueError(f"Duplicate migration versions: {versions}")
+
+    @staticmethod
+    def get_applied_versions(conn: Connection) -> Set[int]:
+        return set(conn.execute(select(SchemaMigrationTable.version)).scalars())
+
+    def run(self, conn: Connection) -> List[int]:
+        """
+        Applies pending migrations, returns their versions.
+        """
+        applied_versions = self.get_applied_versions(conn)
+        res = []
+        for migration in self.migrations:
+            if migration.version in applied_versions:
+                continue
+            start_time = time.perf_counter()
+            migration.upgrade(conn)
+            conn.execute(insert(SchemaMigrationTable).values(version=migration.version,
+                                                             name=migration.name,
+                                                             applied_at=time.time()))
+            conn.commit()
+            res.append(migration.version)
+            logger.info(f"Applied migration {migration.version} '{migration.name}' "
+                        f"in {time.perf_counter() - start_time:.2f}s")
+        return res
@@ -0,0 +1,3 @@
+from .Migration import Migration
+from .MigrationRunner import MigrationRunner
+from .versions import MIGRATIONS
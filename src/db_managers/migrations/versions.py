@@ -0,0 +1,149 @@
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import Connection, text
+
+from db_managers.ScoreDataCodec import ScoreDataCodec
+from db_managers.data_classes import DbUserAggregatesInfo
+from .Migration import Migration
+
+
+def _add_column(conn: Connection, table: str, column: str, column_type: str) -> bool:
+    """
+    Adds the column If the table does not have it yet, returns True If the column was added.
+    """
+    columns = {row[1] for row in conn.execute(text(f'PRAGMA table_info({table})'))}
+    if column in columns:
+        return False
+    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}'))
+    return True
+
+
+def _scores_osu_score_id(conn: Connection):
+    _add_column(conn, 'scores', 'osu_score_id', 'INTEGER')
+    conn.execute(text("UPDATE scores SET osu_score_id = json_extract(score_json_data, '$.id') "
+                      "WHERE osu_score_id IS NULL"))
+    # Re-running the import used to store the same score again
+    conn.execute(text("DELETE FROM scores WHERE osu_score_id IS NOT NULL AND id NOT IN "
+                      "(SELECT MAX(id) FROM scores WHERE osu_score_id IS NOT NULL "
+                      "GROUP BY user_info_id, osu_score_id)"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS unique_user_osu_score "
+                      "ON scores (user_info_id, osu_score_id)"))
+
+
+def _scores_is_best(conn: Connection):
+    _add_column(conn, 'scores', 'is_best', 'BOOLEAN')
+    # Only best scores were imported before
+    conn.execute(text("UPDATE scores SET is_best = 1 WHERE is_best IS NULL"))
+
+
+def _composite_indexes(conn: Connection):
+    for stmt in (
+            "CREATE INDEX IF NOT EXISTS ix_scores_user_mode_timestamp ON scores (user_info_id, _mode, timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_scores_user_mode_beatmap "
+            "ON scores (user_info_id, _mode, beatmap_id, is_best)",
+            "CREATE INDEX IF NOT EXISTS ix_scores_beatmap_id ON scores (beatmap_id)",
+            "CREATE INDEX IF NOT EXISTS ix_user_played_beatmaps_user_mode_beatmap "
+            "ON user_played_beatmaps (user_info_id, _mode, beatmap_id)",
+            "CREATE INDEX IF NOT EXISTS ix_user_played_beatmaps_beatmap_id ON user_played_beatmaps (beatmap_id)",
+    ):
+        conn.execute(text(stmt))
+
+
+def _scores_typed_columns(conn: Connection):
+    for column, column_type in (('accuracy', 'FLOAT'), ('total_score', 'INTEGER'), ('rank', 'VARCHAR'),
+                                ('pp', 'FLOAT'), ('max_combo', 'INTEGER'), ('beatmap_version', 'VARCHAR'),
+                                ('ended_at', 'DATETIME')):
+        _add_column(conn, 'scores', column, column_type)
+    # 'serialize_model' stores 'created_at' as unix time in milliseconds
+    conn.execute(text("""
+        UPDATE scores SET
+            accuracy = json_extract(score_json_data, '$.accuracy'),
+            total_score = json_extract(score_json_data, '$.score'),
+            rank = json_extract(score_json_data, '$.rank'),
+            pp = json_extract(score_json_data, '$.pp'),
+            max_combo = json_extract(score_json_data, '$.max_combo'),
+            beatmap_version = json_extract(score_json_data, '$.beatmap.version'),
+            ended_at = CASE typeof(json_extract(score_json_data, '$.created_at'))
+                WHEN 'text' THEN datetime(json_extract(score_json_data, '$.created_at'))
+                ELSE datetime(json_extract(score_json_data, '$.created_at') / 1000, 'unixepoch')
+            END
+        WHERE total_score IS NULL AND score_json_data IS NOT NULL
+    """))
+
+
+def _scores_score_data(conn: Connection):
+    _add_column(conn, 'scores', 'score_data', 'BLOB')
+    while True:
+        rows = conn.execute(text("SELECT id, score_json_data FROM scores "
+                                 "WHERE score_data IS NULL AND score_json_data IS NOT NULL LIMIT 1000")).all()
+        if not rows:
+            break
+        conn.execute(text("UPDATE scores SET score_data = :score_data, score_json_data = NULL WHERE id = :id"),
+                     [{'id': row_id, 'score_data': ScoreDataCodec.encode(score_json_data)}
+                      for row_id, score_json_data in rows])
+        conn.commit()
+    # Gives the freed pages back to the file system (can not run inside a transaction)
+    conn.exec_driver_sql('VACUUM')
+
+
+def _scores_page_indexes(conn: Connection):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_scores_user_mode_accuracy "
+                      "ON scores (user_info_id, _mode, accuracy)"))
+
+
+def _random_pick_indexes(conn: Connection):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_scores_user_mode ON scores (user_info_id, _mode)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_user_played_beatmaps_user_mode "
+                      "ON user_played_beatmaps (user_info_id, _mode)"))
+
+
+def _user_aggregates(conn: Connection):
+    # The table itself is created by 'create_all', (re)computes the aggregates of the stored rows
+    aggregates: Dict[Tuple[int, str], DbUserAggregatesInfo] = {}
+
+    def get_aggregates(user_info_id: int, mode: str) -> DbUserAggregatesInfo:
+        return aggregates.setdefault((user_info_id, mode), DbUserAggregatesInfo(user_info_id=user_info_id, _mode=mode,
+                                                                                updated_at=time.time()))
+
+    for user_info_id, mode, rank, mods, count in conn.execute(text(
+            "SELECT user_info_id, _mode, rank, _mods, COUNT(*) FROM scores "
+            "WHERE user_info_id IS NOT NULL GROUP BY user_info_id, _mode, rank, _mods")):
+        get_aggregates(user_info_id, mode).add_scores(rank, mods, count)
+    for user_info_id, mode, count in conn.execute(text(
+            "SELECT user_info_id, _mode, COUNT(*) FROM user_played_beatmaps "
+            "WHERE user_info_id IS NOT NULL GROUP BY user_info_id, _mode")):
+        get_aggregates(user_info_id, mode).beatmaps_count = count
+    conn.execute(text("DELETE FROM user_aggregates"))
+    if aggregates:
+        conn.execute(text("INSERT INTO user_aggregates (user_info_id, _mode, scores_count, beatmaps_count, "
+                          "grade_counts, mods_counts, updated_at) VALUES (:user_info_id, :_mode, :scores_count, "
+                          ":beatmaps_count, :grade_counts, :mods_counts, :updated_at)"),
+                     [aggregates_info.to_values() for aggregates_info in aggregates.values()])
+
+
+
+def _user_most_played_full_synced_at(conn: Connection):
+    # NULL makes the next sync of every user a full one
+    _add_column(conn, 'user_most_played_sync', 'full_synced_at', 'FLOAT')
+
+
+
+def _drop_scores_user_mode_beatmap_id_index(conn: Connection):
+    # Prefix of 'ix_scores_user_mode_beatmap', created by the earlier 'scores_page_indexes'
+    conn.execute(text("DROP INDEX IF EXISTS ix_scores_user_mode_beatmap_id"))
+
+
+# Append only, versions of the released migrations must not change
+MIGRATIONS = [
+    Migration(1, 'scores_osu_score_id', _scores_osu_score_id),
+    Migration(2, 'scores_is_best', _scores_is_best),
+    Migration(3, 'composite_indexes', _composite_indexes),
+    Migration(4, 'scores_typed_columns', _scores_typed_columns),
+    Migration(5, 'scores_score_data', _scores_score_data),
+    Migration(6, 'scores_page_indexes', _scores_page_indexes),
+    Migration(7, 'random_pick_indexes', _random_pick_indexes),
+    Migration(8, 'user_aggregates', _user_aggregates),
+    Migration(9, 'user_most_played_full_synced_at', _user_most_played_full_synced_at),
+    Migration(10, 'drop_scores_user_mode_beatmap_id_index', _drop_scores_user_mode_beatmap_id_index),
+]
@@ -1,13 +1,15 @@
 from typing import TYPE_CHECKING
 
 from ossapi import GameMode, Mod
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, func, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, func, UniqueConstraint, Float, Boolean, Index, \
+    LargeBinary
+from sqlalchemy.orm import relationship, deferred
 
 from .base import Base
 
 if TYPE_CHECKING:
-    from db_managers.data_classes import DbUserInfo, DbScoreInfo, DbUserPlayedBeatmapInfo
+    from db_managers.data_classes import DbUserInfo, DbScoreInfo, DbUserPlayedBeatmapInfo, DbUserMostPlayedInfo, \
+        DbScoreImportJobInfo, DbOsuUserProfileInfo
 
 
 class UserTable(Base):
@@ -37,11 +39,24 @@ class ScoreTable(Base):
 
     id = Column(Integer, primary_key=True)
     user_info_id = Column(Integer, ForeignKey('users.discord_user_id'))
-    score_json_data = Column(String)
+    # Legacy plain score JSON: the 'scores_score_data' migration encodes it into 'score_data',
+    # it is never written or loaded since
+    score_json_data = deferred(Column(String))
+    score_data = Column(LargeBinary)  # 'ScoreDataCodec' encoded 'serialize_model(score)'
     _mods = Column(Integer)
     _mode = Column(String)
     beatmap_id = Column(Integer)
     timestamp = Column(DateTime, server_default=func.now())
+    osu_score_id = Column(Integer)
+    is_best = Column(Boolean, default=True)  # Is the user's best score on the beatmap
+    # Typed copies of the score data fields
+    accuracy = Column(Float)
+    total_score = Column(Integer)
+    rank = Column(String)
+    pp = Column(Float)
+    max_combo = Column(Integer)
+    beatmap_version = Column(String)
+    ended_at = Column(DateTime)  # UTC
 
     @property
     def mode(self):
@@ -56,11 +71,34 @@ class ScoreTable(Base):
     @classmethod
     def from_dataclass(cls, dcls: 'DbScoreInfo'):
         return cls(user_info_id=dcls.user_info_id,
-                   score_json_data=dcls.score_json_data,
+                   score_data=dcls.score_data,
                    _mods=int(dcls.mods.value),
                    _mode=str(dcls.mode.value),
                    beatmap_id=dcls.beatmap_id,
-                   timestamp=dcls.timestamp)
+                   timestamp=dcls.timestamp,
+                   osu_score_id=dcls.osu_score_id,
+                   is_best=dcls.is_best,
+                   accuracy=dcls.accuracy,
+                   total_score=dcls.total_score,
+                   rank=dcls.rank,
+                   pp=dcls.pp,
+                   max_combo=dcls.max_combo,
+                   beatmap_version=dcls.beatmap_version,
+                   ended_at=dcls.ended_at)
+
+    __table_args__ = (
+        Index('unique_user_osu_score', 'user_info_id', 'osu_score_id', unique=True),
+        # Counts, exports and random picks of the user's scores in the mode (newest first)
+        Index('ix_scores_user_mode_timestamp', 'user_info_id', '_mode', 'timestamp'),
+        # Best scores lookups by beatmap
+        Index('ix_scores_user_mode_beatmap', 'user_info_id', '_mode', 'beatmap_id', 'is_best'),
+        Index('ix_scores_beatmap_id', 'beatmap_id'),
+        # Keyset pagination (the index entries end with the row id),
+        # pages ordered by 'beatmap_id' use 'ix_scores_user_mode_beatmap'
+        Index('ix_scores_user_mode_accuracy', 'user_info_id', '_mode', 'accuracy'),
+        # Row id ordered partitions for the random picks
+        Index('ix_scores_user_mode', 'user_info_id', '_mode'),
+    )
 
 
 class UserPlayedBeatmapsTable(Base):
@@ -88,4 +126,187 @@ class UserPlayedBeatmapsTable(Base):
 
     __table_args__ = (
         UniqueConstraint('user_info_id', 'beatmap_id', name='unique_user_beatmap'),
+        Index('ix_user_played_beatmaps_user_mode_beatmap', 'user_info_id', '_mode', 'beatmap_id'),
+        Index('ix_user_played_beatmaps_beatmap_id', 'beatmap_id'),
+        Index('ix_user_played_beatmaps_user_mode', 'user_info_id', '_mode'),
     )
+
+
+class UserMostPlayedTable(Base):
+    """
+    Copy of the user's MOST_PLAYED profile section (keyed by osu! user, the section is mode independent).
+    """
+    __tablename__ = 'user_most_played'
+
+    osu_user_id = Column(Integer, primary_key=True, autoincrement=False)
+    beatmap_id = Column(Integer, primary_key=True, autoincrement=False)
+    beatmapset_id = Column(Integer)
+    count = Column(Integer)
+    title = Column(String)
+    artist = Column(String)
+
+    @classmethod
+    def from_dataclass(cls, dcls: 'DbUserMostPlayedInfo'):
+        return cls(osu_user_id=dcls.osu_user_id,
+                   beatmap_id=dcls.beatmap_id,
+                   beatmapset_id=dcls.beatmapset_id,
+                   count=dcls.count,
+                   title=dcls.title,
+                   artist=dcls.artist)
+
+
+class RecentScoresPollTable(Base):
+    """
+    Newest user's score seen by the recent scores poller.
+    """
+    __tablename__ = 'recent_scores_poll'
+
+    user_info_id = Column(Integer, ForeignKey('users.discord_user_id'), primary_key=True, autoincrement=False)
+    _mode = Column(String, primary_key=True)
+    last_score_at = Column(Float)  # Unix time of the newest seen score
+    polled_at = Column(Float)  # Unix time
+
+
+class UserAggregatesTable(Base):
+    """
+    Per (user, mode) aggregates of the 'scores' and 'user_played_beatmaps' tables,
+    updated in the same transactions as the rows themselves.
+    """
+    __tablename__ = 'user_aggregates'
+
+    user_info_id = Column(Integer, ForeignKey('users.discord_user_id'), primary_key=True, autoincrement=False)
+    _mode = Column(String, primary_key=True)
+    scores_count = Column(Integer, default=0)
+    beatmaps_count = Column(Integer, default=0)
+    grade_counts = Column(String)  # JSON object, rank -> scores count
+    mods_counts = Column(String)  # JSON object, mods combination value -> scores count
+    updated_at = Column(Float)  # Unix time
+
+
+class UserMostPlayedSyncTable(Base):
+    """
+    When the 'user_most_played' entries of the user were fetched from osu! api last time.
+    """
+    __tablename__ = 'user_most_played_sync'
+
+    osu_user_id = Column(Integer, primary_key=True, autoincrement=False)
+    synced_at = Column(Float)  # Unix time
+    full_synced_at = Column(Float)  # Unix time of the last full (not delta) sync
+    entries_count = Column(Integer)
+
+
+class BeatmapTable(Base):
+    """
+    Shared beatmap metadata catalog (filled from the osu! api responses).
+    """
+    __tablename__ = 'beatmaps'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    beatmapset_id = Column(Integer, index=True)
+    version = Column(String)
+    difficulty_rating = Column(Float)
+    _mode = Column(String)
+    status = Column(Integer)
+    total_length = Column(Integer)
+    max_combo = Column(Integer)
+    updated_at = Column(Float)  # Unix time
+
+    @property
+    def mode(self):
+        return GameMode(str(self._mode))
+
+
+class BeatmapsetTable(Base):
+    """
+    Shared beatmapset metadata catalog (filled from the osu! api responses).
+    """
+    __tablename__ = 'beatmapsets'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    title_unicode = Column(String)
+    artist = Column(String)
+    artist_unicode = Column(String)
+    creator = Column(String)
+    status = Column(Integer)
+    updated_at = Column(Float)  # Unix time
+
+
+class ScoreImportJobTable(Base):
+    """
+    Persisted '^load_all_user_scores' job.
+    Beatmaps with 'position' less than 'cursor' are done.
+    """
+    __tablename__ = 'score_import_jobs'
+
+    id = Column(Integer, primary_key=True)
+    user_info_id = Column(Integer, ForeignKey('users.discord_user_id'), index=True)
+    osu_user_id = Column(Integer)
+    _mode = Column(String)
+    all_scores = Column(Boolean, default=False)
+    status = Column(String)  # 'running', 'paused', 'done' or 'cancelled'
+    cursor = Column(Integer, default=0)
+    total_beatmaps = Column(Integer)
+    inserted_scores = Column(Integer, default=0)
+    channel_id = Column(Integer)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(Float)  # Unix time
+
+    @property
+    def mode(self):
+        return GameMode(str(self._mode))
+
+    @classmethod
+    def from_dataclass(cls, dcls: 'DbScoreImportJobInfo'):
+        return cls(user_info_id=dcls.user_info_id,
+                   osu_user_id=dcls.osu_user_id,
+                   _mode=str(dcls.mode.value),
+                   all_scores=dcls.all_scores,
+                   status=dcls.status,
+                   cursor=dcls.cursor,
+                   total_beatmaps=dcls.total_beatmaps,
+                   inserted_scores=dcls.inserted_scores,
+                   channel_id=dcls.channel_id)
+
+
+class ScoreImportJobBeatmapTable(Base):
+    """
+    Beatmaps of the 'score_import_jobs' job in the processing order.
+    """
+    __tablename__ = 'score_import_job_beatmaps'
+
+    job_id = Column(Integer, ForeignKey('score_import_jobs.id', ondelete='CASCADE'), primary_key=True)
+    position = Column(Integer, primary_key=True, autoincrement=False)
+    beatmap_id = Column(Integer)
+
+
+class OsuUserProfileTable(Base):
+    """
+    Cached osu! user profiles (shared by all bot users), also remembers users that do not exist.
+    """
+    __tablename__ = 'osu_user_profiles'
+
+    osu_user_id = Column(Integer, primary_key=True, autoincrement=False)
+    username = Column(String)
+    country_code = Column(String)
+    exists = Column(Boolean)
+    fetched_at = Column(Float)  # Unix time
+
+    @classmethod
+    def from_dataclass(cls, dcls: 'DbOsuUserProfileInfo'):
+        return cls(osu_user_id=dcls.osu_user_id,
+                   username=dcls.username,
+                   country_code=dcls.country_code,
+                   exists=dcls.exists,
+                   fetched_at=dcls.fetched_at)
+
+
+class SchemaMigrationTable(Base):
+    """
+    Applied 'db_managers.migrations' versions.
+    """
+    __tablename__ = 'schema_migrations'
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String)
+    applied_at = Column(Float)  # Unix time
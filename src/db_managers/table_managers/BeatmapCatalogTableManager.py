@@ -0,0 +1,144 @@
+import time
+from typing import List, Dict, Iterable, Any, Optional
+
+from ossapi import BeatmapCompact, BeatmapsetCompact
+from ossapi.utils import Model
+from sqlalchemy import select, func
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession
+
+import my_logging.get_loggers
+from db_managers.data_classes import DbBeatmapInfo, DbBeatmapsetInfo
+from db_managers.models.models import BeatmapTable, BeatmapsetTable
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+
+def _collect_metadata(obj: Any, beatmaps: Dict[int, DbBeatmapInfo], beatmapsets: Dict[int, DbBeatmapsetInfo],
+                      depth: int = 0):
+    """
+    Walks the 'ossapi' response collecting every beatmap and beatmapset in it.
+    """
+    if depth > 8:
+        return
+    if isinstance(obj, list):
+        for item in obj:
+            _collect_metadata(item, beatmaps, beatmapsets, depth + 1)
+        return
+    if not isinstance(obj, Model):
+        return
+
+    if isinstance(obj, BeatmapCompact) and obj.id is not None:
+        beatmaps[obj.id] = DbBeatmapInfo.from_beatmap(obj)
+    elif isinstance(obj, BeatmapsetCompact) and obj.id is not None:
+        beatmapsets[obj.id] = DbBeatmapsetInfo.from_beatmapset(obj)
+
+    for name, value in obj.__dict__.items():
+        if name != '_api' and isinstance(value, (Model, list)):
+            _collect_metadata(value, beatmaps, beatmapsets, depth + 1)
+
+
+class BeatmapCatalogTableManager:
+    """
+    Class for managing 'beatmaps' and 'beatmapsets' (shared metadata catalog) tables
+    database operations (async SQLAlchemy).
+    """
+
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
+        self.async_engine = async_engine
+        self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
+
+    async def catalog_api_response(self, endpoint: str, response: Any):
+        """
+        'OsuApiUtils' response listener, stores metadata of all beatmaps(ets) in the response.
+        """
+        beatmaps: Dict[int, DbBeatmapInfo] = {}
+        beatmapsets: Dict[int, DbBeatmapsetInfo] = {}
+        _collect_metadata(response, beatmaps, beatmapsets)
+        if beatmaps or beatmapsets:
+            await self.upsert_metadata(list(beatmaps.values()), list(beatmapsets.values()))
+
+    async def upsert_metadata(self, beatmaps: List[DbBeatmapInfo], beatmapsets: List[DbBeatmapsetInfo]):
+        current_time = time.time()
+        async with self.async_engine.begin() as conn:
+            if beatmaps:
+                stmt = sqlite.insert(BeatmapTable)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[BeatmapTable.id],
+                    set_={column: stmt.excluded[column] for column in
+                          ('beatmapset_id', 'version', 'difficulty_rating', '_mode', 'status', 'total_length',
+                           'updated_at')} |
+                         {'max_combo': func.coalesce(stmt.excluded.max_combo, BeatmapTable.max_combo)})
+                await conn.execute(stmt, [self._beatmap_values(beatmap, current_time) for beatmap in beatmaps])
+            if beatmapsets:
+                stmt = sqlite.insert(BeatmapsetTable)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[BeatmapsetTable.id],
+                    set_={column: stmt.excluded[column] for column in
+                          ('title', 'title_unicode', 'artist', 'artist_unicode', 'creator', 'status', 'updated_at')})
+                await conn.execute(stmt, [self._beatmapset_values(beatmapset, current_time)
+                                          for beatmapset in beatmapsets])
+
+    async def get_beatmaps(self, beatmap_ids: Iterable[int]) -> Dict[int, DbBeatmapInfo]:
+        beatmap_ids = list(beatmap_ids)
+        res = {}
+        async with self.ReadAsyncSession() as session:
+            # Chunks to stay below the SQLite variables limit
+            for i in range(0, len(beatmap_ids), 500):
+                result = await session.execute(
+                    select(BeatmapTable).where(BeatmapTable.id.in_(beatmap_ids[i:i + 500])))
+                res.update({row.id: DbBeatmapInfo.from_row(row) for row in result.scalars()})
+        return res
+
+    async def get_beatmapsets(self, beatmapset_ids: Iterable[int]) -> Dict[int, DbBeatmapsetInfo]:
+        beatmapset_ids = list(beatmapset_ids)
+        res = {}
+        async with self.ReadAsyncSession() as session:
+            for i in range(0, len(beatmapset_ids), 500):
+                result = await session.execute(
+                    select(BeatmapsetTable).where(BeatmapsetTable.id.in_(beatmapset_ids[i:i + 500])))
+                res.update({row.id: DbBeatmapsetInfo.from_row(row) for row in result.scalars()})
+        return res
+
+    async def get_missing_beatmap_ids(self, beatmap_ids: Iterable[int]) -> List[int]:
+        """
+        Returns ids of the beatmaps which are not in the catalog (in the given order).
+        """
+        beatmap_ids = list(dict.fromkeys(beatmap_ids))
+        known_ids = set()
+        async with self.ReadAsyncSession() as session:
+            for i in range(0, len(beatmap_ids), 500):
+                result = await session.execute(
+                    select(BeatmapTable.id).where(BeatmapTable.id.in_(beatmap_ids[i:i + 500])))
+                known_ids.update(result.scalars())
+        return [beatmap_id for beatmap_id in beatmap_ids if beatmap_id not in known_ids]
+
+    @staticmethod
+    def _beatmap_values(beatmap: DbBeatmapInfo, current_time: float) -> dict:
+        return {
+            'id': beatmap.id,
+            'beatmapset_id': beatmap.beatmapset_id,
+            'version': beatmap.version,
+            'difficulty_rating': beatmap.difficulty_rating,
+            '_mode': beatmap._mode,
+            'status': beatmap.status,
+            'total_length': beatmap.total_length,
+            'max_combo': beatmap.max_combo,
+            'updated_at': current_time,
+        }
+
+    @staticmethod
+    def _beatmapset_values(beatmapset: DbBeatmapsetInfo, current_time: float) -> dict:
+        return {
+            'id': beatmapset.id,
+            'title': beatmapset.title,
+            'title_unicode': beatmapset.title_unicode,
+            'artist': beatmapset.artist,
+            'artist_unicode': beatmapset.artist_unicode,
+            'creator': beatmapset.creator,
+            'status': beatmapset.status,
+            'updated_at': current_time,
+        }
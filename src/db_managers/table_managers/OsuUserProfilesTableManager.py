@@ -0,0 +1,34 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession
+
+import my_logging.get_loggers
+from db_managers.data_classes import DbOsuUserProfileInfo
+from db_managers.models.models import OsuUserProfileTable
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+
+class OsuUserProfilesTableManager:
+    """
+    Class for managing 'osu_user_profiles' table database operations (async SQLAlchemy).
+    """
+
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
+        self.async_engine = async_engine
+        self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
+
+    async def get_profile(self, osu_user_id: int) -> Optional[DbOsuUserProfileInfo]:
+        async with self.ReadAsyncSession() as session:
+            row = await session.get(OsuUserProfileTable, osu_user_id)
+        if row:
+            return DbOsuUserProfileInfo.from_row(row)
+        return None
+
+    async def merge_profile(self, profile: DbOsuUserProfileInfo):
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                await session.merge(OsuUserProfileTable.from_dataclass(profile))
@@ -0,0 +1,120 @@
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update, insert, delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession
+
+import my_logging.get_loggers
+from db_managers.data_classes import DbScoreImportJobInfo, DbUserInfo, DbScoreInfo
+from db_managers.models.models import ScoreImportJobTable, ScoreImportJobBeatmapTable
+from .ScoresTableManager import ScoresTableManager
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+
+class ScoreImportJobsTableManager:
+    """
+    Class for managing 'score_import_jobs' and 'score_import_job_beatmaps' tables database operations
+    (async SQLAlchemy).
+    """
+
+    ACTIVE_STATUSES = ('running', 'paused')
+
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
+        self.async_engine = async_engine
+        self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
+
+    async def create_job(self, job_info: DbScoreImportJobInfo, beatmap_ids: List[int]) -> DbScoreImportJobInfo:
+        """
+        Stores the job with its beatmaps (in one transaction).
+        """
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                job = ScoreImportJobTable.from_dataclass(job_info)
+                job.updated_at = time.time()
+                session.add(job)
+                await session.flush()
+                if beatmap_ids:
+                    await session.execute(insert(ScoreImportJobBeatmapTable), [
+                        {'job_id': job.id, 'position': position, 'beatmap_id': beatmap_id}
+                        for position, beatmap_id in enumerate(beatmap_ids)
+                    ])
+            return DbScoreImportJobInfo.from_row(job)
+
+    async def get_job(self, job_id: int) -> Optional[DbScoreImportJobInfo]:
+        async with self.AsyncSession() as session:
+            job = await session.get(ScoreImportJobTable, job_id)
+        if job:
+            return DbScoreImportJobInfo.from_row(job)
+        return None
+
+    async def get_user_active_job(self, user_info: DbUserInfo) -> Optional[DbScoreImportJobInfo]:
+        """
+        Returns the user's running or paused job, None If there is no such.
+        """
+        async with self.AsyncSession() as session:
+            result = await session.execute(
+                select(ScoreImportJobTable).where(
+                    ScoreImportJobTable.user_info_id == user_info.discord_user_id,
+                    ScoreImportJobTable.status.in_(self.ACTIVE_STATUSES)
+                ).order_by(ScoreImportJobTable.id.desc()).limit(1))
+            job = result.scalar()
+        if job:
+            return DbScoreImportJobInfo.from_row(job)
+        return None
+
+    async def get_jobs_by_status(self, status: str) -> List[DbScoreImportJobInfo]:
+        async with self.AsyncSession() as session:
+            result = await session.execute(
+                select(ScoreImportJobTable).where(ScoreImportJobTable.status == status))
+            return [DbScoreImportJobInfo.from_row(job) for job in result.scalars()]
+
+    async def get_pending_beatmaps(self, job_info: DbScoreImportJobInfo) -> List[Tuple[int, int]]:
+        """
+        Returns '(position, beatmap_id)' of the beatmaps not processed yet (starting from the cursor).
+        """
+        async with self.AsyncSession() as session:
+            result = await session.execute(
+                select(ScoreImportJobBeatmapTable.position, ScoreImportJobBeatmapTable.beatmap_id).where(
+                    ScoreImportJobBeatmapTable.job_id == job_info.id,
+                    ScoreImportJobBeatmapTable.position >= job_info.cursor
+                ).order_by(ScoreImportJobBeatmapTable.position))
+            return [tuple(row) for row in result.all()]
+
+    async def complete_beatmap(self, job_info: DbScoreImportJobInfo, position: int, beatmap_id: int,
+                               scores_info: List[DbScoreInfo]) -> int:
+        """
+        Stores scores of the beatmap and moves the job cursor past it in one transaction,
+        so the beatmap is never requested again after a restart.
+        Returns the amount of upserted scores.
+        """
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                inserted = await ScoresTableManager.upsert_scores_in_session(session, scores_info)
+                await session.execute(
+                    update(ScoreImportJobTable).where(ScoreImportJobTable.id == job_info.id).values(
+                        cursor=position + 1,
+                        inserted_scores=ScoreImportJobTable.inserted_scores + inserted,
+                        updated_at=time.time()))
+        job_info.cursor = position + 1
+        job_info.inserted_scores += inserted
+        return inserted
+
+    async def set_status(self, job_id: int, status: str):
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                await session.execute(
+                    update(ScoreImportJobTable).where(ScoreImportJobTable.id == job_id).values(
+                        status=status, updated_at=time.time()))
+
+    async def delete_job_beatmaps(self, job_id: int):
+        """
+        Drops beatmaps list of the finished job (the job row itself is kept as a history).
+        """
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(ScoreImportJobBeatmapTable).where(ScoreImportJobBeatmapTable.job_id == job_id))
@@ -1,37 +1,134 @@
-from typing import List, Optional
+import time
+from typing import List, Optional, Dict, Iterable, Tuple, AsyncIterator
 
 from ossapi import Mod
-from sqlalchemy import delete, select, func, and_
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, select, and_, update, Select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import defer
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession
 
 import my_logging.get_loggers
-from db_managers.data_classes import DbScoreInfo, DbUserInfo
-from db_managers.models.models import ScoreTable
+from db_managers.data_classes import DbScoreInfo, DbUserInfo, DbKeysetPage
+from db_managers.models.models import ScoreTable, RecentScoresPollTable, UserAggregatesTable
+from .UserAggregatesTableManager import UserAggregatesTableManager
+from .batching import batched
 from .decorators import elapsed_time_logger
+from .keyset import keyset_page_stmt, keyset_page
+from .random_sampling import sample_partition_ids
 
 logger = my_logging.get_loggers.database_utilities_logger()
 
 
 class ScoresTableManager:
     """
-    Class for managing 'scores' table database operations (async SQLAlchemy).
+    Class for managing 'scores' and 'recent_scores_poll' tables database operations (async SQLAlchemy).
     """
 
-    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession]):
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
         self.async_engine = async_engine
         self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
 
-    async def merge_score_info(self, score_info: DbScoreInfo) -> bool:
-        try:
-            async with self.AsyncSession() as session:
-                score = ScoreTable.from_dataclass(score_info)
-                await session.merge(score)
-                await session.commit()
-            return True
-        except IntegrityError:
-            logger.exception(f"IntegrityError: {__name__}")
-            return False
+    @elapsed_time_logger
+    async def upsert_scores(self, scores_info: Iterable[DbScoreInfo], *, batch_size: int = 1000) -> int:
+        """
+        Inserts scores (updating already stored ones by 'osu_score_id') with 'INSERT ... ON CONFLICT',
+        one transaction per 'batch_size' scores.
+        'is_best' of the user's other scores on the beatmap is cleared If the best one is among them.
+        Returns the amount of upserted scores.
+        """
+        res = 0
+        async with self.AsyncSession() as session:
+            for batch in batched(scores_info, batch_size):
+                async with session.begin():
+                    res += await self.upsert_scores_in_session(session, batch)
+        return res
+
+    @staticmethod
+    async def upsert_scores_in_session(session: AsyncSession, scores_info: List[DbScoreInfo]) -> int:
+        """
+        'upsert_scores' of one batch as a part of the caller's transaction ('user_aggregates' included).
+        """
+        if not scores_info:
+            return 0
+        aggregates = await UserAggregatesTableManager.lock_in_session(
+            session, ((score_info.user_info_id, score_info._mode) for score_info in scores_info))
+        # (user_info_id, osu_score_id) -> (mode, rank, mods) of the score counted in the aggregates
+        counted_scores = await ScoresTableManager._get_counted_scores(session, scores_info)
+        # Stored scores keep their mode on update
+        stored_keys = {(user_info_id, mode) for (user_info_id, _), (mode, _, _) in counted_scores.items()}
+        aggregates |= await UserAggregatesTableManager.lock_in_session(session, stored_keys - aggregates.keys())
+
+        stmt = sqlite.insert(ScoreTable)
+        stmt = stmt.on_conflict_do_update(index_elements=[ScoreTable.user_info_id, ScoreTable.osu_score_id],
+                                          set_={column: stmt.excluded[column] for column in
+                                                ('score_data', 'is_best') +
+                                                ScoresTableManager.TYPED_COLUMNS})
+        await session.execute(stmt, [ScoresTableManager._to_values(score_info) for score_info in scores_info])
+
+        best_score_ids: Dict[Tuple[int, str, int], List[int]] = {}
+        for score_info in scores_info:
+            if score_info.is_best:
+                best_score_ids.setdefault((score_info.user_info_id, score_info._mode, score_info.beatmap_id),
+                                          []).append(score_info.osu_score_id)
+        for (user_info_id, mode, beatmap_id), score_ids in best_score_ids.items():
+            await session.execute(
+                update(ScoreTable).where(
+                    ScoreTable.user_info_id == user_info_id,
+                    ScoreTable.beatmap_id == beatmap_id,
+                    ScoreTable._mode == mode,
+                    ScoreTable.osu_score_id.not_in(score_ids)
+                ).values(is_best=False))
+
+        for score_info in scores_info:
+            key = (score_info.user_info_id, score_info.osu_score_id)
+            if key in counted_scores:
+                # Updated score (or a duplicate in the batch), the conflict update keeps its mode and mods
+                mode, rank, mods = counted_scores[key]
+                aggregates[(score_info.user_info_id, mode)].add_scores(rank, mods, -1)
+            else:
+                mode, mods = score_info._mode, score_info._mods
+            aggregates[(score_info.user_info_id, mode)].add_scores(score_info.rank, mods)
+            counted_scores[key] = (mode, score_info.rank, mods)
+        await UserAggregatesTableManager.save_in_session(session, aggregates.values())
+        return len(scores_info)
+
+    @staticmethod
+    async def _get_counted_scores(session: AsyncSession,
+                                  scores_info: List[DbScoreInfo]) -> Dict[Tuple[int, int], Tuple[str, str, int]]:
+        """
+        Returns (user_info_id, osu_score_id) -> (mode, rank, mods) of the already stored scores among 'scores_info'.
+        """
+        score_ids: Dict[int, List[int]] = {}
+        for score_info in scores_info:
+            score_ids.setdefault(score_info.user_info_id, []).append(score_info.osu_score_id)
+        res = {}
+        for user_info_id, user_score_ids in score_ids.items():
+            for i in range(0, len(user_score_ids), 500):
+                result = await session.execute(
+                    select(ScoreTable.osu_score_id, ScoreTable._mode, ScoreTable.rank, ScoreTable._mods).where(
+                        ScoreTable.user_info_id == user_info_id,
+                        ScoreTable.osu_score_id.in_(user_score_ids[i:i + 500])))
+                res.update({(user_info_id, osu_score_id): (mode, rank, mods)
+                            for osu_score_id, mode, rank, mods in result})
+        return res
+
+    # Columns with the typed copies of the score data fields
+    TYPED_COLUMNS = ('accuracy', 'total_score', 'rank', 'pp', 'max_combo', 'beatmap_version', 'ended_at')
+
+    @staticmethod
+    def _to_values(score_info: DbScoreInfo) -> dict:
+        return {
+            'user_info_id': score_info.user_info_id,
+            'score_data': score_info.score_data,
+            '_mods': score_info._mods,
+            '_mode': score_info._mode,
+            'beatmap_id': score_info.beatmap_id,
+            'osu_score_id': score_info.osu_score_id,
+            'is_best': score_info.is_best,
+        } | {column: getattr(score_info, column) for column in ScoresTableManager.TYPED_COLUMNS}
 
     async def delete_all_user_scores(self, user_info: DbUserInfo) -> bool:
         try:
@@ -41,6 +138,7 @@ class ScoresTableManager:
                         ScoreTable.user_info_id == user_info.discord_user_id,
                         ScoreTable._mode == user_info._osu_game_mode)
                 )
+                await UserAggregatesTableManager.reset_in_session(session, user_info, scores=True)
                 await session.commit()
             return True
         except Exception as e:
@@ -48,38 +146,84 @@ class ScoresTableManager:
             return False
 
     @elapsed_time_logger
-    async def get_all_user_scores(self, user_info: DbUserInfo) -> List[DbScoreInfo]:
-        async with self.AsyncSession() as session:
-            stmt = select(ScoreTable).where(
-                ScoreTable.user_info_id == user_info.discord_user_id,
-                ScoreTable._mode == user_info._osu_game_mode
-            ).order_by(
-                ScoreTable.timestamp.desc()
-            )
-            result = await session.execute(stmt)
-            scores = result.scalars().all()
-            return [DbScoreInfo.from_row(score) for score in scores]
+    async def get_all_user_scores(self, user_info: DbUserInfo, *, with_json_data: bool = True) -> List[DbScoreInfo]:
+        """
+        If 'with_json_data' is False, score data is not loaded (typed columns only).
+        """
+        return [score_info async for score_info in self.iter_all_user_scores(user_info,
+                                                                             with_json_data=with_json_data)]
+
+    async def iter_all_user_scores(self, user_info: DbUserInfo, *, with_json_data: bool = True,
+                                   chunk_size: int = 1000) -> AsyncIterator[DbScoreInfo]:
+        """
+        'get_all_user_scores' streamed by 'chunk_size' rows (constant memory).
+        """
+        stmt = select(ScoreTable).where(
+            ScoreTable.user_info_id == user_info.discord_user_id,
+            ScoreTable._mode == user_info._osu_game_mode
+        ).order_by(
+            ScoreTable.timestamp.desc()
+        )
+        if not with_json_data:
+            stmt = stmt.options(defer(ScoreTable.score_data))
+        async for score_info in self._stream_scores(stmt, chunk_size):
+            yield score_info
+
+    # 'get_user_scores_page' orders
+    PAGE_SORT_COLUMNS = {
+        'timestamp': ScoreTable.timestamp,
+        'accuracy': ScoreTable.accuracy,
+        'beatmap_id': ScoreTable.beatmap_id,
+    }
+
+    async def get_user_scores_page(self, user_info: DbUserInfo, *, order_by: str = 'timestamp',
+                                   descending: bool = True, after: Optional[Tuple] = None, limit: int = 50,
+                                   with_json_data: bool = True) -> DbKeysetPage[DbScoreInfo]:
+        """
+        Returns the page of user's scores ordered by 'order_by' ('PAGE_SORT_COLUMNS') and the score id,
+        starting after the 'next_cursor' ('after') of the previous page.
+        Every page costs the same index seek and is not shifted by the scores inserted meanwhile.
+        """
+        if order_by not in self.PAGE_SORT_COLUMNS:
+            raise ValueError(f"Unknown scores order: '{order_by}'")
+        stmt = select(ScoreTable).where(
+            ScoreTable.user_info_id == user_info.discord_user_id,
+            ScoreTable._mode == user_info._osu_game_mode)
+        if not with_json_data:
+            stmt = stmt.options(defer(ScoreTable.score_data))
+        stmt = keyset_page_stmt(stmt, self.PAGE_SORT_COLUMNS[order_by], ScoreTable.id,
+                                after=after, descending=descending, limit=limit)
+        async with self.ReadAsyncSession() as session:
+            scores, next_cursor = keyset_page((await session.execute(stmt)).all(), limit)
+        return DbKeysetPage(items=[DbScoreInfo.from_row(score) for score in scores], next_cursor=next_cursor)
 
     async def count_all_user_scores(self, user_info: DbUserInfo) -> int:
-        async with self.AsyncSession() as session:
-            stmt = select(func.count()).where(
-                ScoreTable.user_info_id == user_info.discord_user_id,
-                ScoreTable._mode == user_info._osu_game_mode)
+        """
+        Reads the count from 'user_aggregates' (primary key lookup).
+        """
+        async with self.ReadAsyncSession() as session:
+            stmt = select(UserAggregatesTable.scores_count).where(
+                UserAggregatesTable.user_info_id == user_info.discord_user_id,
+                UserAggregatesTable._mode == user_info._osu_game_mode)
             count = await session.execute(stmt)
         return count.scalar() or 0
 
     async def get_user_random_score(self, user_info: DbUserInfo) -> Optional[DbScoreInfo]:
-        async with self.AsyncSession() as session:
-            stmt = select(ScoreTable).where(
+        scores_info = await self.get_user_random_scores(user_info, 1)
+        return scores_info[0] if scores_info else None
+
+    async def get_user_random_scores(self, user_info: DbUserInfo, count: int) -> List[DbScoreInfo]:
+        """
+        Returns up to 'count' distinct random user's scores (see 'sample_partition_ids').
+        """
+        async with self.ReadAsyncSession() as session:
+            score_ids = await sample_partition_ids(session, ScoreTable.id, [
                 ScoreTable.user_info_id == user_info.discord_user_id,
                 ScoreTable._mode == user_info._osu_game_mode
-            ).order_by(
-                func.random()).limit(1)
-            row = await session.execute(stmt)
-            score = row.scalar()
-        if score:
-            return DbScoreInfo.from_row(score)
-        return None
+            ], count)
+            result = await session.execute(select(ScoreTable).where(ScoreTable.id.in_(score_ids)))
+            scores = {score.id: score for score in result.scalars()}
+        return [DbScoreInfo.from_row(scores[score_id]) for score_id in score_ids if score_id in scores]
 
     async def check_if_user_has_scores(self, user_info: DbUserInfo) -> bool:
         scores_count = await self.count_all_user_scores(user_info)
@@ -87,14 +231,64 @@ class ScoresTableManager:
 
     @elapsed_time_logger
     async def get_mods_filtered_user_scores(self, user_info: DbUserInfo, mods: Mod) -> List[DbScoreInfo]:
-        async with self.AsyncSession() as session:
-            stmt = select(ScoreTable).where(
-                and_(
-                    ScoreTable.user_info_id == user_info.discord_user_id,
-                    (ScoreTable._mods.op('&')(mods.value) == mods.value),
-                    ScoreTable._mode == user_info._osu_game_mode
-                )
+        return [score_info async for score_info in self.iter_mods_filtered_user_scores(user_info, mods)]
+
+    async def iter_mods_filtered_user_scores(self, user_info: DbUserInfo, mods: Mod, *, with_json_data: bool = True,
+                                             chunk_size: int = 1000) -> AsyncIterator[DbScoreInfo]:
+        """
+        'get_mods_filtered_user_scores' streamed by 'chunk_size' rows (constant memory).
+        """
+        stmt = select(ScoreTable).where(
+            and_(
+                ScoreTable.user_info_id == user_info.discord_user_id,
+                (ScoreTable._mods.op('&')(mods.value) == mods.value),
+                ScoreTable._mode == user_info._osu_game_mode
             )
-            result = await session.execute(stmt)
-            scores = result.scalars().all()
-            return [DbScoreInfo.from_row(score) for score in scores]
+        )
+        if not with_json_data:
+            stmt = stmt.options(defer(ScoreTable.score_data))
+        async for score_info in self._stream_scores(stmt, chunk_size):
+            yield score_info
+
+    async def _stream_scores(self, stmt: Select, chunk_size: int) -> AsyncIterator[DbScoreInfo]:
+        async with self.ReadAsyncSession() as session:
+            result = await session.stream_scalars(stmt.execution_options(yield_per=chunk_size))
+            async for rows in result.partitions():
+                for row in rows:
+                    yield DbScoreInfo.from_row(row)
+
+    async def get_user_best_scores(self, user_info: DbUserInfo, beatmap_ids: Iterable[int]) -> Dict[int, DbScoreInfo]:
+        """
+        Returns 'beatmap_id' -> the best user's score stored for the beatmap.
+        """
+        beatmap_ids = list(beatmap_ids)
+        res = {}
+        async with self.ReadAsyncSession() as session:
+            for i in range(0, len(beatmap_ids), 500):
+                result = await session.execute(
+                    select(ScoreTable).where(
+                        ScoreTable.user_info_id == user_info.discord_user_id,
+                        ScoreTable._mode == user_info._osu_game_mode,
+                        ScoreTable.is_best.is_(True),
+                        ScoreTable.beatmap_id.in_(beatmap_ids[i:i + 500])))
+                res.update({row.beatmap_id: DbScoreInfo.from_row(row) for row in result.scalars()})
+        return res
+
+    async def get_last_polled_score_at(self, user_info: DbUserInfo) -> Optional[float]:
+        """
+        Returns unix time of the newest score seen by the recent scores poller, None If the user was never polled.
+        """
+        async with self.ReadAsyncSession() as session:
+            result = await session.execute(
+                select(RecentScoresPollTable.last_score_at).where(
+                    RecentScoresPollTable.user_info_id == user_info.discord_user_id,
+                    RecentScoresPollTable._mode == user_info._osu_game_mode))
+        return result.scalar()
+
+    async def set_last_polled_score_at(self, user_info: DbUserInfo, last_score_at: Optional[float]):
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                await session.merge(RecentScoresPollTable(user_info_id=user_info.discord_user_id,
+                                                          _mode=user_info._osu_game_mode,
+                                                          last_score_at=last_score_at,
+                                                          polled_at=time.time()))
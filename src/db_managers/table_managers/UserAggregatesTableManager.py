@@ -0,0 +1,94 @@
+import time
+from typing import Optional, Dict, Iterable, Tuple
+
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession, AsyncConnection
+
+import my_logging.get_loggers
+from db_managers.data_classes import DbUserInfo, DbUserAggregatesInfo
+from db_managers.models.models import UserAggregatesTable
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+
+class UserAggregatesTableManager:
+    """
+    Class for managing 'user_aggregates' table database operations (async SQLAlchemy).
+    The rows are written only by the 'scores' and 'user_played_beatmaps' insert and delete paths,
+    inside their transactions ('*_in_session' methods).
+    """
+
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
+        self.async_engine = async_engine
+        self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
+
+    async def get_user_aggregates(self, user_info: DbUserInfo) -> DbUserAggregatesInfo:
+        async with self.ReadAsyncSession() as session:
+            row = await session.get(UserAggregatesTable, (user_info.discord_user_id, user_info._osu_game_mode))
+        if row:
+            return DbUserAggregatesInfo.from_row(row)
+        return DbUserAggregatesInfo(user_info_id=user_info.discord_user_id, _mode=user_info._osu_game_mode)
+
+    @staticmethod
+    async def lock_in_session(session: AsyncSession | AsyncConnection,
+                              keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], DbUserAggregatesInfo]:
+        """
+        Returns (user_info_id, mode) -> aggregates, creating the missing rows.
+        Must be the first write of the caller's transaction: the insert takes the database write lock,
+        so the rows (and the aggregated tables) can not change until the commit.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        await session.execute(
+            sqlite.insert(UserAggregatesTable).on_conflict_do_nothing(),
+            [DbUserAggregatesInfo(user_info_id=user_info_id, _mode=mode).to_values() for user_info_id, mode in keys])
+        res = {}
+        # Chunks to stay below the SQLite variables limit
+        for i in range(0, len(keys), 250):
+            result = await session.execute(
+                select(*UserAggregatesTable.__table__.columns).where(
+                    tuple_(UserAggregatesTable.user_info_id, UserAggregatesTable._mode).in_(keys[i:i + 250])))
+            res.update({(row.user_info_id, row._mode): DbUserAggregatesInfo.from_row(row) for row in result})
+        return res
+
+    @staticmethod
+    async def save_in_session(session: AsyncSession | AsyncConnection, aggregates: Iterable[DbUserAggregatesInfo]):
+        """
+        Writes back the aggregates returned by 'lock_in_session'.
+        """
+        current_time = time.time()
+        values = []
+        for aggregates_info in aggregates:
+            aggregates_info.updated_at = current_time
+            values.append(aggregates_info.to_values())
+        if values:
+            stmt = sqlite.insert(UserAggregatesTable)
+            await session.execute(
+                stmt.on_conflict_do_update(index_elements=[UserAggregatesTable.user_info_id,
+                                                           UserAggregatesTable._mode],
+                                           set_={column: stmt.excluded[column] for column in
+                                                 ('scores_count', 'beatmaps_count', 'grade_counts', 'mods_counts',
+                                                  'updated_at')}),
+                values)
+
+    @staticmethod
+    async def reset_in_session(session: AsyncSession | AsyncConnection, user_info: DbUserInfo, *,
+                               scores: bool = False, beatmaps: bool = False):
+        """
+        Zeroes the scores and/or beatmaps aggregates of the user (after deleting all of them).
+        """
+        values = {'updated_at': time.time()}
+        if scores:
+            values |= {'scores_count': 0, 'grade_counts': '{}', 'mods_counts': '{}'}
+        if beatmaps:
+            values |= {'beatmaps_count': 0}
+        await session.execute(
+            update(UserAggregatesTable).where(
+                UserAggregatesTable.user_info_id == user_info.discord_user_id,
+                UserAggregatesTable._mode == user_info._osu_game_mode
+            ).values(**values))
@@ -0,0 +1,120 @@
+import time
+from typing import List, Optional, Dict
+
+from sqlalchemy import select, delete, insert
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession
+
+import my_logging.get_loggers
+from db_managers.data_classes import DbUserMostPlayedInfo
+from db_managers.models.models import UserMostPlayedTable, UserMostPlayedSyncTable
+from .decorators import elapsed_time_logger
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+
+class UserMostPlayedTableManager:
+    """
+    Class for managing 'user_most_played' and 'user_most_played_sync' tables database operations (async SQLAlchemy).
+    """
+
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
+        self.async_engine = async_engine
+        self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
+
+    @elapsed_time_logger
+    async def replace_user_most_played(self, osu_user_id: int, entries: List[DbUserMostPlayedInfo]):
+        """
+        Replaces all user's entries and marks them as (fully) synced now (in one transaction).
+        """
+        current_time = time.time()
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(UserMostPlayedTable).where(UserMostPlayedTable.osu_user_id == osu_user_id))
+                if entries:
+                    await session.execute(insert(UserMostPlayedTable),
+                                          [self._to_values(entry) for entry in entries])
+                await session.merge(UserMostPlayedSyncTable(osu_user_id=osu_user_id,
+                                                            synced_at=current_time,
+                                                            full_synced_at=current_time,
+                                                            entries_count=len(entries)))
+
+    @elapsed_time_logger
+    async def upsert_user_most_played(self, osu_user_id: int, entries: List[DbUserMostPlayedInfo],
+                                      entries_count: int):
+        """
+        Inserts new and updates changed user's entries and marks them as synced now (in one transaction).
+        """
+        current_time = time.time()
+        async with self.AsyncSession() as session:
+            async with session.begin():
+                if entries:
+                    stmt = sqlite.insert(UserMostPlayedTable)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[UserMostPlayedTable.osu_user_id, UserMostPlayedTable.beatmap_id],
+                        set_={'count': stmt.excluded.count,
+                              'beatmapset_id': stmt.excluded.beatmapset_id,
+                              'title': stmt.excluded.title,
+                              'artist': stmt.excluded.artist})
+                    await session.execute(stmt, [self._to_values(entry) for entry in entries])
+                await session.execute(
+                    sqlite.insert(UserMostPlayedSyncTable).values(
+                        osu_user_id=osu_user_id, synced_at=current_time, entries_count=entries_count
+                    ).on_conflict_do_update(index_elements=[UserMostPlayedSyncTable.osu_user_id],
+                                            set_={'synced_at': current_time, 'entries_count': entries_count}))
+
+    async def get_user_playcounts(self, osu_user_id: int) -> Dict[int, int]:
+        """
+        Returns 'beatmap_id' -> playcount of all user's entries.
+        """
+        async with self.ReadAsyncSession() as session:
+            result = await session.execute(
+                select(UserMostPlayedTable.beatmap_id, UserMostPlayedTable.count).where(
+                    UserMostPlayedTable.osu_user_id == osu_user_id))
+        return dict(result.all())
+
+    async def get_user_beatmap_playcount(self, osu_user_id: int, beatmap_id: int) \
+            -> Optional[DbUserMostPlayedInfo]:
+        async with self.ReadAsyncSession() as session:
+            result = await session.execute(
+                select(UserMostPlayedTable).where(UserMostPlayedTable.osu_user_id == osu_user_id,
+                                                  UserMostPlayedTable.beatmap_id == beatmap_id)
+            )
+            row = result.scalar()
+        if row:
+            return DbUserMostPlayedInfo.from_row(row)
+        return None
+
+    async def get_synced_at(self, osu_user_id: int) -> Optional[float]:
+        """
+        Returns unix time of the last sync, None If the user was never synced.
+        """
+        async with self.ReadAsyncSession() as session:
+            result = await session.execute(
+                select(UserMostPlayedSyncTable.synced_at).where(UserMostPlayedSyncTable.osu_user_id == osu_user_id))
+        return result.scalar()
+
+    async def get_full_synced_at(self, osu_user_id: int) -> Optional[float]:
+        """
+        Returns unix time of the last full sync, None If the user was never fully synced.
+        """
+        async with self.ReadAsyncSession() as session:
+            result = await session.execute(
+                select(UserMostPlayedSyncTable.full_synced_at).where(
+                    UserMostPlayedSyncTable.osu_user_id == osu_user_id))
+        return result.scalar()
+
+    @staticmethod
+    def _to_values(entry: DbUserMostPlayedInfo) -> dict:
+        return {
+            'osu_user_id': entry.osu_user_id,
+            'beatmap_id': entry.beatmap_id,
+            'beatmapset_id': entry.beatmapset_id,
+            'count': entry.count,
+            'title': entry.title,
+            'artist': entry.artist,
+        }
@@ -1,13 +1,17 @@
-from typing import List, Optional
+from typing import List, Optional, Iterable, AsyncIterator, Tuple, Dict
 
-from sqlalchemy import select, func, delete
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncEngine, AsyncSession, AsyncConnection
 
 import my_logging.get_loggers
-from db_managers.data_classes import DbUserInfo, DbUserPlayedBeatmapInfo
-from db_managers.models.models import UserPlayedBeatmapsTable
+from db_managers.data_classes import DbUserInfo, DbUserPlayedBeatmapInfo, DbKeysetPage
+from db_managers.models.models import UserPlayedBeatmapsTable, UserAggregatesTable
+from .UserAggregatesTableManager import UserAggregatesTableManager
+from .batching import batched
 from .decorators import elapsed_time_logger
+from .keyset import keyset_page_stmt, keyset_page
+from .random_sampling import sample_partition_ids
 
 logger = my_logging.get_loggers.database_utilities_logger()
 
@@ -17,20 +21,80 @@ class UserPlayedBeatmapsTableManager:
     Class for managing 'user_played_beatmaps' table database operations (async SQLAlchemy).
     """
 
-    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession]):
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
         self.async_engine = async_engine
         self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
 
-    async def merge_user_beatmap(self, db_user_played_beatmap: DbUserPlayedBeatmapInfo) -> bool:
-        try:
-            async with self.AsyncSession() as session:
-                beatmap = UserPlayedBeatmapsTable.from_dataclass(db_user_played_beatmap)
-                await session.merge(beatmap)
-                await session.commit()
-            return True
-        except IntegrityError:
-            logger.exception(f"IntegrityError: {__name__}")
-            return False
+    @elapsed_time_logger
+    async def upsert_user_beatmaps(self, db_user_played_beatmaps: Iterable[DbUserPlayedBeatmapInfo], *,
+                                   batch_size: int = 5000) -> int:
+        """
+        Inserts beatmaps (updating 'beatmapset_id' of already stored ones) with 'INSERT ... ON CONFLICT',
+        one transaction per 'batch_size' beatmaps.
+        Returns the amount of upserted rows.
+        """
+        stmt = sqlite.insert(UserPlayedBeatmapsTable)
+        stmt = stmt.on_conflict_do_update(index_elements=['user_info_id', 'beatmap_id'],
+                                          set_={'beatmapset_id': stmt.excluded.beatmapset_id})
+        return await self._execute_batched(stmt, db_user_played_beatmaps, batch_size)
+
+    @elapsed_time_logger
+    async def insert_new_user_beatmaps(self, db_user_played_beatmaps: Iterable[DbUserPlayedBeatmapInfo], *,
+                                       batch_size: int = 5000) -> int:
+        """
+        Inserts beatmaps skipping ones already stored, one transaction per 'batch_size' beatmaps.
+        Returns the amount of inserted rows.
+        """
+        stmt = sqlite.insert(UserPlayedBeatmapsTable).on_conflict_do_nothing(index_elements=['user_info_id',
+                                                                                             'beatmap_id'])
+        return await self._execute_batched(stmt, db_user_played_beatmaps, batch_size)
+
+    async def _execute_batched(self, stmt, db_user_played_beatmaps: Iterable[DbUserPlayedBeatmapInfo],
+                               batch_size: int) -> int:
+        res = 0
+        for batch in batched(db_user_played_beatmaps, batch_size):
+            async with self.async_engine.begin() as conn:
+                aggregates = await UserAggregatesTableManager.lock_in_session(
+                    conn, ((beatmap.user_info_id, beatmap._mode) for beatmap in batch))
+                new_beatmaps = await self._get_new_beatmaps(conn, batch)
+                result = await conn.execute(stmt, [
+                    {'user_info_id': beatmap.user_info_id,
+                     'beatmap_id': beatmap.beatmap_id,
+                     'beatmapset_id': beatmap.beatmapset_id,
+                     '_mode': beatmap._mode} for beatmap in batch
+                ])
+                for beatmap in new_beatmaps:
+                    aggregates[(beatmap.user_info_id, beatmap._mode)].beatmaps_count += 1
+                await UserAggregatesTableManager.save_in_session(conn, aggregates.values())
+            res += result.rowcount
+        return res
+
+    @staticmethod
+    async def _get_new_beatmaps(conn: AsyncConnection,
+                                batch: List[DbUserPlayedBeatmapInfo]) -> List[DbUserPlayedBeatmapInfo]:
+        """
+        Returns the beatmaps of the batch which are not stored yet (first ones of the duplicates).
+        """
+        beatmap_ids: Dict[int, List[int]] = {}
+        for beatmap in batch:
+            beatmap_ids.setdefault(beatmap.user_info_id, []).append(beatmap.beatmap_id)
+        stored = set()
+        for user_info_id, user_beatmap_ids in beatmap_ids.items():
+            for i in range(0, len(user_beatmap_ids), 500):
+                result = await conn.execute(
+                    select(UserPlayedBeatmapsTable.beatmap_id).where(
+                        UserPlayedBeatmapsTable.user_info_id == user_info_id,
+                        UserPlayedBeatmapsTable.beatmap_id.in_(user_beatmap_ids[i:i + 500])))
+                stored.update((user_info_id, beatmap_id) for beatmap_id in result.scalars())
+        res = []
+        for beatmap in batch:
+            if (beatmap.user_info_id, beatmap.beatmap_id) not in stored:
+                stored.add((beatmap.user_info_id, beatmap.beatmap_id))
+                res.append(beatmap)
+        return res
 
     async def delete_all_user_beatmaps(self, user_info: DbUserInfo) -> bool:
         try:
@@ -40,6 +104,7 @@ class UserPlayedBeatmapsTableManager:
                         UserPlayedBeatmapsTable.user_info_id == user_info.discord_user_id,
                         UserPlayedBeatmapsTable._mode == user_info._osu_game_mode)
                 )
+                await UserAggregatesTableManager.reset_in_session(session, user_info, beatmaps=True)
                 await session.commit()
             return True
         except Exception as e:
@@ -47,25 +112,33 @@ class UserPlayedBeatmapsTableManager:
             return False
 
     async def count_all_user_beatmaps(self, user_info: DbUserInfo) -> int:
-        async with self.AsyncSession() as session:
-            stmt = select(func.count()).where(
-                UserPlayedBeatmapsTable.user_info_id == user_info.discord_user_id,
-                UserPlayedBeatmapsTable._mode == user_info._osu_game_mode)
+        """
+        Reads the count from 'user_aggregates' (primary key lookup).
+        """
+        async with self.ReadAsyncSession() as session:
+            stmt = select(UserAggregatesTable.beatmaps_count).where(
+                UserAggregatesTable.user_info_id == user_info.discord_user_id,
+                UserAggregatesTable._mode == user_info._osu_game_mode)
             count = await session.execute(stmt)
         return count.scalar() or 0
 
     async def get_user_random_beatmap(self, user_info: DbUserInfo) -> Optional[DbUserPlayedBeatmapInfo]:
-        async with self.AsyncSession() as session:
-            stmt = select(UserPlayedBeatmapsTable).where(
+        beatmaps = await self.get_user_random_beatmaps(user_info, 1)
+        return beatmaps[0] if beatmaps else None
+
+    async def get_user_random_beatmaps(self, user_info: DbUserInfo, count: int) -> List[DbUserPlayedBeatmapInfo]:
+        """
+        Returns up to 'count' distinct random user's beatmaps (see 'sample_partition_ids').
+        """
+        async with self.ReadAsyncSession() as session:
+            row_ids = await sample_partition_ids(session, UserPlayedBeatmapsTable.id, [
                 UserPlayedBeatmapsTable.user_info_id == user_info.discord_user_id,
                 UserPlayedBeatmapsTable._mode == user_info._osu_game_mode
-            ).order_by(
-                func.random()).limit(1)
-            row = await session.execute(stmt)
-            beatmap = row.scalar()
-        if beatmap:
-            return DbUserPlayedBeatmapInfo.from_row(beatmap)
-        return None
+            ], count)
+            result = await session.execute(
+                select(UserPlayedBeatmapsTable).where(UserPlayedBeatmapsTable.id.in_(row_ids)))
+            beatmaps = {beatmap.id: beatmap for beatmap in result.scalars()}
+        return [DbUserPlayedBeatmapInfo.from_row(beatmaps[row_id]) for row_id in row_ids if row_id in beatmaps]
 
     async def check_if_user_has_beatmaps(self, user_info: DbUserInfo) -> bool:
         beatmaps_count = await self.count_all_user_beatmaps(user_info)
@@ -73,10 +146,47 @@ class UserPlayedBeatmapsTableManager:
 
     @elapsed_time_logger
     async def get_all_user_beatmaps(self, user_info: DbUserInfo) -> List[DbUserPlayedBeatmapInfo]:
-        async with self.AsyncSession() as session:
+        return [beatmap async for beatmap in self.iter_all_user_beatmaps(user_info)]
+
+    async def iter_all_user_beatmaps(self, user_info: DbUserInfo, *,
+                                     chunk_size: int = 5000) -> AsyncIterator[DbUserPlayedBeatmapInfo]:
+        """
+        'get_all_user_beatmaps' streamed by 'chunk_size' rows (constant memory).
+        """
+        async with self.ReadAsyncSession() as session:
             stmt = select(UserPlayedBeatmapsTable).where(
                 UserPlayedBeatmapsTable.user_info_id == user_info.discord_user_id,
                 UserPlayedBeatmapsTable._mode == user_info._osu_game_mode)
-            result = await session.execute(stmt)
-            beatmaps = result.scalars().all()
-            return [DbUserPlayedBeatmapInfo.from_row(beatmap) for beatmap in beatmaps]
+            result = await session.stream_scalars(stmt.execution_options(yield_per=chunk_size))
+            async for rows in result.partitions():
+                for row in rows:
+                    yield DbUserPlayedBeatmapInfo.from_row(row)
+
+    async def get_user_beatmaps_page(self, user_info: DbUserInfo, *, descending: bool = False,
+                                     after: Optional[Tuple] = None,
+                                     limit: int = 100) -> DbKeysetPage[DbUserPlayedBeatmapInfo]:
+        """
+        Returns the page of user's beatmaps ordered by 'beatmap_id',
+        starting after the 'next_cursor' ('after') of the previous page.
+        """
+        stmt = keyset_page_stmt(
+            select(UserPlayedBeatmapsTable).where(
+                UserPlayedBeatmapsTable.user_info_id == user_info.discord_user_id,
+                UserPlayedBeatmapsTable._mode == user_info._osu_game_mode),
+            UserPlayedBeatmapsTable.beatmap_id, UserPlayedBeatmapsTable.id,
+            after=after, descending=descending, limit=limit)
+        async with self.ReadAsyncSession() as session:
+            beatmaps, next_cursor = keyset_page((await session.execute(stmt)).all(), limit)
+        return DbKeysetPage(items=[DbUserPlayedBeatmapInfo.from_row(beatmap) for beatmap in beatmaps],
+                            next_cursor=next_cursor)
+
+    async def get_all_user_beatmap_ids(self, user_info: DbUserInfo) -> List[int]:
+        """
+        Ids of 'get_all_user_beatmaps' (without loading the rows).
+        """
+        async with self.ReadAsyncSession() as session:
+            result = await session.execute(
+                select(UserPlayedBeatmapsTable.beatmap_id).where(
+                    UserPlayedBeatmapsTable.user_info_id == user_info.discord_user_id,
+                    UserPlayedBeatmapsTable._mode == user_info._osu_game_mode))
+        return list(result.scalars())
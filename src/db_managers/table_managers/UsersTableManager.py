@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, AsyncSession
@@ -15,9 +15,12 @@ class UsersTableManager:
     Class for managing 'users' table database operations (async SQLAlchemy).
     """
 
-    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession]):
+    def __init__(self, async_engine: AsyncEngine, async_session: async_sessionmaker[AsyncSession],
+                 read_async_session: Optional[async_sessionmaker[AsyncSession]] = None):
         self.async_engine = async_engine
         self.AsyncSession = async_session
+        # Read only queries go through the separate pool If given
+        self.ReadAsyncSession = read_async_session or async_session
 
     async def merge_user_info(self, user_info: DbUserInfo) -> bool:
         async with self.AsyncSession() as session:
@@ -28,7 +31,7 @@ class UsersTableManager:
         return True
 
     async def get_user_info(self, discord_user_id: int) -> Optional[DbUserInfo]:
-        async with self.AsyncSession() as session:
+        async with self.ReadAsyncSession() as session:
             result = await session.execute(
                select(UserTable).where(UserTable.discord_user_id == discord_user_id)
             )
@@ -36,3 +39,8 @@ class UsersTableManager:
             if user:
                 return DbUserInfo.from_row(user)
             return None
+
+    async def get_all_users_info(self) -> List[DbUserInfo]:
+        async with self.ReadAsyncSession() as session:
+            result = await session.execute(select(UserTable))
+            return [DbUserInfo.from_row(user) for user in result.scalars()]
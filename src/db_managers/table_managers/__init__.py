@@ -1,3 +1,8 @@
 from .ScoresTableManager import ScoresTableManager
 from .UserPlayedBeatmapsTableManager import UserPlayedBeatmapsTableManager
 from .UsersTableManager import UsersTableManager
+from .UserMostPlayedTableManager import UserMostPlayedTableManager
+from .BeatmapCatalogTableManager import BeatmapCatalogTableManager
+from .ScoreImportJobsTableManager import ScoreImportJobsTableManager
+from .OsuUserProfilesTableManager import OsuUserProfilesTableManager
+from .UserAggregatesTableManager import UserAggregatesTableManager
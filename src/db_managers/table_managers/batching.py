@@ -0,0 +1,13 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar('T')
+
+
+def batched(iterable: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """
+    Splits the iterable into lists of 'batch_size' items (the last one may be shorter).
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
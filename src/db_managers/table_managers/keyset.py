@@ -0,0 +1,39 @@
+from typing import Optional, Tuple, Sequence, List, Any
+
+from sqlalchemy import Select, tuple_, type_coerce, literal, Row
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.types import NullType
+
+
+def keyset_page_stmt(stmt: Select, sort_column: InstrumentedAttribute, id_column: InstrumentedAttribute, *,
+                     after: Optional[Tuple], descending: bool, limit: int) -> Select:
+    """
+    Orders the statement by '(sort_column, id_column)' and seeks past the 'after' cursor.
+    Adds the raw (as stored) sort value column for the cursor
+    (e.g. 'DateTime' values bound by SQLAlchemy are formatted differently from the stored ones).
+    Selects one extra row to know If there is the next page (see 'keyset_page').
+    Rows with NULL 'sort_column' are not paged.
+    """
+    raw_sort_column = type_coerce(sort_column, NullType())
+    stmt = stmt.add_columns(raw_sort_column.label('keyset_sort_value')).where(sort_column.is_not(None))
+    if after is not None:
+        after_sort_value, after_id = after
+        key, after_key = tuple_(raw_sort_column, id_column), tuple_(literal(after_sort_value, NullType()), after_id)
+        stmt = stmt.where(key < after_key if descending else key > after_key)
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), id_column.asc())
+    return stmt.limit(limit + 1)
+
+
+def keyset_page(rows: Sequence[Row], limit: int) -> Tuple[List[Any], Optional[Tuple]]:
+    """
+    Splits 'keyset_page_stmt' result rows into the page entities and the next page cursor
+    (None If there is no extra row, so no next page).
+    """
+    page_rows = rows[:limit]
+    entities = [row[0] for row in page_rows]
+    if len(rows) <= limit:
+        return entities, None
+    return entities, (page_rows[-1][1], page_rows[-1][0].id)
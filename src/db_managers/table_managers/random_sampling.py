@@ -0,0 +1,62 @@
+import random
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select, func, ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+async def sample_partition_ids(session: AsyncSession, id_column: InstrumentedAttribute,
+                               where: Sequence[ColumnElement[bool]], count: int, *,
+                               rng: Optional[random.Random] = None, probes_per_round: int = 32,
+                               max_rounds: int = 4) -> List[int]:
+    """
+    Returns up to 'count' distinct random ids of the rows matching 'where' (the partition),
+    without sorting or scanning the partition (needs an index with the 'where' columns as the prefix).
+
+    Random ids between the partition's min and max id are probed by the primary key,
+    the existing ones are picked (uniformly) in the probing order.
+    If the partition is too sparse for that, the rest is picked by seeking the next row after a random id
+    (rows after bigger gaps are picked more often then).
+    """
+    rng = rng or random
+    low = (await session.execute(select(func.min(id_column)).where(*where))).scalar()
+    high = (await session.execute(select(func.max(id_column)).where(*where))).scalar()
+    if low is None or count <= 0:
+        return []
+
+    res: List[int] = []
+    picked = set()
+    for _ in range(max_rounds):
+        needed = count - len(res)
+        if needed <= 0:
+            return res
+        candidates = list(dict.fromkeys(rng.randint(low, high) for _ in range(max(probes_per_round, needed * 4))))
+        existing = set()
+        # Chunks to stay below the SQLite variables limit
+        for i in range(0, len(candidates), 500):
+            result = await session.execute(
+                select(id_column).where(id_column.in_(candidates[i:i + 500]), *where))
+            existing.update(result.scalars())
+        for candidate in candidates:
+            if candidate in existing and candidate not in picked and len(res) < count:
+                res.append(candidate)
+                picked.add(candidate)
+
+    for _ in range((count - len(res)) * 4):
+        if len(res) >= count:
+            break
+        start_id = rng.randint(low, high)
+        row_id = (await session.execute(
+            select(id_column).where(*where, id_column >= start_id, id_column.not_in(picked))
+            .order_by(id_column).limit(1))).scalar()
+        if row_id is None:
+            # Wrapping around
+            row_id = (await session.execute(
+                select(id_column).where(*where, id_column.not_in(picked)).order_by(id_column).limit(1))).scalar()
+        if row_id is None:
+            # The whole partition is picked
+            break
+        res.append(row_id)
+        picked.add(row_id)
+    return res
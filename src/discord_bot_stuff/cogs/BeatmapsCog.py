@@ -3,9 +3,11 @@ import asyncio
 from discord.ext import commands
 from discord.ext.commands import Context
 
+from api_utils import RequestPriority, request_priority
 from core import BotContext
 from db_managers.data_classes import DbUserPlayedBeatmapInfo
 from discord_bot_stuff.extras import DbExtras, DiscordExtras
+from discord_bot_stuff.extras.DbExtras import MostPlayedSyncResult
 from discord_bot_stuff.predicates import combined_predicates
 from factories import UtilsFactory
 
@@ -21,21 +23,26 @@ class BeatmapsCog(commands.Cog):
     @commands.command(name='load_all_user_played_beatmaps')
     @commands.check(combined_predicates.trusted_and_config)
     @commands.cooldown(1, 60 * 60 * 2, commands.BucketType.user)
-    async def load_all_user_played_beatmaps_command(self, ctx: Context):
+    async def load_all_user_played_beatmaps_command(self, ctx: Context, full: bool = False):
         """
         Loads all user played beatmaps into the database table.
+        Only new beatmaps are fetched If the beatmaps were loaded before.
+
+        Parameters:
+            - full (bool)     : Re-download the whole MOST PLAYED list. Defaults to False.
         """
         user_info = await self.db_manager.users.get_user_info(ctx.author.id)
-        calc_task = asyncio.create_task(self.osu_api_utils.get_all_user_beatmaps(user_info))
+        if not await self.db_manager.user_played_beatmaps.check_if_user_has_beatmaps(user_info):
+            full = True
+        with request_priority(RequestPriority.BACKGROUND):
+            calc_task = asyncio.create_task(self.db_extras.sync_user_played_beatmaps(user_info, full=full))
         is_task_completed = await self.discord_extras.wait_till_task_complete(ctx, calc_task=calc_task,
                                                                               timeout_sec=60 * 60 * 2)
         if is_task_completed:
-            beatmaps = calc_task.result()
-            count = 0
-            for beatmap in beatmaps:
-                db_beatmap = DbUserPlayedBeatmapInfo.from_beatmap_and_user_info(beatmap, user_info)
-                count += await self.db_manager.user_played_beatmaps.merge_user_beatmap(db_beatmap)
-            await ctx.reply(f"Inserted `{count}` beatmaps into db")
+            res: MostPlayedSyncResult = calc_task.result()
+            await ctx.reply(f"Inserted `{res.inserted_beatmaps}` beatmaps into db, "
+                            f"updated `{len(res.changed_playcounts)}` playcounts "
+                            f"(`{res.pages_fetched}` pages fetched{', delta sync' if not res.is_full else ''})")
 
     @commands.command(name='delete_all_user_beatmaps')
     @commands.check(combined_predicates.beatmaps_ready)
@@ -84,4 +91,7 @@ class BeatmapsCog(commands.Cog):
 
         if is_task_completed:
             beatmap_info: DbUserPlayedBeatmapInfo = calc_task.result()
-            await ctx.reply(f"{DbUserPlayedBeatmapInfo.__name__} instance:\n{beatmap_info}")
+            response = f"{DbUserPlayedBeatmapInfo.__name__} instance:\n{beatmap_info}"
+            if beatmap_info:
+                response += f"\n{await self.db_extras.format_catalog_beatmap(beatmap_info.beatmap_id)}"
+            await ctx.reply(response)
@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord.ext.commands import Context
 
 from data_managers import DataUtils
+from factories import UtilsFactory
 from my_logging.LoggingStats import LoggingStats
 
 
@@ -19,6 +20,34 @@ class BotStatsCog(commands.Cog):
         response = await self.logging_stats.calculate_stats()
         await ctx.reply(response)
 
+    @commands.command(name='api_cache_stats')
+    async def api_cache_stats_command(self, ctx: Context):
+        """
+        Hit/miss stats of the 'OsuApiUtils' response cache and deduplicated in-flight requests
+        (every hit is one osu! api request saved).
+        """
+        osu_api_utils = UtilsFactory.get_osu_api_utils()
+        response = {'cache': osu_api_utils.cache.get_stats(),
+                    'single_flight': osu_api_utils.single_flight.get_stats(),
+                    'user_profiles': UtilsFactory.get_osu_user_profile_cache().get_stats()}
+        await ctx.reply(response)
+
+    @commands.command(name='api_jobs')
+    async def api_jobs_command(self, ctx: Context):
+        """
+        Active osu! api jobs sharing the rate limit (speed and ETA of each one).
+        """
+        jobs_stats = UtilsFactory.get_osu_api_utils().fair_share.get_jobs_stats()
+        response = '\n'.join(str(job_stats) for job_stats in jobs_stats) or "No active jobs"
+        await ctx.reply(response)
+
+    @commands.command(name='api_rate')
+    async def api_rate_command(self, ctx: Context):
+        """
+        Current osu! api request rate (adaptive target rate and the effective one).
+        """
+        await ctx.reply(UtilsFactory.get_osu_api_utils().get_rate_stats())
+
     @commands.command(name='command_usage')
     async def command_usage_command(self, ctx: Context):
         """
@@ -28,13 +28,16 @@ class ChillCog(commands.Cog):
                     "For instance, if your osu! user id is `16357858` and you play `osu` (std) game mode,\n"
                     "execute the command `^config_change 16357858 osu` to set up your config.\n"
                     "\n"
-                    "Commands like `^beatmapsets_stats` and `^beatmap_playcount_slow` are now accessible.\n"
+                    "Commands like `^beatmapsets_stats` and `^beatmap_playcount` are now accessible.\n"
                     "\n"
                     "Load all beatmaps user has ever played into the bot's database using\n"
                     "`^load_all_user_played_beatmaps`.\n"
                     "Load all scores into the bot's database with `^load_all_user_scores`.\n"
                     "This process may take a considerable amount of time.\n"
                     "For instance, processing 11000 scores took almost a day.\n"
+                    "Stopped or interrupted loading continues where it left off.\n"
+                    "Afterwards your new best scores are picked up automatically every 30 minutes\n"
+                    "(or right away with `^refresh_recent_scores`).\n"
                     "You can erase all scores from the database using `^delete_all_user_scores`\n"
                     "to recalculate or simply delete them.\n"
                     "\n"
@@ -1,10 +1,13 @@
 import asyncio
+from typing import Optional
 
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
 
+from api_utils import RequestPriority, request_priority
 from core import BotContext
+from db_managers.data_classes import DbUserMostPlayedInfo
 from discord_bot_stuff.extras import DbExtras, DiscordExtras
 from discord_bot_stuff.predicates import combined_predicates
 from factories import UtilsFactory
@@ -34,7 +37,7 @@ class OsuApiLogicCog(commands.Cog):
            query="hyperpop"
         """
         user_info = await self.db_manager.users.get_user_info(ctx.author.id)
-        calc_task = asyncio.create_task(self.db_extras.calculate_beatmapsets_grade_stats(query, user_info))
+        calc_task = asyncio.create_task(self.db_extras.calculate_beatmapsets_grade_stats(ctx, query, user_info))
         is_task_completed = await self.discord_extras.wait_till_task_complete(ctx, calc_task=calc_task,
                                                                               timeout_sec=60 * 60 * 4)
 
@@ -47,28 +50,29 @@ class OsuApiLogicCog(commands.Cog):
                 image_file = discord.File(fp=p_bytes, filename=f"{p_name}_plot.png")
                 await ctx.reply(file=image_file)
 
-    @commands.command(name='beatmap_playcount_slow')
+    @commands.command(name='beatmap_playcount', aliases=['beatmap_playcount_slow'])
     @commands.check(combined_predicates.trusted_and_config)
-    @commands.cooldown(1, 60 * 10, commands.BucketType.user)
-    async def beatmap_playcount_slow_command(self, ctx: Context, *, beatmap_id: int):
+    @commands.cooldown(1, 10, commands.BucketType.user)
+    async def beatmap_playcount_command(self, ctx: Context, *, beatmap_id: int):
         """
-        Gets user's playcount on a beatmap by iterating over all MOST PLAYED beatmaps.
+        Gets user's playcount on a beatmap from the locally stored MOST PLAYED beatmaps.
+        MOST PLAYED beatmaps are (re)fetched first If they are outdated.
 
         Parameters:
             - beatmap_id (int)
         """
         user_info = await self.db_manager.users.get_user_info(ctx.author.id)
-        calc_task = asyncio.create_task(self.osu_api_utils.get_user_beatmap_playcount(beatmap_id, user_info))
+        with request_priority(RequestPriority.BACKGROUND):
+            calc_task = asyncio.create_task(self.db_extras.get_user_beatmap_playcount(beatmap_id, user_info))
         is_task_completed = await self.discord_extras.wait_till_task_complete(ctx, calc_task=calc_task,
                                                                               timeout_sec=60 * 60 * 2)
         if is_task_completed:
-            beatmap_playcount = calc_task.result()
+            beatmap_playcount: Optional[DbUserMostPlayedInfo] = calc_task.result()
             title, artist, playcount = None, None, None
             if beatmap_playcount:
                 playcount = beatmap_playcount.count
-            if beatmap_playcount and beatmap_playcount.beatmapset:
-                title = beatmap_playcount.beatmapset.title
-                artist = beatmap_playcount.beatmapset.artist
+                title = beatmap_playcount.title
+                artist = beatmap_playcount.artist
             embed = discord.Embed()
             embed.add_field(name="{}".format(await user_info.osu_user_name()),
                             value="Your playcount: `{0}`".format(
@@ -76,9 +80,9 @@ class OsuApiLogicCog(commands.Cog):
             embed.add_field(name="Beatmap(set)",
                             value="`{0}` - `{1}`".format(
                                 title, artist))
-            if beatmap_playcount.beatmapset:
+            if beatmap_playcount and beatmap_playcount.beatmapset_id:
                 embed.set_thumbnail(
-                    url=f'https://assets.ppy.sh/beatmaps/{beatmap_playcount.beatmapset.id}/covers/list.jpg')
+                    url=f'https://assets.ppy.sh/beatmaps/{beatmap_playcount.beatmapset_id}/covers/list.jpg')
             await ctx.reply(embed=embed)
 
     @commands.command(name='most_recent')
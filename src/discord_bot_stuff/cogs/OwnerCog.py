@@ -1,9 +1,11 @@
+import discord
 from discord.ext import commands
 from discord.ext.commands import is_owner, Context
 
-from core import BotContext
+from core import BotContext, PathManager
 from data_managers import DataUtils
 from discord_bot_stuff.extras import DiscordExtras
+from factories import UtilsFactory
 
 
 class OwnerCog(commands.Cog):
@@ -46,3 +48,25 @@ class OwnerCog(commands.Cog):
         data_str = await self.discord_extras.format_discord_id_list(await DataUtils.load_admin_users())
         response = f"Admins:\n{data_str}"
         await ctx.reply(response)
+
+    @is_owner()
+    @commands.command(name="api_metrics")
+    async def api_metrics_command(self, ctx: Context):
+        """
+        Per-endpoint osu! api metrics since the bot started
+        (calls, errors, retries, latency percentiles, time queued in the rate limiter and on the wire, received data)
+        and the circuit breaker state.
+        """
+        osu_api_utils = UtilsFactory.get_osu_api_utils()
+        await ctx.reply(f"```\n{osu_api_utils.metrics.format_summary()}\n```\n"
+                        f"Circuit breaker: {osu_api_utils.circuit_breaker.get_stats()}")
+
+    @is_owner()
+    @commands.command(name="api_metrics_export")
+    async def api_metrics_export_command(self, ctx: Context):
+        """
+        Saves json snapshot of all osu! api metrics (including 'OsuApiUtils' methods) and sends it.
+        """
+        await DataUtils.save_api_metrics_snapshot(UtilsFactory.get_osu_api_utils().get_metrics_snapshot())
+        await ctx.reply(file=discord.File(fp=PathManager.API_METRICS_SNAPSHOT,
+                                          filename=PathManager.API_METRICS_SNAPSHOT.name))
@@ -18,27 +18,82 @@ class ScoresCog(commands.Cog):
         self.bot = bot_context.bot
         self.db_manager = UtilsFactory.get_db_manager()
         self.osu_api_utils = UtilsFactory.get_osu_api_utils()
+        self.score_import_job_manager = UtilsFactory.get_score_import_job_manager()
+        self.recent_scores_poller = UtilsFactory.get_recent_scores_poller()
         self.db_extras = DbExtras(bot_context)
         self.discord_extras = DiscordExtras(bot_context)
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.db_extras.resume_score_import_jobs()
+        self.recent_scores_poller.start()
+
     @commands.command(name='load_all_user_scores')
     @commands.check(combined_predicates.beatmaps_ready)
     @commands.cooldown(1, 60 * 60 * 48, commands.BucketType.user)
-    async def load_all_user_scores_command(self, ctx: Context):
+    async def load_all_user_scores_command(self, ctx: Context, all_scores: bool = False):
         """
         Loads all scores to the database table according to 'user_played_beatmaps' database table.
 
         For example the user ever played 10000 maps.
         It would take about 10100 requests to the api.
+        The progress is saved after every beatmap: stopped (or interrupted by the bot restart) loading
+        continues from the first not loaded beatmap.
+
+        Parameters:
+            - all_scores (bool)     : Load every score on the beatmap (all mods combinations),
+                                      not only the best one, for the same amount of requests. Defaults to False.
         """
         user_info = await self.db_manager.users.get_user_info(ctx.author.id)
-        beatmaps = await self.db_manager.user_played_beatmaps.get_all_user_beatmaps(user_info)
-        calc_task = asyncio.create_task(self.db_extras.insert_best_scores_into_db(ctx, beatmaps, user_info))
+        job_info = await self.db_manager.score_import_jobs.get_user_active_job(user_info)
+        if job_info is not None and self.score_import_job_manager.is_running(job_info.id):
+            ctx.command.reset_cooldown(ctx)
+            await ctx.reply(f"Scores are already loading "
+                            f"(`{job_info.cursor}/{job_info.total_beatmaps}` beatmaps done)")
+            return
+
+        job_info, calc_task = await self.db_extras.run_score_import_job(ctx, user_info, all_scores=all_scores)
         is_task_completed = await self.discord_extras.wait_till_task_complete(ctx, calc_task=calc_task,
                                                                               timeout_sec=60 * 60 * 48)
         if is_task_completed:
-            res: int = calc_task.result()
-            await ctx.reply(f"Inserted `{res}` scores into db")
+            job_info = calc_task.result()
+            await ctx.reply(f"Inserted `{job_info.inserted_scores}` scores into db")
+        else:
+            await self.score_import_job_manager.pause_job(job_info.id)
+            ctx.command.reset_cooldown(ctx)
+            await ctx.reply("Progress is saved, use the command again to continue "
+                            "or `cancel_score_import` to drop it")
+
+    @commands.command(name='cancel_score_import')
+    @commands.cooldown(1, 30, commands.BucketType.user)
+    async def cancel_score_import_command(self, ctx: Context):
+        """
+        Cancels user's unfinished scores loading (already loaded scores are kept).
+        """
+        user_info = await self.db_manager.users.get_user_info(ctx.author.id)
+        job_info = await self.db_manager.score_import_jobs.get_user_active_job(user_info) if user_info else None
+        if job_info is None:
+            await ctx.reply("There is no unfinished scores loading")
+            return
+        await self.score_import_job_manager.cancel_job(job_info.id)
+        await ctx.reply(f"Canceled scores loading "
+                        f"(`{job_info.cursor}/{job_info.total_beatmaps}` beatmaps were done)")
+
+    @commands.command(name='refresh_recent_scores')
+    @commands.check(combined_predicates.scores_ready)
+    @commands.cooldown(1, 60 * 10, commands.BucketType.user)
+    async def refresh_recent_scores_command(self, ctx: Context):
+        """
+        Updates user's best scores in the database table with the recent ones (last 24 hours).
+        It is also done automatically every 30 minutes.
+        """
+        user_info = await self.db_manager.users.get_user_info(ctx.author.id)
+        try:
+            res = await self.recent_scores_poller.poll_user(user_info)
+        except ValueError as e:
+            await ctx.reply(f"Could not fetch recent scores: {e}")
+            return
+        await ctx.reply(f"Updated `{res}` best scores")
 
     @commands.command(name='delete_all_user_scores')
     @commands.check(combined_predicates.scores_ready)
@@ -100,8 +155,8 @@ class ScoresCog(commands.Cog):
         """
         user_info = await self.db_manager.users.get_user_info(ctx.author.id)
         excel_scores_manager = ExcelScoresManager(user_info,
-                                                  await self.db_manager.scores.
-                                                  get_all_user_scores(user_info))
+                                                  self.db_manager.scores.
+                                                  iter_all_user_scores(user_info, with_json_data=False))
         await excel_scores_manager.retrieve_rows()
         file_path = excel_scores_manager.save_workbook()
         file = discord.File(fp=file_path, filename=f"scores_{user_info.osu_user_id}"
@@ -118,8 +173,9 @@ class ScoresCog(commands.Cog):
         """
         user_info = await self.db_manager.users.get_user_info(ctx.author.id)
         excel_scores_manager = ExcelScoresManager(user_info,
-                                                  await self.db_manager.scores.
-                                                  get_mods_filtered_user_scores(user_info, mods))
+                                                  self.db_manager.scores.
+                                                  iter_mods_filtered_user_scores(user_info, mods,
+                                                                                 with_json_data=False))
         await excel_scores_manager.retrieve_rows()
         file_path = excel_scores_manager.save_workbook()
         file = discord.File(fp=file_path, filename=f"scores_{user_info.osu_user_id}_filtered_{str(mods)}"
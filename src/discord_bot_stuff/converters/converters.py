@@ -22,11 +22,11 @@ class ModsConverter(commands.Converter):
 
 class OsuUserIdConverter(commands.Converter):
     async def convert(self, ctx, argument) -> int:
-        osu_api_utils = UtilsFactory.get_osu_api_utils()
+        osu_user_profile_cache = UtilsFactory.get_osu_user_profile_cache()
         if not argument.isnumeric():
             raise commands.BadArgument("Sorry, but osu user id must be numeric")
 
-        if not await osu_api_utils.check_if_user_exists(int(argument)):
+        if not await osu_user_profile_cache.user_exists(int(argument)):
             raise commands.BadArgument("Sorry, but osu user with specified id does not exist")
 
         return int(argument)
@@ -1,74 +1,269 @@
 import asyncio
+import datetime
 import time
-from typing import List
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import List, AsyncIterator, Optional, Iterable, Dict, Tuple
 
+from discord import Message
 from discord.ext.commands import Context
-from ossapi import BeatmapCompact, Beatmap
+from ossapi import BeatmapsetSearchResult, BeatmapPlaycount
 
+from api_utils.FairShareScheduler import ApiJob
 from core import BotContext
-from db_managers.data_classes import DbScoreInfo, DbUserInfo, DbUserPlayedBeatmapInfo
+from db_managers.data_classes import DbUserInfo, DbUserPlayedBeatmapInfo, DbUserMostPlayedInfo, \
+    DbBeatmapInfo, DbScoreImportJobInfo
 from factories import UtilsFactory
 from statistics_managers import BeatmapsUserGradesStatsManager
 
 
+@dataclass
+class MostPlayedSyncResult:
+    """
+    Dataclass to wrap up the result of the user's MOST_PLAYED sync.
+    """
+
+    new_playcounts: List[BeatmapPlaycount] = field(default_factory=list)
+    changed_playcounts: List[BeatmapPlaycount] = field(default_factory=list)
+    pages_fetched: int = 0
+    is_full: bool = False
+    stopped_early: bool = False
+    inserted_beatmaps: int = 0
+
+
 class DbExtras:
     """
     Class designed to mix things up!
     """
 
+    MOST_PLAYED_TTL_SEC = 60 * 60 * 24
+    MOST_PLAYED_MISS_TTL_SEC = 60 * 60  # Beatmap may be played for the first time after the last sync
+    MOST_PLAYED_FULL_SYNC_INTERVAL_SEC = 60 * 60 * 24 * 7
+
     def __init__(self, bot_context: BotContext):
         self.bot = bot_context.bot
         self.osu_api_utils = UtilsFactory.get_osu_api_utils()
         self.db_manager = UtilsFactory.get_db_manager()
+        self.score_import_job_manager = UtilsFactory.get_score_import_job_manager()
 
-    async def calculate_beatmapsets_grade_stats(self, query: str, user_info: DbUserInfo) \
+    def format_api_job_progress(self, api_job: ApiJob) -> str:
+        """
+        Formats speed and ETA of the job for the progress messages.
+        """
+        eta = api_job.eta_sec()
+        eta_str = str(datetime.timedelta(seconds=round(eta))) if eta is not None else 'unknown'
+        return (f"Speed: {api_job.throughput():.2f} requests/s, ETA: {eta_str} "
+                f"(active jobs: {len(self.osu_api_utils.fair_share.active_jobs)})")
+
+    async def calculate_beatmapsets_grade_stats(self, ctx: Context, query: str, user_info: DbUserInfo) \
             -> BeatmapsUserGradesStatsManager:
         """
-        Calculates beatmapsets_stats by querying 'search_all_beatmapsets' method of 'OsuApiUtils'.
+        Calculates beatmapsets_stats by streaming 'iter_search_beatmapsets' method of 'OsuApiUtils'.
+        Grade lookups start right after the first search page.
         Wraps it into the 'BeatmapsetsUserGradesStatisticManager' class at last.
         """
-        combined_beatmapset_search_res = await self.osu_api_utils.search_all_beatmapsets(query,
-                                                                                         mode=user_info.osu_game_mode)
-        beatmap_ids: List[int] = []
-        for beatmapset in combined_beatmapset_search_res.beatmapsets:
-            for beatmap in beatmapset.beatmaps:
-                beatmap_ids.append(beatmap.id)
-
-        stats = BeatmapsUserGradesStatsManager(beatmap_ids, user_info,
-                                               query_dict=self.osu_api_utils.get_last_search_query_dict())
-        await stats.calculate_user_grades()
+        progress_msg = await ctx.reply("Searching beatmapsets...")
+        with self.osu_api_utils.fair_share.job('beatmapsets_stats', user_info.discord_user_id) as api_job:
+            search_pages = self.osu_api_utils.iter_search_beatmapsets(query, mode=user_info.osu_game_mode)
+            query_dict = self.osu_api_utils.make_search_query_dict(query, user_info.osu_game_mode)
+            stats = BeatmapsUserGradesStatsManager(self._iter_search_beatmap_ids(search_pages, progress_msg, api_job),
+                                                   user_info, query_dict=query_dict)
+            await stats.calculate_user_grades()
         return stats
 
-    async def insert_best_scores_into_db(self, ctx: Context,
-                                         beatmaps: List[BeatmapCompact | Beatmap | int | DbUserPlayedBeatmapInfo],
-                                         user_info: DbUserInfo) -> int:
-        """
-        Obtains best scores of a user's on all given beatmaps and inserts them into database.
-        """
-        progress_msg = await ctx.reply("Calculating scores...\n"
-                                       f"Remaining: ~{len(beatmaps)}")
-        res: int = 0
-        try:
-            start_time = time.perf_counter()
-            for ind, beatmap in enumerate(beatmaps):
-                if isinstance(beatmap, int):
-                    beatmap_id = beatmap
-                elif isinstance(beatmap, (BeatmapCompact, Beatmap)):
-                    beatmap_id = beatmap.id
-                elif isinstance(beatmap, DbUserPlayedBeatmapInfo):
-                    beatmap_id = beatmap.beatmap_id
-                else:
-                    raise RuntimeError
-                score = await self.osu_api_utils.get_beatmap_user_best_score(beatmap_id, user_info)
-                if ind % 100 == 0:
-                    await progress_msg.edit(content=f"Calculating scores...\n"
-                                                    f"Remaining: ~{len(beatmaps) - ind}")
-
-                if score:
-                    score_info = DbScoreInfo.from_score_and_user_info(score, user_info)
-                    res += await self.db_manager.scores.merge_score_info(score_info)
-            end_time = time.perf_counter()
-            await ctx.reply(f"Done in {end_time - start_time:.6f} seconds")
-        except asyncio.CancelledError:
-            pass
+    async def _iter_search_beatmap_ids(self, search_pages: AsyncIterator[BeatmapsetSearchResult],
+                                       progress_msg: Message, api_job: ApiJob) -> AsyncIterator[int]:
+        """
+        Yields beatmap ids of the search pages as they arrive, reporting the progress.
+        Keeps the job ETA up to date by estimating total beatmaps from the pages seen so far.
+        """
+        beatmapsets_seen = 0
+        beatmaps_seen = 0
+        async for search_page in search_pages:
+            beatmapsets_seen += len(search_page.beatmapsets)
+            page_beatmap_ids = [beatmap.id for beatmapset in search_page.beatmapsets for beatmap in beatmapset.beatmaps]
+            beatmaps_seen += len(page_beatmap_ids)
+            if search_page.beatmapsets:
+                # Requests left: the rest of the pages plus lookups of every beatmap not processed yet
+                lookups_done = beatmaps_seen - len(page_beatmap_ids)
+                remaining_pages = max(search_page.total - beatmapsets_seen, 0) / len(search_page.beatmapsets)
+                estimated_beatmaps = search_page.total * beatmaps_seen / beatmapsets_seen
+                api_job.total_requests = round(api_job.requests_done + remaining_pages +
+                                               estimated_beatmaps - lookups_done)
+
+            await progress_msg.edit(content=f"Calculating grades...\n"
+                                            f"Beatmapsets: {beatmapsets_seen}/{search_page.total}\n"
+                                            f"{self.format_api_job_progress(api_job)}")
+            for beatmap_id in page_beatmap_ids:
+                yield beatmap_id
+
+    async def run_score_import_job(self, ctx: Context, user_info: DbUserInfo, *, all_scores: bool = False) \
+            -> Tuple[DbScoreImportJobInfo, asyncio.Task]:
+        """
+        Starts loading user's scores on all beatmaps of the 'user_played_beatmaps' database table
+        as a persisted job (see 'ScoreImportJobManager').
+        If the user has an unfinished job it is continued instead ('all_scores' of that job is kept).
+        Only the best score on every beatmap is obtained, unless 'all_scores' is True
+        (all scores of the beatmap, every mods combination, are obtained for the same one request then).
+        Returns the job and the task resulting with the finished job.
+        """
+        job_info = await self.db_manager.score_import_jobs.get_user_active_job(user_info)
+        if job_info is None:
+            beatmap_ids = await self.db_manager.user_played_beatmaps.get_all_user_beatmap_ids(user_info)
+            job_info = await self.score_import_job_manager.create_job(user_info, beatmap_ids, all_scores=all_scores,
+                                                                      channel_id=ctx.channel.id)
+            progress_msg = await ctx.reply("Calculating scores...\n"
+                                           f"Remaining: ~{job_info.remaining_beatmaps}")
+        else:
+            progress_msg = await ctx.reply(f"Continuing unfinished job "
+                                           f"(`{job_info.cursor}/{job_info.total_beatmaps}` beatmaps done)...")
+        return job_info, await self.score_import_job_manager.start_job(job_info,
+                                                                       self._score_import_progress(progress_msg))
+
+    async def resume_score_import_jobs(self):
+        """
+        Resumes score import jobs interrupted by the bot restart, reporting them to the channels they were started in.
+        """
+        async def report_done(job_info: DbScoreImportJobInfo, task: asyncio.Task, channel):
+            try:
+                job_info = await task
+            except asyncio.CancelledError:
+                return
+            if channel is not None:
+                await channel.send(f"<@{job_info.user_info_id}> Score import job is done, "
+                                   f"inserted `{job_info.inserted_scores}` scores into db")
+
+        def progress_callback_factory(job_info: DbScoreImportJobInfo):
+            channel = self.bot.get_channel(job_info.channel_id) if job_info.channel_id else None
+            return self._score_import_progress(None, channel=channel)
+
+        tasks = await self.score_import_job_manager.resume_interrupted_jobs(progress_callback_factory)
+        for job_id, task in tasks.items():
+            job_info = await self.db_manager.score_import_jobs.get_job(job_id)
+            channel = self.bot.get_channel(job_info.channel_id) if job_info.channel_id else None
+            asyncio.create_task(report_done(job_info, task, channel))
+
+    def _score_import_progress(self, progress_msg: Optional[Message], *, channel=None):
+        """
+        Returns 'ScoreImportJobManager' progress callback editing the progress message
+        (the message is sent to the channel first If it is not given).
+        """
+        async def callback(job_info: DbScoreImportJobInfo, api_job: ApiJob):
+            nonlocal progress_msg
+            content = (f"Calculating scores...\n"
+                       f"Remaining: ~{job_info.remaining_beatmaps}\n"
+                       f"{self.format_api_job_progress(api_job)}")
+            if progress_msg is None:
+                if channel is None:
+                    return
+                progress_msg = await channel.send(content)
+            else:
+                await progress_msg.edit(content=content)
+
+        return callback
+
+    async def sync_user_most_played(self, osu_user_id: int, *, full: bool = False) -> MostPlayedSyncResult:
+        """
+        Syncs the user's MOST_PLAYED section of the profile into the 'user_most_played' table.
+
+        Delta sync (the default one If the user has entries already) inserts new and updates changed entries only.
+        Pages are ordered by playcount, so it stops at the first page that is already known and unchanged,
+        when the amount of known entries reached the user's 'beatmap_playcounts_count'.
+        Playcount changes deeper in the list than that page are missed, so the sync is a full one anyway
+        If the last full sync is older than 'MOST_PLAYED_FULL_SYNC_INTERVAL_SEC'.
+        """
+        if not full:
+            full_synced_at = await self.db_manager.user_most_played.get_full_synced_at(osu_user_id)
+            full = full_synced_at is None or time.time() - full_synced_at > self.MOST_PLAYED_FULL_SYNC_INTERVAL_SEC
+        known_playcounts = {} if full else await self.db_manager.user_most_played.get_user_playcounts(osu_user_id)
+        remote_total = None
+        if known_playcounts:
+            user = await self.osu_api_utils.get_user(osu_user_id, refresh=True)
+            remote_total = user.beatmap_playcounts_count if user else None
+
+        res = MostPlayedSyncResult(is_full=full)
+        pages = self.osu_api_utils.iter_user_beatmap_playcounts(osu_user_id, refresh=True)
+        async with aclosing(pages):
+            async for beatmap_playcount_list in pages:
+                res.pages_fetched += 1
+                is_page_changed = False
+                for beatmap_playcount in beatmap_playcount_list:
+                    known_count = known_playcounts.get(beatmap_playcount.beatmap_id)
+                    if known_count is None:
+                        res.new_playcounts.append(beatmap_playcount)
+                        is_page_changed = True
+                    elif known_count != beatmap_playcount.count:
+                        res.changed_playcounts.append(beatmap_playcount)
+                        is_page_changed = True
+
+                if (known_playcounts and not is_page_changed and remote_total is not None
+                        and len(known_playcounts) + len(res.new_playcounts) >= remote_total):
+                    res.stopped_early = True
+                    break
+
+        entries = [DbUserMostPlayedInfo.from_beatmap_playcount(beatmap_playcount, osu_user_id)
+                   for beatmap_playcount in res.new_playcounts + res.changed_playcounts]
+        if known_playcounts:
+            await self.db_manager.user_most_played.upsert_user_most_played(
+                osu_user_id, entries, entries_count=len(known_playcounts) + len(res.new_playcounts))
+        else:
+            await self.db_manager.user_most_played.replace_user_most_played(osu_user_id, entries)
         return res
+
+    async def sync_user_played_beatmaps(self, user_info: DbUserInfo, *, full: bool = False) -> MostPlayedSyncResult:
+        """
+        Syncs the user's MOST_PLAYED section of the profile (see 'sync_user_most_played')
+        and inserts new beatmaps into the 'user_played_beatmaps' table.
+        """
+        res = await self.sync_user_most_played(user_info.osu_user_id, full=full)
+        db_beatmaps = [DbUserPlayedBeatmapInfo.from_beatmap_and_user_info(beatmap_playcount.beatmap(), user_info)
+                       for beatmap_playcount in res.new_playcounts]
+        res.inserted_beatmaps = await self.db_manager.user_played_beatmaps.insert_new_user_beatmaps(db_beatmaps)
+        return res
+
+    async def get_user_beatmap_playcount(self, beatmap_id: int, user_info: DbUserInfo) \
+            -> Optional[DbUserMostPlayedInfo]:
+        """
+        Gets user's playcount on the given beatmap from the 'user_most_played' table.
+        The table is fully synced first If it is older than 'MOST_PLAYED_TTL_SEC'
+        (delta sync misses playcount changes deep in the list),
+        or delta synced If it is older than 'MOST_PLAYED_MISS_TTL_SEC' and the beatmap is not in it
+        (new entries are always found by the delta sync).
+        """
+        osu_user_id = user_info.osu_user_id
+        synced_at = await self.db_manager.user_most_played.get_synced_at(osu_user_id)
+        age_sec = time.time() - synced_at if synced_at is not None else None
+        if age_sec is None or age_sec > self.MOST_PLAYED_TTL_SEC:
+            await self.sync_user_most_played(osu_user_id, full=True)
+            age_sec = 0.0
+
+        beatmap_playcount = await self.db_manager.user_most_played.get_user_beatmap_playcount(osu_user_id, beatmap_id)
+        if beatmap_playcount is None and age_sec > self.MOST_PLAYED_MISS_TTL_SEC:
+            await self.sync_user_most_played(osu_user_id)
+            beatmap_playcount = await self.db_manager.user_most_played.get_user_beatmap_playcount(osu_user_id,
+                                                                                                  beatmap_id)
+        return beatmap_playcount
+
+    async def get_catalog_beatmaps(self, beatmap_ids: Iterable[int]) -> Dict[int, DbBeatmapInfo]:
+        """
+        Gets beatmaps metadata from the local catalog,
+        beatmaps missing in it are fetched in batches (50 per request) first.
+        """
+        beatmap_ids = list(beatmap_ids)
+        missing_ids = await self.db_manager.beatmap_catalog.get_missing_beatmap_ids(beatmap_ids)
+        if missing_ids:
+            # Fetched beatmaps are stored in the catalog by the 'OsuApiUtils' response listener
+            await self.osu_api_utils.get_beatmaps(missing_ids)
+        return await self.db_manager.beatmap_catalog.get_beatmaps(beatmap_ids)
+
+    async def format_catalog_beatmap(self, beatmap_id: int) -> str:
+        """
+        Formats beatmap metadata from the local catalog: 'Artist - Title [Version] (x.xx*)'.
+        """
+        beatmap = (await self.get_catalog_beatmaps([beatmap_id])).get(beatmap_id)
+        if beatmap is None:
+            return "Beatmap not found"
+        beatmapset = (await self.db_manager.beatmap_catalog.get_beatmapsets([beatmap.beatmapset_id])).get(
+            beatmap.beatmapset_id)
+        title = f"{beatmapset.artist} - {beatmapset.title}" if beatmapset else f"Beatmapset {beatmap.beatmapset_id}"
+        return f"{title} [{beatmap.version}] ({beatmap.difficulty_rating:.2f}*)"
@@ -1,10 +1,12 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from data_managers import DataUtils
 
 if TYPE_CHECKING:
     from api_utils.OsuApiUtils import OsuApiUtils
+    from api_utils.OsuUserProfileCache import OsuUserProfileCache
     from db_managers import DbManager
+    from job_managers import ScoreImportJobManager, RecentScoresPoller
 
 
 class UtilsFactory:
@@ -14,14 +16,37 @@ class UtilsFactory:
 
     _db_manager: 'DbManager' = None
     _osu_api_utils: 'OsuApiUtils' = None
+    _score_import_job_manager: 'ScoreImportJobManager' = None
+    _recent_scores_poller: 'RecentScoresPoller' = None
+    _osu_user_profile_cache: 'OsuUserProfileCache' = None
 
     @classmethod
-    async def create_all_instances(cls):
+    async def create_all_instances(cls, *, osu_api_utils: Optional['OsuApiUtils'] = None):
+        """
+        'osu_api_utils' replaces the one made from the credentials (e.g. pointed to the 'mock_osu_api' server).
+        """
         from api_utils.OsuApiUtils import OsuApiUtils
-        cls._osu_api_utils = OsuApiUtils(*DataUtils.load_osu_api_credentials())
+        cls._osu_api_utils = osu_api_utils or OsuApiUtils(*DataUtils.load_osu_api_credentials(),
+                                                           **DataUtils.load_osu_api_rate_settings())
+        await cls._osu_api_utils.initialize()
         from db_managers import DbManager
         cls._db_manager = DbManager()
         await cls._db_manager.initialize_tables()
+        cls._osu_api_utils.add_response_listener(cls._db_manager.beatmap_catalog.catalog_api_response)
+        from api_utils.OsuUserProfileCache import OsuUserProfileCache
+        cls._osu_user_profile_cache = OsuUserProfileCache(cls._osu_api_utils, cls._db_manager.osu_user_profiles)
+        cls._osu_api_utils.add_response_listener(cls._osu_user_profile_cache.on_api_response)
+        from job_managers import ScoreImportJobManager, RecentScoresPoller
+        cls._score_import_job_manager = ScoreImportJobManager(cls._db_manager, cls._osu_api_utils)
+        cls._recent_scores_poller = RecentScoresPoller(cls._db_manager, cls._osu_api_utils)
+
+    @classmethod
+    async def close_all_instances(cls):
+        """
+        Releases resources of the instances (pooled database connections keep the process alive otherwise).
+        """
+        if cls._db_manager:
+            await cls._db_manager.dispose()
 
     @classmethod
     def get_db_manager(cls) -> 'DbManager':
@@ -30,3 +55,15 @@ class UtilsFactory:
     @classmethod
     def get_osu_api_utils(cls) -> 'OsuApiUtils':
         return cls._osu_api_utils
+
+    @classmethod
+    def get_score_import_job_manager(cls) -> 'ScoreImportJobManager':
+        return cls._score_import_job_manager
+
+    @classmethod
+    def get_recent_scores_poller(cls) -> 'RecentScoresPoller':
+        return cls._recent_scores_poller
+
+    @classmethod
+    def get_osu_user_profile_cache(cls) -> 'OsuUserProfileCache':
+        return cls._osu_user_profile_cache
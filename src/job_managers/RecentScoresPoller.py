@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from ossapi import Score
+
+import my_logging.get_loggers
+from api_utils import RequestPriority, request_priority
+from db_managers.data_classes import DbScoreInfo, DbUserInfo
+
+if TYPE_CHECKING:
+    from api_utils.OsuApiUtils import OsuApiUtils
+    from db_managers import DbManager
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+
+class RecentScoresPoller:
+    """
+    Class to keep the 'scores' database table fresh without reloading all user's scores.
+
+    Every 'POLL_INTERVAL_SEC' recent passed scores of every user having scores are fetched
+    (at most 'MAX_REQUESTS_PER_USER' requests per user) and the ones improving the stored best score
+    on the beatmap are upserted.
+    """
+
+    POLL_INTERVAL_SEC = 60 * 30
+    PAGE_LIMIT = 50
+    MAX_REQUESTS_PER_USER = 2
+
+    def __init__(self, db_manager: 'DbManager', osu_api_utils: 'OsuApiUtils'):
+        self.db_manager = db_manager
+        self.osu_api_utils = osu_api_utils
+        self.task: Optional[asyncio.Task] = None
+        self.last_poll_stats: Dict[str, float] = {}
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._poll_forever())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _poll_forever(self):
+        while True:
+            try:
+                await self.poll_all_users()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Recent scores poll failed: {e}")
+            await asyncio.sleep(self.POLL_INTERVAL_SEC)
+
+    async def poll_all_users(self) -> int:
+        """
+        Polls every user with scores in the database once.
+        Returns the amount of upserted scores.
+        """
+        start_time = time.perf_counter()
+        users_polled = 0
+        res = 0
+        for user_info in await self.db_manager.users.get_all_users_info():
+            if not await self.db_manager.scores.check_if_user_has_scores(user_info):
+                continue
+            try:
+                res += await self.poll_user(user_info)
+            except asyncio.CancelledError:
+                raise
+            except ValueError:  # User does not exist anymore
+                continue
+            except Exception as e:
+                # Network errors, exhausted retries, open circuit breaker... the rest of the users are still polled
+                logger.exception(f"Recent scores poll of the user {user_info.discord_user_id} failed: {e}")
+                continue
+            users_polled += 1
+        self.last_poll_stats = {'polled_at': time.time(),
+                                'users_polled': users_polled,
+                                'upserted_scores': res,
+                                'elapsed_sec': time.perf_counter() - start_time}
+        logger.info(f"Recent scores poll: {self.last_poll_stats}")
+        return res
+
+    async def poll_user(self, user_info: DbUserInfo) -> int:
+        """
+        Upserts user's recent scores which are better than the stored best ones.
+        Returns the amount of upserted scores.
+        """
+        last_score_at = await self.db_manager.scores.get_last_polled_score_at(user_info)
+        new_scores = await self._fetch_new_scores(user_info, last_score_at)
+        if not new_scores:
+            return 0
+
+        # Newest first, so the first score of the beatmap is the latest one
+        candidates: Dict[int, Score] = {}
+        for score in new_scores:
+            # 'best_id' is set only for the scores which became the best ones (at the moment of submission)
+            if score.best_id is None or score.beatmap is None:
+                continue
+            beatmap_id = score.beatmap.id
+            if beatmap_id not in candidates or score.score > candidates[beatmap_id].score:
+                candidates[beatmap_id] = score
+
+        stored_best_scores = await self.db_manager.scores.get_user_best_scores(user_info, candidates.keys())
+        improved_scores: List[DbScoreInfo] = []
+        for beatmap_id, score in candidates.items():
+            stored_best = stored_best_scores.get(beatmap_id)
+            if stored_best is not None and (stored_best.total_score or 0) >= score.score:
+                continue
+            score_info = DbScoreInfo.from_score_and_user_info(score, user_info, is_best=True, beatmap_id=beatmap_id)
+            # Stored scores are identified by the best score id ('beatmap_user_score' endpoint returns that one)
+            score_info.osu_score_id = score.best_id
+            improved_scores.append(score_info)
+        res = await self.db_manager.scores.upsert_scores(improved_scores)
+
+        await self.db_manager.scores.set_last_polled_score_at(user_info, new_scores[0].created_at.timestamp())
+        return res
+
+    async def _fetch_new_scores(self, user_info: DbUserInfo, last_score_at: Optional[float]) -> List[Score]:
+        """
+        Returns user's recent scores newer than 'last_score_at' (newest first).
+        """
+        res = []
+        with request_priority(RequestPriority.BACKGROUND):
+            for page in range(self.MAX_REQUESTS_PER_USER):
+                scores = await self.osu_api_utils.get_user_recent_scores(user_info, limit=self.PAGE_LIMIT,
+                                                                         offset=page * self.PAGE_LIMIT)
+                new_scores = [score for score in scores
+                              if last_score_at is None or score.created_at.timestamp() > last_score_at]
+                res += new_scores
+                if len(scores) < self.PAGE_LIMIT or len(new_scores) < len(scores):
+                    break
+        return res
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Callable, Awaitable, TYPE_CHECKING
+
+import my_logging.get_loggers
+from api_utils.FairShareScheduler import ApiJob
+from db_managers.data_classes import DbScoreImportJobInfo, DbScoreInfo, DbUserInfo
+
+if TYPE_CHECKING:
+    from api_utils.OsuApiUtils import OsuApiUtils
+    from db_managers import DbManager
+
+logger = my_logging.get_loggers.database_utilities_logger()
+
+# Called with the job and its 'fair_share' job every 'PROGRESS_EVERY' beatmaps
+ProgressCallback = Callable[[DbScoreImportJobInfo, ApiJob], Awaitable[None]]
+
+
+class ScoreImportJobManager:
+    """
+    Class to run score import jobs persisted in the 'score_import_jobs' database table.
+
+    Every beatmap is committed together with the job cursor,
+    so the interrupted job continues from the first not processed beatmap and no request is spent twice.
+    Jobs which were 'running' when the bot stopped are resumed by 'resume_interrupted_jobs'.
+    """
+
+    PROGRESS_EVERY = 100
+
+    def __init__(self, db_manager: 'DbManager', osu_api_utils: 'OsuApiUtils'):
+        self.db_manager = db_manager
+        self.osu_api_utils = osu_api_utils
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def is_running(self, job_id: int) -> bool:
+        task = self.tasks.get(job_id)
+        return task is not None and not task.done()
+
+    async def create_job(self, user_info: DbUserInfo, beatmap_ids: List[int], *, all_scores: bool,
+                         channel_id: Optional[int]) -> DbScoreImportJobInfo:
+        job_info = DbScoreImportJobInfo.new_job(user_info, len(beatmap_ids), all_scores=all_scores,
+                                                channel_id=channel_id)
+        return await self.db_manager.score_import_jobs.create_job(job_info, beatmap_ids)
+
+    async def start_job(self, job_info: DbScoreImportJobInfo,
+                        progress_callback: Optional[ProgressCallback] = None) -> asyncio.Task:
+        """
+        Marks the job as running and starts processing its remaining beatmaps.
+        Returns the task resulting with the job (or the already running one).
+        """
+        if self.is_running(job_info.id):
+            return self.tasks[job_info.id]
+        if job_info.status != 'running':
+            await self.db_manager.score_import_jobs.set_status(job_info.id, 'running')
+            job_info.status = 'running'
+        task = asyncio.create_task(self._run_job(job_info, progress_callback))
+        self.tasks[job_info.id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(job_info.id, None))
+        return task
+
+    async def pause_job(self, job_id: int):
+        """
+        Stops the job keeping its progress, it is not resumed on startup.
+        """
+        await self.db_manager.score_import_jobs.set_status(job_id, 'paused')
+        await self._cancel_task(job_id)
+
+    async def cancel_job(self, job_id: int):
+        """
+        Stops the job for good, scores inserted so far are kept.
+        """
+        await self.db_manager.score_import_jobs.set_status(job_id, 'cancelled')
+        await self._cancel_task(job_id)
+        await self.db_manager.score_import_jobs.delete_job_beatmaps(job_id)
+
+    async def resume_interrupted_jobs(self, progress_callback_factory: Callable[[DbScoreImportJobInfo],
+                                      Optional[ProgressCallback]] = lambda _: None) \
+            -> Dict[int, asyncio.Task]:
+        """
+        Starts all jobs left 'running' (the bot was stopped in the middle of them).
+        Returns job id -> task of every resumed job.
+        """
+        res = {}
+        for job_info in await self.db_manager.score_import_jobs.get_jobs_by_status('running'):
+            if self.is_running(job_info.id):
+                continue
+            logger.info(f"Resuming score import job {job_info.id} "
+                        f"({job_info.cursor}/{job_info.total_beatmaps} beatmaps done)")
+            res[job_info.id] = await self.start_job(job_info, progress_callback_factory(job_info))
+        return res
+
+    async def _cancel_task(self, job_id: int):
+        task = self.tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run_job(self, job_info: DbScoreImportJobInfo,
+                       progress_callback: Optional[ProgressCallback]) -> DbScoreImportJobInfo:
+        """
+        Processes remaining beatmaps of the job.
+        Cancellation leaves the job status untouched ('pause_job' and 'cancel_job' set it themselves),
+        so the job cancelled by the bot shutdown stays 'running' and is resumed on the next startup.
+        """
+        pending_beatmaps = await self.db_manager.score_import_jobs.get_pending_beatmaps(job_info)
+        user_info = job_info.user_info()
+        start_time = time.perf_counter()
+        try:
+            with self.osu_api_utils.fair_share.job('load_all_user_scores', job_info.user_info_id,
+                                                   total_requests=len(pending_beatmaps)) as api_job:
+                for ind, (position, beatmap_id) in enumerate(pending_beatmaps):
+                    if progress_callback is not None and ind % self.PROGRESS_EVERY == 0:
+                        await progress_callback(job_info, api_job)
+                    scores_info = await self.get_beatmap_scores_info(beatmap_id, user_info,
+                                                                     all_scores=job_info.all_scores)
+                    await self.db_manager.score_import_jobs.complete_beatmap(job_info, position, beatmap_id,
+                                                                             scores_info)
+        except Exception:
+            # Not resumed automatically, the user continues it with the command
+            logger.exception(f"Score import job {job_info.id} failed at beatmap {job_info.cursor}")
+            await self.db_manager.score_import_jobs.set_status(job_info.id, 'paused')
+            job_info.status = 'paused'
+            raise
+
+        await self.db_manager.score_import_jobs.set_status(job_info.id, 'done')
+        await self.db_manager.score_import_jobs.delete_job_beatmaps(job_info.id)
+        job_info.status = 'done'
+        logger.info(f"Score import job {job_info.id} is done in {time.perf_counter() - start_time:.6f} seconds, "
+                    f"inserted {job_info.inserted_scores} scores")
+        return job_info
+
+    async def get_beatmap_scores_info(self, beatmap_id: int, user_info: DbUserInfo, *, all_scores: bool) \
+            -> List[DbScoreInfo]:
+        if not all_scores:
+            score = await self.osu_api_utils.get_beatmap_user_best_score(beatmap_id, user_info)
+            if score is None:
+                return []
+            return [DbScoreInfo.from_score_and_user_info(score, user_info, is_best=True, beatmap_id=beatmap_id)]
+
+        scores = await self.osu_api_utils.get_beatmap_user_scores(beatmap_id, user_info)
+        if not scores:
+            return []
+        # Same order as the best score of the 'beatmap_user_score' endpoint
+        best_score = max(scores, key=lambda score: (score.score, -score.id))
+        return [DbScoreInfo.from_score_and_user_info(score, user_info, is_best=score is best_score,
+                                                     beatmap_id=beatmap_id)
+                for score in scores]
@@ -0,0 +1,2 @@
+from .ScoreImportJobManager import ScoreImportJobManager
+from .RecentScoresPoller import RecentScoresPoller
@@ -0,0 +1,175 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Iterable, Optional, Deque
+
+from aiohttp import web
+
+from .synthetic_data import SyntheticOsuWorld
+
+
+class MockOsuApiServer:
+    """
+    Class to run local stand-in of the osu! api v2 (aiohttp web server).
+
+    Responses are preceded by 'scripted_statuses' (e.g. '[200, 429, 429, 503]'), after them
+    the server enforces 'rate_limit_per_minute' on its own (sliding window, 429 with 'Retry-After')
+    and sends 'X-RateLimit-Limit' / 'X-RateLimit-Remaining' headers like osu! does.
+    Besides that 'error_rate' part of the requests fail with HTTP 500 / 503.
+
+    Served data (users, MOST_PLAYED pages, beatmaps, beatmapset search pages, beatmap user scores)
+    comes from the 'world' ('SyntheticOsuWorld').
+    Every response takes 'latency_sec' plus up to 'latency_jitter_sec'.
+    """
+
+    def __init__(self, *, scripted_statuses: Iterable[int] = (), rate_limit_per_minute: Optional[int] = None,
+                 latency_sec: float = 0.0, latency_jitter_sec: float = 0.0, error_rate: float = 0.0,
+                 retry_after_sec: Optional[float] = None, world: Optional[SyntheticOsuWorld] = None,
+                 seed: int = 0, host: str = '127.0.0.1', port: int = 0):
+        self.scripted_statuses: Deque[int] = deque(scripted_statuses)
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.latency_sec = latency_sec
+        self.latency_jitter_sec = latency_jitter_sec
+        self.error_rate = error_rate
+        self.retry_after_sec = retry_after_sec
+        self.world = world if world is not None else SyntheticOsuWorld(seed=seed)
+        self._rng = random.Random(seed)
+        self.host = host
+        self.port = port
+
+        self.requests_served: int = 0
+        self.status_counts: dict = {}
+        self._request_times: Deque[float] = deque()
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application(middlewares=[self._rate_limit_middleware])
+        self.endpoint_counts: dict = {}
+        routes = [
+            ('/api/v2/users/{user_id}/beatmapsets/most_played', self._most_played),
+            ('/api/v2/users/{user_id}/scores/recent', self._recent_scores),
+            ('/api/v2/users/{user_id}/{mode}', self._user),
+            ('/api/v2/users/{user_id}/', self._user),
+            ('/api/v2/beatmaps', self._beatmaps),
+            ('/api/v2/beatmaps/{beatmap_id}/scores/users/{user_id}/all', self._beatmap_user_scores),
+            ('/api/v2/beatmaps/{beatmap_id}/scores/users/{user_id}', self._beatmap_user_score),
+            ('/api/v2/beatmapsets/search/', self._search_beatmapsets),
+        ]
+        for path, handler in routes:
+            self.app.router.add_get(path, handler)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}/api/v2'
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'MockOsuApiServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def _remaining(self, current_time: float) -> Optional[int]:
+        if self.rate_limit_per_minute is None:
+            return None
+        while self._request_times and self._request_times[0] <= current_time - 60:
+            self._request_times.popleft()
+        return self.rate_limit_per_minute - len(self._request_times)
+
+    @web.middleware
+    async def _rate_limit_middleware(self, request: web.Request, handler):
+        latency_sec = self.latency_sec + self._rng.uniform(0, self.latency_jitter_sec)
+        if latency_sec:
+            await asyncio.sleep(latency_sec)
+        current_time = time.monotonic()
+        remaining = self._remaining(current_time)
+
+        if self.scripted_statuses:
+            status = self.scripted_statuses.popleft()
+        elif self.error_rate and self._rng.random() < self.error_rate:
+            status = self._rng.choice((500, 503))
+        else:
+            status = 200
+        retry_after = self.retry_after_sec
+        if status == 200 and remaining is not None and remaining <= 0:
+            status = 429
+            if retry_after is None:
+                retry_after = max(0.0, self._request_times[0] + 60 - current_time)
+
+        headers = {}
+        if remaining is not None:
+            headers['X-RateLimit-Limit'] = str(self.rate_limit_per_minute)
+        if status == 200:
+            if remaining is not None:
+                self._request_times.append(current_time)
+                headers['X-RateLimit-Remaining'] = str(remaining - 1)
+            response = await handler(request)
+        else:
+            if remaining is not None:
+                headers['X-RateLimit-Remaining'] = str(max(remaining, 0))
+            if status == 429 and retry_after is not None:
+                headers['Retry-After'] = str(round(retry_after, 3))
+            response = web.Response(status=status, text='Too Many Attempts.' if status == 429 else 'Error')
+
+        response.headers.update(headers)
+        self.requests_served += 1
+        handler_name = getattr(request.match_info.handler, '__name__', '_unknown').lstrip('_')
+        self.endpoint_counts[handler_name] = self.endpoint_counts.get(handler_name, 0) + 1
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        return response
+
+    @staticmethod
+    def _not_found() -> web.Response:
+        # 'ossapi' raises 'ValueError' on the json with 'error'
+        return web.json_response({'error': None}, status=404)
+
+    async def _user(self, request: web.Request) -> web.Response:
+        user_id = request.match_info['user_id']
+        if not user_id.isdigit():
+            return self._not_found()
+        return web.json_response(self.world.user(int(user_id)))
+
+    async def _most_played(self, request: web.Request) -> web.Response:
+        return web.json_response(self.world.most_played_page(int(request.match_info['user_id']),
+                                                             limit=int(request.query.get('limit', 100)),
+                                                             offset=int(request.query.get('offset', 0))))
+
+    async def _recent_scores(self, request: web.Request) -> web.Response:
+        return web.json_response(self.world.user_recent_scores(int(request.match_info['user_id']),
+                                                               limit=int(request.query.get('limit', 100)),
+                                                               offset=int(request.query.get('offset', 0))))
+
+    async def _beatmaps(self, request: web.Request) -> web.Response:
+        beatmap_ids = [int(beatmap_id) for beatmap_id in request.query.getall('ids[]', [])]
+        return web.json_response({'beatmaps': [self.world.beatmap(beatmap_id) for beatmap_id in beatmap_ids
+                                               if self.world.exists(beatmap_id)]})
+
+    async def _beatmap_user_score(self, request: web.Request) -> web.Response:
+        score = self.world.user_beatmap_best_score(int(request.match_info['beatmap_id']),
+                                                   int(request.match_info['user_id']))
+        if score is None:
+            return self._not_found()
+        return web.json_response({'position': 1, 'score': score})
+
+    async def _beatmap_user_scores(self, request: web.Request) -> web.Response:
+        scores = self.world.user_beatmap_scores(int(request.match_info['beatmap_id']),
+                                                int(request.match_info['user_id']))
+        for score in scores:
+            # Not included by this endpoint
+            del score['beatmap'], score['beatmapset']
+        return web.json_response({'scores': scores})
+
+    async def _search_beatmapsets(self, request: web.Request) -> web.Response:
+        return web.json_response(self.world.search_page(page=int(request.query.get('cursor[page]', 1))))
@@ -0,0 +1,2 @@
+from .MockOsuApiServer import MockOsuApiServer
+from .synthetic_data import SyntheticOsuWorld
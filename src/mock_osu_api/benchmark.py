@@ -0,0 +1,142 @@
+"""
+End-to-end throughput benchmark against 'MockOsuApiServer':
+MOST_PLAYED sync, full scores import and beatmapsets grade stats for several users at once.
+Reports requests/s, database rows/s and peak memory of every phase.
+
+Usage (from the 'src' directory):
+    python -m mock_osu_api.benchmark [--users 3] [--most-played 300] [--beatmaps 1000] [--rate 200]
+                                     [--latency-ms 5] [--error-rate 0.01] [--all-scores]
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import resource
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from ossapi import GameMode
+
+from core import PathManager
+
+
+class PhaseReport:
+    """
+    Class to measure one benchmark phase.
+    """
+
+    def __init__(self, name: str, server, table: str):
+        self.name = name
+        self.server = server
+        self.table = table
+
+    def __enter__(self) -> 'PhaseReport':
+        tracemalloc.reset_peak()
+        self.start_requests = self.server.requests_served
+        self.start_rows = _count_rows(self.table)
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start_time
+        requests = self.server.requests_served - self.start_requests
+        rows = _count_rows(self.table) - self.start_rows
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        print(f"{self.name:<18} {elapsed:8.2f}s {requests:7} requests {requests / elapsed:8.1f} requests/s "
+              f"{rows:7} {self.table} rows {rows / elapsed:9.1f} rows/s  peak {peak_mb:7.1f} MB")
+
+
+def _count_rows(table: str) -> int:
+    with sqlite3.connect(PathManager.BOT_DATA_DB) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+async def run(args: argparse.Namespace):
+    from api_utils.OsuApiUtils import OsuApiUtils
+    from core import BotContext
+    from db_managers.data_classes import DbUserInfo
+    from discord_bot_stuff.extras import DbExtras
+    from factories import UtilsFactory
+    from mock_osu_api import MockOsuApiServer, SyntheticOsuWorld
+    from statistics_managers import BeatmapsUserGradesStatsManager
+
+    world = SyntheticOsuWorld(beatmaps_count=args.beatmaps, most_played_count=args.most_played)
+    async with MockOsuApiServer(world=world, latency_sec=args.latency_ms / 1000,
+                                latency_jitter_sec=args.latency_ms / 1000, error_rate=args.error_rate) as server:
+        osu_api_utils = OsuApiUtils(0, '', adaptive_rate=False, access_token='mock', base_url=server.base_url)
+        osu_api_utils.rate_limiter.set_tokens_per_second(args.rate)
+        await UtilsFactory.create_all_instances(osu_api_utils=osu_api_utils)
+        db_manager = UtilsFactory.get_db_manager()
+        db_extras = DbExtras(BotContext(None))
+        job_manager = UtilsFactory.get_score_import_job_manager()
+
+        users: List[DbUserInfo] = [DbUserInfo.from_args(discord_user_id, 1000 + discord_user_id, GameMode.OSU)
+                                   for discord_user_id in range(1, args.users + 1)]
+        for user_info in users:
+            await db_manager.users.merge_user_info(user_info)
+
+        print(f"Mock server: {server.base_url}, {args.users} users, {world.beatmaps_count} beatmaps, "
+              f"{world.most_played_count} played by every user, limiter rate {args.rate} requests/s")
+        tracemalloc.start()
+        start_time = time.perf_counter()
+
+        with PhaseReport('most_played_sync', server, 'user_played_beatmaps'):
+            await asyncio.gather(*(db_extras.sync_user_played_beatmaps(user_info, full=True) for user_info in users))
+
+        async def import_scores(user_info: DbUserInfo):
+            beatmap_ids = await db_manager.user_played_beatmaps.get_all_user_beatmap_ids(user_info)
+            job_info = await job_manager.create_job(user_info, beatmap_ids, all_scores=args.all_scores,
+                                                    channel_id=None)
+            return await (await job_manager.start_job(job_info))
+
+        with PhaseReport('scores_import', server, 'scores'):
+            await asyncio.gather(*(import_scores(user_info) for user_info in users), return_exceptions=True)
+
+        async def beatmapsets_stats(user_info: DbUserInfo):
+            async def iter_beatmap_ids():
+                async for search_page in osu_api_utils.iter_search_beatmapsets(None, mode=user_info.osu_game_mode):
+                    for beatmapset in search_page.beatmapsets:
+                        for beatmap in beatmapset.beatmaps:
+                            yield beatmap.id
+
+            stats = BeatmapsUserGradesStatsManager(iter_beatmap_ids(), user_info, query_dict={})
+            await stats.calculate_user_grades()
+
+        with PhaseReport('beatmapsets_stats', server, 'beatmaps'):
+            await asyncio.gather(*(beatmapsets_stats(user_info) for user_info in users), return_exceptions=True)
+
+        elapsed = time.perf_counter() - start_time
+        tracemalloc.stop()
+        print(f"Total: {elapsed:.2f}s, {server.requests_served} requests "
+              f"({server.requests_served / elapsed:.1f} requests/s), "
+              f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+        print(f"Server statuses: {server.status_counts}")
+        print(f"Server endpoints: {server.endpoint_counts}")
+        print(osu_api_utils.metrics.format_summary())
+        await UtilsFactory.close_all_instances()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--most-played', type=int, default=300)
+    parser.add_argument('--beatmaps', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=200.0, help="Rate limiter requests per second")
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--all-scores', action='store_true')
+    args = parser.parse_args()
+
+    # Mock server is plain http
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+    PathManager.set_project_root(pathlib.Path(tempfile.mkdtemp()))
+    os.makedirs(PathManager.DATA_DIR, exist_ok=True)
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Drives 'OsuApiUtils' adaptive rate control against 'MockOsuApiServer'.
+
+Usage (from the 'src' directory):
+    python -m mock_osu_api.check_adaptive_rate [--requests 300] [--limit-per-minute 180]
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import tempfile
+import time
+
+from core import PathManager
+
+
+async def run(requests_count: int, limit_per_minute: int, scripted_429s: int):
+    from api_utils.OsuApiUtils import OsuApiUtils
+    from mock_osu_api import MockOsuApiServer
+
+    async with MockOsuApiServer(scripted_statuses=[429] * scripted_429s, retry_after_sec=1.0,
+                                rate_limit_per_minute=limit_per_minute) as server:
+        osu_api_utils = OsuApiUtils(0, '', adaptive_rate=True, max_rate=10.0, access_token='mock',
+                                    base_url=server.base_url)
+        await osu_api_utils.initialize()
+        osu_api_utils.rate_controller.increase_interval_sec = 1.0
+        osu_api_utils.rate_controller.additive_increase = 0.5
+
+        async def report():
+            while True:
+                await asyncio.sleep(2)
+                print(f"{time.monotonic() - start_time:6.1f}s {osu_api_utils.get_rate_stats()}")
+
+        start_time = time.monotonic()
+        report_task = asyncio.create_task(report())
+        results = await asyncio.gather(*(osu_api_utils.get_user(user_id) for user_id in range(1, requests_count + 1)),
+                                       return_exceptions=True)
+        report_task.cancel()
+
+        errors = [res for res in results if isinstance(res, Exception)]
+        elapsed = time.monotonic() - start_time
+        print(f"Done {requests_count} requests in {elapsed:.1f}s ({requests_count / elapsed:.2f} requests/s), "
+              f"errors: {len(errors)}")
+        print(f"Server statuses: {server.status_counts}")
+        print(f"Final: {osu_api_utils.get_rate_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--limit-per-minute', type=int, default=180)
+    parser.add_argument('--scripted-429s', type=int, default=3)
+    args = parser.parse_args()
+
+    # Mock server is plain http
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+    PathManager.set_project_root(pathlib.Path(tempfile.mkdtemp()))
+    os.makedirs(PathManager.DATA_DIR, exist_ok=True)
+
+    asyncio.run(run(args.requests, args.limit_per_minute, args.scripted_429s))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Read latency benchmark of 'DbManager' while a bulk scores import (of the synthetic scores) is writing.
+Runs the same workload with the default SQLite settings (rollback journal, one engine)
+and with the 'DbManager.SQLITE_PRAGMAS' profile (WAL, separate read engine).
+
+Usage (from the 'src' directory):
+    python -m mock_osu_api.db_benchmark [--users 3] [--beatmaps 1000] [--readers 4]
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import statistics
+import tempfile
+import time
+from typing import List
+
+from ossapi import GameMode, Mod
+
+from core import PathManager
+
+
+def _make_scores(world, user_info, beatmap_id: int) -> list:
+    from db_managers.ScoreDataCodec import ScoreDataCodec
+    from db_managers.data_classes import DbScoreInfo
+
+    best_score = world.user_beatmap_best_score(beatmap_id, user_info.osu_user_id)
+    return [DbScoreInfo(id=None,
+                        user_info_id=user_info.discord_user_id,
+                        score_data=ScoreDataCodec.encode(json.dumps(score)),
+                        mods=Mod(score['mods']),
+                        _mods=int(Mod(score['mods']).value),
+                        mode=GameMode.OSU,
+                        _mode=str(GameMode.OSU.value),
+                        beatmap_id=beatmap_id,
+                        timestamp=None,
+                        osu_score_id=score['id'],
+                        is_best=score['id'] == best_score['id'])
+            for score in world.user_beatmap_scores(beatmap_id, user_info.osu_user_id)]
+
+
+async def run_profile(db_manager, args: argparse.Namespace) -> dict:
+    from db_managers.data_classes import DbUserInfo
+    from mock_osu_api import SyntheticOsuWorld
+
+    world = SyntheticOsuWorld(beatmaps_count=args.beatmaps)
+    await db_manager.initialize_tables()
+    users = [DbUserInfo.from_args(discord_user_id, 1000 + discord_user_id, GameMode.OSU)
+             for discord_user_id in range(1, args.users + 1)]
+    for user_info in users:
+        await db_manager.users.merge_user_info(user_info)
+
+    # Generated upfront so that the writer is bound by the database only
+    user_scores = {user_info.discord_user_id: [_make_scores(world, user_info, beatmap_id)
+                                               for beatmap_id in range(1, args.beatmaps + 1)]
+                   for user_info in users}
+
+    latencies: List[float] = []
+    written_scores = 0
+    writing = True
+
+    async def import_scores(user_info: DbUserInfo):
+        # Like the score import job: one transaction per beatmap
+        nonlocal written_scores
+        for scores_info in user_scores[user_info.discord_user_id]:
+            if scores_info:
+                written_scores += await db_manager.scores.upsert_scores(scores_info)
+
+    async def read_loop(reader_id: int):
+        # What every scores command does: the predicates and '^count_scores'
+        user_info = users[reader_id % len(users)]
+        while writing:
+            start_time = time.perf_counter()
+            await db_manager.users.get_user_info(user_info.discord_user_id)
+            await db_manager.scores.count_all_user_scores(user_info)
+            latencies.append(time.perf_counter() - start_time)
+            await asyncio.sleep(0.01)
+
+    start_time = time.perf_counter()
+    readers = [asyncio.create_task(read_loop(reader_id)) for reader_id in range(args.readers)]
+    await asyncio.gather(*(import_scores(user_info) for user_info in users))
+    elapsed = time.perf_counter() - start_time
+    writing = False
+    await asyncio.gather(*readers)
+    pragmas = await db_manager.get_pragmas()
+    await db_manager.dispose()
+
+    latencies.sort()
+    return {
+        'journal_mode': pragmas['journal_mode'],
+        'elapsed_sec': elapsed,
+        'scores_per_sec': written_scores / elapsed,
+        'reads': len(latencies),
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+
+async def run(args: argparse.Namespace):
+    from db_managers import DbManager
+
+    class DefaultSettingsDbManager(DbManager):
+        """
+        'DbManager' with the SQLite defaults and all queries on the writer engine.
+        """
+
+        SQLITE_PRAGMAS = {'journal_mode': 'DELETE'}
+
+        def __init__(self, db_name):
+            super().__init__(db_name)
+            for table_manager in (self.users, self.scores):
+                table_manager.ReadAsyncSession = self.async_session
+
+    for name, db_manager_cls in (('default', DefaultSettingsDbManager), ('tuned', DbManager)):
+        db_manager = db_manager_cls(pathlib.Path(tempfile.mkdtemp()) / 'bot_data.db')
+        res = await run_profile(db_manager, args)
+        print(f"{name:<8} {res['journal_mode']:<7} write {res['elapsed_sec']:7.2f}s {res['scores_per_sec']:8.1f} "
+              f"scores/s | {res['reads']:6} reads  p50 {res['p50_ms']:7.2f} ms  p95 {res['p95_ms']:7.2f} ms  "
+              f"p99 {res['p99_ms']:7.2f} ms  max {res['max_ms']:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--beatmaps', type=int, default=1000)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    PathManager.set_project_root(pathlib.Path(tempfile.mkdtemp()))
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+'scores.score_data' storage benchmark on the synthetic scores:
+database size and decode throughput of the plain JSON, zlib and 'ScoreDataCodec' formats.
+
+Usage (from the 'src' directory):
+    python -m mock_osu_api.score_data_benchmark [--users 3] [--beatmaps 2000]
+"""
+import argparse
+import json
+import os
+import pathlib
+import sqlite3
+import tempfile
+import time
+import zlib
+from typing import Callable, List
+
+from core import PathManager
+
+
+def _make_score_json_data(users: int, beatmaps: int) -> List[str]:
+    from ossapi import Score, serialize_model
+
+    from api_utils.OsuApiUtils import OsuApiUtils
+    from mock_osu_api import SyntheticOsuWorld
+
+    world = SyntheticOsuWorld(beatmaps_count=beatmaps)
+    osu_api_utils = OsuApiUtils(0, '', access_token='mock')
+    res = []
+    for user_id in range(1001, 1001 + users):
+        for beatmap_id in range(1, beatmaps + 1):
+            for score in world.user_beatmap_scores(beatmap_id, user_id):
+                # Stored the same way as the imported scores
+                res.append(serialize_model(osu_api_utils.ossapi._instantiate_type(Score, score)))
+    return res
+
+
+def run_format(name: str, scores: List[str], encode: Callable[[str], bytes | str],
+               decode: Callable[[bytes | str], str]):
+    db_path = pathlib.Path(tempfile.mkdtemp()) / f'{name}.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, score_data BLOB)")
+        start_time = time.perf_counter()
+        conn.executemany("INSERT INTO scores (score_data) VALUES (?)", ((encode(score),) for score in scores))
+        encode_sec = time.perf_counter() - start_time
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("VACUUM")
+        start_time = time.perf_counter()
+        for (score_data,) in conn.execute("SELECT score_data FROM scores"):
+            json.loads(decode(score_data))
+        decode_sec = time.perf_counter() - start_time
+    size_mb = os.path.getsize(db_path) / 1024 ** 2
+    print(f"{name:<12} db {size_mb:8.2f} MB ({size_mb * 1024 ** 2 / len(scores):7.1f} B/score)  "
+          f"write {len(scores) / encode_sec:9.0f} scores/s  read + json.loads {len(scores) / decode_sec:9.0f} scores/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--beatmaps', type=int, default=2000)
+    args = parser.parse_args()
+
+    PathManager.set_project_root(pathlib.Path(tempfile.mkdtemp()))
+    from db_managers.ScoreDataCodec import ScoreDataCodec
+
+    scores = _make_score_json_data(args.users, args.beatmaps)
+    print(f"{len(scores)} scores, {sum(map(len, scores)) / len(scores):.0f} B of JSON per score")
+    run_format('json', scores, lambda score: score, lambda score_data: score_data)
+    run_format('zlib', scores, lambda score: zlib.compress(score.encode()),
+               lambda score_data: zlib.decompress(score_data).decode())
+    run_format('codec', scores, ScoreDataCodec.encode, ScoreDataCodec.decode)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+import random
+from typing import List, Optional
+
+_DATETIME = '2023-01-01T00:00:00+00:00'
+_SCORE_MODS = [[], ['HD'], ['HR'], ['HD', 'HR'], ['DT'], ['HD', 'DT'], ['FL']]
+_GRADES = ['XH', 'X', 'SH', 'S', 'A', 'B', 'C', 'D']
+
+
+def make_user(user_id: int, *, beatmap_playcounts_count: int = 0) -> dict:
+    """
+    Synthetic osu! api v2 'User' json.
+    """
+    return {
+        **_user_compact(user_id),
+        'comments_count': 0,
+        'cover_url': '',
+        'discord': None,
+        'has_supported': False,
+        'interests': None,
+        'join_date': '2020-01-01T00:00:00+00:00',
+        'kudosu': {'total': 0, 'available': 0},
+        'location': None,
+        'max_blocks': 50,
+        'max_friends': 250,
+        'occupation': None,
+        'playmode': 'osu',
+        'playstyle': None,
+        'post_count': 0,
+        'profile_order': ['me'],
+        'title': None,
+        'title_url': None,
+        'twitter': None,
+        'website': None,
+        'scores_pinned_count': 0,
+        'nominated_beatmapset_count': 0,
+        'rank_highest': None,
+        'beatmap_playcounts_count': beatmap_playcounts_count,
+    }
+
+
+def _user_compact(user_id: int) -> dict:
+    return {
+        'id': user_id,
+        'username': f'user_{user_id}',
+        'avatar_url': f'https://a.ppy.sh/{user_id}',
+        'country_code': 'XX',
+        'is_active': True,
+        'is_bot': False,
+        'is_deleted': False,
+        'is_online': False,
+        'is_supporter': False,
+        'last_visit': _DATETIME,
+        'pm_friends_only': False,
+        'profile_colour': None,
+    }
+
+
+class SyntheticOsuWorld:
+    """
+    Class to generate consistent synthetic osu! api v2 data.
+
+    Beatmaps have ids '1..beatmaps_count', every beatmapset has 'beatmaps_per_set' of them.
+    Every user played 'most_played_count' beatmaps (picked by the user id seed)
+    and has a score on 'score_ratio' part of them.
+    The same arguments always produce the same data.
+    """
+
+    def __init__(self, *, beatmaps_count: int = 20000, beatmaps_per_set: int = 4, most_played_count: int = 500,
+                 score_ratio: float = 0.8, seed: int = 0):
+        self.beatmaps_count = beatmaps_count
+        self.beatmaps_per_set = beatmaps_per_set
+        self.most_played_count = min(most_played_count, beatmaps_count)
+        self.score_ratio = score_ratio
+        self.seed = seed
+
+    @property
+    def beatmapsets_count(self) -> int:
+        return -(-self.beatmaps_count // self.beatmaps_per_set)
+
+    def beatmapset_id(self, beatmap_id: int) -> int:
+        return (beatmap_id - 1) // self.beatmaps_per_set + 1
+
+    def beatmap_ids_of_set(self, beatmapset_id: int) -> List[int]:
+        first_id = (beatmapset_id - 1) * self.beatmaps_per_set + 1
+        return list(range(first_id, min(first_id + self.beatmaps_per_set, self.beatmaps_count + 1)))
+
+    def exists(self, beatmap_id: int) -> bool:
+        return 1 <= beatmap_id <= self.beatmaps_count
+
+    def user(self, user_id: int) -> dict:
+        return make_user(user_id, beatmap_playcounts_count=self.most_played_count)
+
+    def user_played_beatmap_ids(self, user_id: int) -> List[int]:
+        """
+        Beatmap ids of the user's MOST_PLAYED, ordered by playcount (descending).
+        """
+        return random.Random(f'{self.seed}:played:{user_id}').sample(range(1, self.beatmaps_count + 1),
+                                                                     self.most_played_count)
+
+    def most_played_page(self, user_id: int, *, limit: int, offset: int) -> List[dict]:
+        beatmap_ids = self.user_played_beatmap_ids(user_id)[offset:offset + limit]
+        return [self.beatmap_playcount(beatmap_id, count=self.most_played_count - offset - ind)
+                for ind, beatmap_id in enumerate(beatmap_ids)]
+
+    def beatmap_playcount(self, beatmap_id: int, *, count: int) -> dict:
+        return {
+            'beatmap_id': beatmap_id,
+            'beatmap': self.beatmap_compact(beatmap_id),
+            'beatmapset': self.beatmapset_compact(self.beatmapset_id(beatmap_id)),
+            'count': count,
+        }
+
+    def beatmap_compact(self, beatmap_id: int) -> dict:
+        return {
+            'difficulty_rating': round(1 + (beatmap_id % 70) / 10, 2),
+            'id': beatmap_id,
+            'mode': 'osu',
+            'status': 'ranked',
+            'total_length': 60 + beatmap_id % 240,
+            'version': f'Difficulty {beatmap_id}',
+            'user_id': 2,
+            'beatmapset_id': self.beatmapset_id(beatmap_id),
+        }
+
+    def beatmap(self, beatmap_id: int) -> dict:
+        return {
+            **self.beatmap_compact(beatmap_id),
+            'accuracy': 8.0,
+            'ar': 9.0,
+            'bpm': 180,
+            'convert': False,
+            'count_circles': 300,
+            'count_sliders': 100,
+            'count_spinners': 1,
+            'cs': 4.0,
+            'deleted_at': None,
+            'drain': 5.0,
+            'hit_length': 100,
+            'is_scoreable': True,
+            'last_updated': _DATETIME,
+            'mode_int': 0,
+            'passcount': 10,
+            'playcount': 100,
+            'ranked': 1,
+            'url': f'https://osu.ppy.sh/b/{beatmap_id}',
+            'max_combo': 500 + beatmap_id % 1000,
+        }
+
+    def beatmapset_compact(self, beatmapset_id: int) -> dict:
+        return {
+            'artist': f'Artist {beatmapset_id}',
+            'artist_unicode': f'Artist {beatmapset_id}',
+            'covers': {key: '' for key in ('cover', 'cover@2x', 'card', 'card@2x', 'list', 'list@2x',
+                                           'slimcover', 'slimcover@2x')},
+            'creator': 'mapper',
+            'favourite_count': 1,
+            'id': beatmapset_id,
+            'nsfw': False,
+            'offset': 0,
+            'play_count': 100,
+            'preview_url': '',
+            'source': '',
+            'status': 'ranked',
+            'spotlight': False,
+            'title': f'Title {beatmapset_id}',
+            'title_unicode': f'Title {beatmapset_id}',
+            'user_id': 2,
+            'video': False,
+            'hype': None,
+        }
+
+    def beatmapset(self, beatmapset_id: int) -> dict:
+        return {
+            **self.beatmapset_compact(beatmapset_id),
+            'availability': {'download_disabled': False, 'more_information': None},
+            'bpm': 180.0,
+            'can_be_hyped': False,
+            'deleted_at': None,
+            'discussion_enabled': True,
+            'discussion_locked': False,
+            'is_scoreable': True,
+            'last_updated': _DATETIME,
+            'legacy_thread_url': None,
+            'nominations_summary': {'current': 0, 'required': 2},
+            'ranked': 1,
+            'ranked_date': _DATETIME,
+            'storyboard': False,
+            'submitted_date': _DATETIME,
+            'tags': '',
+            'beatmaps': [self.beatmap(beatmap_id) for beatmap_id in self.beatmap_ids_of_set(beatmapset_id)],
+        }
+
+    def search_page(self, *, page: int, page_size: int = 50) -> dict:
+        """
+        'beatmapsets/search' page (cursor is the next page number, None on the last page).
+        """
+        first_id = (page - 1) * page_size + 1
+        beatmapset_ids = range(first_id, min(first_id + page_size, self.beatmapsets_count + 1))
+        is_last = first_id + page_size > self.beatmapsets_count
+        return {
+            'beatmapsets': [self.beatmapset(beatmapset_id) for beatmapset_id in beatmapset_ids],
+            'cursor': None if is_last else {'page': page + 1},
+            'cursor_string': None if is_last else str(page + 1),
+            'recommended_difficulty': None,
+            'error': None,
+            'total': self.beatmapsets_count,
+            'search': {'sort': 'ranked_desc'},
+        }
+
+    def user_beatmap_scores(self, beatmap_id: int, user_id: int) -> List[dict]:
+        """
+        All user's scores on the beatmap (one per mods combination), empty If the user has none.
+        """
+        rng = random.Random(f'{self.seed}:scores:{user_id}:{beatmap_id}')
+        if not self.exists(beatmap_id) or rng.random() >= self.score_ratio:
+            return []
+        mods_indexes = rng.sample(range(len(_SCORE_MODS)), rng.randint(1, 3))
+        return [self.score(beatmap_id, user_id, mods_index=mods_index, rng=rng) for mods_index in mods_indexes]
+
+    def user_beatmap_best_score(self, beatmap_id: int, user_id: int) -> Optional[dict]:
+        scores = self.user_beatmap_scores(beatmap_id, user_id)
+        if not scores:
+            return None
+        return max(scores, key=lambda score: (score['score'], -score['id']))
+
+    def user_recent_scores(self, user_id: int, *, limit: int, offset: int) -> List[dict]:
+        """
+        User's recent scores, the newest first (a few of the played beatmaps).
+        """
+        recent_beatmap_ids = self.user_played_beatmap_ids(user_id)[:10]
+        scores = [score for beatmap_id in recent_beatmap_ids
+                  for score in self.user_beatmap_scores(beatmap_id, user_id)[:1]]
+        return scores[offset:offset + limit]
+
+    def score(self, beatmap_id: int, user_id: int, *, mods_index: int, rng: random.Random) -> dict:
+        # Unique per user, beatmap and mods
+        score_id = (beatmap_id * 1000 + user_id % 100 * 10) * 10 + mods_index
+        accuracy = round(rng.uniform(0.8, 1.0), 4)
+        return {
+            'id': score_id,
+            'best_id': score_id,
+            'user_id': user_id,
+            'accuracy': accuracy,
+            'mods': _SCORE_MODS[mods_index],
+            'score': rng.randint(100000, 10000000),
+            'max_combo': rng.randint(100, 1500),
+            'perfect': False,
+            'statistics': {'count_50': 0, 'count_100': rng.randint(0, 50), 'count_300': rng.randint(300, 900),
+                           'count_geki': 0, 'count_katu': 0, 'count_miss': rng.randint(0, 10)},
+            'pp': round(rng.uniform(10, 400), 3),
+            'rank': rng.choice(_GRADES),
+            'created_at': f'2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00+00:00',
+            'mode': 'osu',
+            'mode_int': 0,
+            'replay': False,
+            'passed': True,
+            'current_user_attributes': {'pin': None},
+            'beatmap': self.beatmap(beatmap_id),
+            'beatmapset': self.beatmapset_compact(self.beatmapset_id(beatmap_id)),
+            'user': _user_compact(user_id),
+            'type': 'score_best_osu',
+        }
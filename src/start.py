@@ -38,7 +38,10 @@ async def main():
     PathManager.check_paths_existence()
 
     # Start the bot
-    await bot.main()
+    try:
+        await bot.main()
+    finally:
+        await UtilsFactory.close_all_instances()
 
 
 if __name__ == "__main__":
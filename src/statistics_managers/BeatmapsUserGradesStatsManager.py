@@ -1,6 +1,6 @@
 import io
 from pprint import pformat
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, AsyncIterable, Iterable
 
 import matplotlib.pyplot as plt
 from matplotlib.ticker import MaxNLocator
@@ -8,6 +8,7 @@ from ossapi.enums import Grade
 
 from db_managers.data_classes import DbUserInfo
 from factories import UtilsFactory
+from .iterables import iterate_async
 
 
 class BeatmapsUserGradesStatsManager:
@@ -15,7 +16,7 @@ class BeatmapsUserGradesStatsManager:
     Class designed to easily calculate user's grade statistics on certain group of beatmaps.
     """
 
-    def __init__(self, beatmap_ids: List[int], user_info: DbUserInfo, *, query_dict: dict):
+    def __init__(self, beatmap_ids: Iterable[int] | AsyncIterable[int], user_info: DbUserInfo, *, query_dict: dict):
         self.beatmap_ids = beatmap_ids
         self.osu_api_utils = UtilsFactory.get_osu_api_utils()
         self.user_info = user_info
@@ -57,7 +58,7 @@ class BeatmapsUserGradesStatsManager:
             raise RuntimeError(f"Class instance cannot call {__name__} more than once")
 
         self.is_calculated = True
-        for beatmap_id in self.beatmap_ids:
+        async for beatmap_id in iterate_async(self.beatmap_ids):
             grade = await self.osu_api_utils.get_user_beatmap_score_grade(beatmap_id, self.user_info)
             self.grades[grade] += 1
             self.beatmap_count += 1
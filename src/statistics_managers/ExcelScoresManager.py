@@ -1,20 +1,24 @@
 import datetime
 import pathlib
 import tempfile
-from typing import List
+from typing import Iterable, AsyncIterable
 
 import openpyxl
 from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
-from ossapi import Mod
 
 from core import PathManager
 from db_managers.data_classes import DbUserInfo, DbScoreInfo
 from factories import UtilsFactory
+from .iterables import iterate_async
 
 
 class ExcelScoresManager:
-    def __init__(self, user_info: DbUserInfo, scores_info: List[DbScoreInfo]):
+    def __init__(self, user_info: DbUserInfo, scores_info: Iterable[DbScoreInfo] | AsyncIterable[DbScoreInfo]):
+        """
+        'scores_info' can be streamed (e.g. 'ScoresTableManager.iter_all_user_scores'),
+        rows are written as they come (write only workbook).
+        """
         self.user_info = user_info
         self.scores_info = scores_info
 
@@ -22,8 +26,8 @@ class ExcelScoresManager:
         current_datetime = datetime.datetime.now()
         formatted_datetime = current_datetime.strftime("%Y-%m-%d")
         self.sheet_name = f'Scores_{formatted_datetime}'
-        self.workbook = openpyxl.Workbook()
-        self.sheet = self.workbook.active
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(self.sheet_name)
 
         self.db_manager = UtilsFactory.get_db_manager()
         self.temp_file_path: pathlib.Path | None = None
@@ -34,24 +38,19 @@ class ExcelScoresManager:
                       'Score link',
                       'Mods',
                       'Accuracy',
-                      'Scorev1']
-        self.sheet.append(header_row)
-
-        header_cell = self.sheet[1]
-
-        for cell in header_cell:
+                      'Scorev1',
+                      'Is best']
+        header_cells = []
+        for header in header_row:
+            cell = WriteOnlyCell(self.sheet, value=header)
             cell.font = Font(bold=True)
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
 
-        for score_info in self.scores_info:
-            score: dict = score_info.deserialize_score_json()
-
-            # Check if 'beatmapset' and 'beatmap' keys exist before accessing nested keys
-            score_id = score.get('id')
-            score_v1 = score.get('score')
-            beatmap_id = score.get('beatmap', {}).get('id') if score.get('beatmap') else 'None'
-            version = score.get('beatmap', {}).get('version') if score.get('beatmap') else 'None'
-            mods_value = score.get('mods')
-            accuracy = round(score.get('accuracy', 0) * 100, 2)
+        async for score_info in iterate_async(self.scores_info):
+            score_id = score_info.osu_score_id
+            beatmap_id = score_info.beatmap_id
+            accuracy = round((score_info.accuracy or 0) * 100, 2)
 
             score_cell = WriteOnlyCell(self.sheet, value='=HYPERLINK("{}", "{}")'.
                                        format(f"https://osu.ppy.sh/scores/osu/{score_id}", score_id))
@@ -61,7 +60,8 @@ class ExcelScoresManager:
                                          format(f"https://osu.ppy.sh/b/{beatmap_id}", beatmap_id))
             beatmap_cell.font = Font(color="0000FF", underline="single")
 
-            row_data = [beatmap_cell, version, score_cell, Mod(mods_value).short_name(), accuracy, score_v1]
+            row_data = [beatmap_cell, score_info.beatmap_version or 'None', score_cell, score_info.mods.short_name(),
+                        accuracy, score_info.total_score, score_info.is_best]
             self.sheet.append(row_data)
 
     def save_workbook(self) -> pathlib.Path:
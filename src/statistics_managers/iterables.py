@@ -0,0 +1,15 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, TypeVar
+
+T = TypeVar('T')
+
+
+async def iterate_async(iterable: Iterable[T] | AsyncIterable[T]) -> AsyncIterator[T]:
+    """
+    Iterates over the iterable whether it is a plain or an async (e.g. streamed from the database) one.
+    """
+    if isinstance(iterable, AsyncIterable):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item